@@ -0,0 +1,112 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Exists, JSONField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .explorecache import invalidate_events
+from .facets import invalidate_facets, record_created
+from .models import Event, EventCard, EventImage, EventPriceZone
+from .ranking import seed_score
+
+# card fields copied from the event as is
+EVENT_FIELDS = ['name', 'date', 'time', 'location', 'latitude', 'longitude', 'category']
+CARD_FIELDS = EVENT_FIELDS + ['cover_url', 'cover_variants', 'min_price', 'is_free']
+
+
+def _cheapest_price():
+    """Returns: Subquery - the cheapest price zone of the outer event (read through the (event, zone_price) index)."""
+    zones = EventPriceZone.objects.filter(event=OuterRef('pk')).order_by('zone_price')
+    return Subquery(zones.values('zone_price')[:1])
+
+
+def _first_image(field='image_url'):
+    """Returns: Subquery - field (url by default) of the first image of the outer event."""
+    images = EventImage.objects.filter(event=OuterRef('pk')).order_by('pk')
+    return Subquery(images.values(field)[:1])
+
+
+def refresh_event_cards(event_ids):
+    """
+    Create or update the cards of the events in one read and one upsert.
+
+    Must be called after writes that bypass model signals (bulk_create, queryset.update).
+    Cards of new events get a seed relevance score (see core.ranking.seed_score), existing cards
+    keep theirs until the next rank_events. Cached explore pages of the old and new category and
+    date of the events are invalidated, and facet counts adjusted (see core.facets).
+
+    Args:
+        event_ids (iterable): Ids of the events whose cards are refreshed.
+    Returns: int - number of refreshed cards.
+    """
+    events = Event.objects.filter(pk__in=list(event_ids)).annotate(
+        card_min_price=_cheapest_price(),
+        card_cover_url=_first_image(),
+        card_cover_variants=_first_image('variants'),
+    ).values('pk', 'card_min_price', 'card_cover_url', 'card_cover_variants', *EVENT_FIELDS)
+
+    today = date.today()
+    cards = [
+        EventCard(
+            event_id=event['pk'],
+            relevance_score=seed_score(event['date'], today),     # not in CARD_FIELDS, so kept on update
+            cover_url=event['card_cover_url'] or '',
+            cover_variants=event['card_cover_variants'] or {},
+            min_price=event['card_min_price'],
+            is_free=event['card_min_price'] == 0,
+            **{field: event[field] for field in EVENT_FIELDS}
+        )
+        for event in events
+    ]
+    if cards:
+        with transaction.atomic():
+            previous = list(EventCard.objects.filter(pk__in=[card.event_id for card in cards]).values_list(
+                'event_id', 'category', 'date'
+            ))
+            EventCard.objects.bulk_create(
+                cards,
+                update_conflicts=True,
+                unique_fields=['event'],
+                update_fields=CARD_FIELDS,
+            )
+            # after the write: caches are updated on commit (right away without an outer transaction),
+            # so a page or facet count computed before the write can't be kept as current
+            invalidate_events([
+                *((category, day) for _, category, day in previous), *((card.category, card.date) for card in cards)
+            ])
+            # facet counts are adjusted for new cards, changes of existing ones drop them
+            if previous:
+                invalidate_facets()
+            existing = {event_id for event_id, _, _ in previous}
+            record_created(card.event_id for card in cards if card.event_id not in existing)
+    return len(cards)
+
+
+def refresh_card_media(event_id):
+    """
+    Update price and cover fields of an existing card after its price zones or images changed.
+
+    Single UPDATE statement; it is a no-op for events without a card (e.g. events being deleted).
+    Cached explore pages of the card are invalidated once the update commits.
+    """
+    free_zones = EventPriceZone.objects.filter(event=OuterRef('pk'), zone_price=0)
+
+    with transaction.atomic():
+        # the card pk is the event id, so the subqueries correlate on it
+        EventCard.objects.filter(pk=event_id).update(
+            min_price=_cheapest_price(),
+            is_free=Exists(free_zones),
+            cover_url=Coalesce(_first_image(), Value('')),
+            cover_variants=Coalesce(_first_image('variants'), Value({}, output_field=JSONField())),
+        )
+        invalidate_events(EventCard.objects.filter(pk=event_id).values_list('category', 'date'))
+
+
+@transaction.atomic
+def rebuild_event_cards(first_id, last_id):
+    """
+    Rebuild cards of events with ids in the [first_id, last_id] range in one transaction.
+
+    Returns: int - number of rebuilt cards.
+    """
+    return refresh_event_cards(Event.objects.filter(pk__range=(first_id, last_id)).values_list('pk', flat=True))
@@ -0,0 +1,197 @@
+import json
+import base64
+import binascii
+import logging
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+from .models import EventCard
+from .search import search_events, to_match_query
+from .geo import events_within_radius
+
+logger = logging.getLogger(__name__)
+
+# orderings of the explore sort options (pk is the last key so the order is total)
+SORT_ORDERINGS = {
+    'relevance': ('-relevance_score', 'pk'),    # precomputed by manage.py rank_events (see core.ranking)
+    'date': ('date', 'time', 'pk'),
+    'price-low': ('min_price', 'date', 'time', 'pk'),
+    'price-high': ('-min_price', 'date', 'time', 'pk'),
+    'rank': ('search_rank', 'pk'),          # relevance of full-text search results (bm25, lower is better)
+}
+DEFAULT_SORT = 'date'
+DEFAULT_RADIUS_KM = 25
+EXPLORE_PAGE_SIZE = 24
+
+# NULL sort keys (e.g. min_price of events without price zones) are the smallest values: first in
+# ascending and last in descending orderings (SQLite's native order), cursors and seeks follow it
+
+
+def get_explore_events(filters):
+    """
+    Build the queryset of upcoming event cards for the explore page.
+
+    All filters are applied in SQL on the EventCard read model, which already
+    holds the starting price, cover image and badge of every event.
+
+    Args:
+        filters (dict): Cleaned data of ExploreFilterValidator.
+    Returns:
+        QuerySet: Event cards ordered by the selected sort.
+    """
+
+    events = EventCard.objects.all()
+
+    # only upcoming events are explored
+    date_from = filters.get('date_from')
+    today = date.today()
+    events = events.filter(date__gte=max(date_from, today) if date_from else today)
+
+    if filters.get('date_to'):
+        events = events.filter(date__lte=filters['date_to'])
+
+    if filters.get('q'):
+        events = search_events(events, filters['q'], pk_column='core_eventcard.event_id')
+
+    if filters.get('location'):
+        place = filters['location']
+        events = events_within_radius(events, place.latitude, place.longitude, get_radius(filters))
+
+    if filters.get('category'):
+        events = events.filter(category__in=filters['category'])
+
+    # price filters apply to the starting (cheapest) price shown on the card
+    if filters.get('free_only'):
+        events = events.filter(is_free=True)
+    else:
+        if filters.get('price_min') is not None:
+            events = events.filter(min_price__gte=filters['price_min'])
+        if filters.get('price_max') is not None:
+            events = events.filter(min_price__lte=filters['price_max'])
+
+    return events.order_by(*_order_by(SORT_ORDERINGS[get_sort(filters)]))
+
+
+def _order_by(ordering):
+    """Returns: list - order expressions of the ordering with NULLs as the smallest values."""
+    return [
+        F(field[1:]).desc(nulls_last=True) if field.startswith('-') else F(field).asc(nulls_first=True)
+        for field in ordering
+    ]
+
+
+def get_sort(filters):
+    """Returns: the selected sort option or the default one (search results default to search relevance)."""
+    sort = filters.get('sort')
+    if sort in (None, '', 'relevance') and filters.get('q') and to_match_query(filters['q']):
+        return 'rank'
+    return sort or DEFAULT_SORT
+
+
+def get_radius(filters):
+    """Returns: the search radius around the location in km (the default one when it's missing or invalid)."""
+    return filters.get('radius') or DEFAULT_RADIUS_KM
+
+
+def encode_cursor(sort, values):
+    """
+    Encode the sort key of the last row of a page into an opaque cursor.
+
+    Args:
+        sort (str): Sort option the cursor was produced for.
+        values (list): Values of the ordering fields of the last row.
+    Returns:
+        str: URL-safe cursor.
+    """
+    # NULL sort keys are kept as JSON null
+    payload = json.dumps(
+        {'s': sort, 'v': [None if v is None else str(v) for v in values]}, separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(sort, cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        list | None: Sort key values, or None when the cursor is missing, malformed
+            or was produced for another sort option.
+    """
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        values = payload['v']
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+
+    if payload.get('s') != sort or not isinstance(values, list) or len(values) != len(SORT_ORDERINGS[sort]):
+        return None
+    return values
+
+
+def _seek_filter(ordering, values):
+    """
+    Build the keyset predicate "row comes after (values)" for the given ordering.
+
+    For ordering (a, b, pk) it expands to:
+        a > v0 OR (a = v0 AND b > v1) OR (a = v0 AND b = v1 AND pk > v2)
+    with `<` for descending fields, so the database seeks through the index
+    instead of skipping rows with OFFSET. NULL values are the smallest ones:
+    `a > NULL` is `a IS NOT NULL`, `a < v` includes `a IS NULL` and nothing is `< NULL`.
+    """
+    seek = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        if value is None:
+            after = Q(pk__in=[]) if descending else Q(**{f'{name}__isnull': False})
+            same = Q(**{f'{name}__isnull': True})
+        else:
+            after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            if descending:
+                after |= Q(**{f'{name}__isnull': True})
+            same = Q(**{name: value})
+        seek |= equal & after
+        equal &= same
+    return seek
+
+
+def paginate_events(events, sort, cursor=None, page_size=EXPLORE_PAGE_SIZE):
+    """
+    Fetch a single page of events with keyset (cursor) pagination.
+
+    Args:
+        events (QuerySet): Ordered queryset of event cards from get_explore_events.
+        sort (str): Active sort option.
+        cursor (str): Cursor of the previous page, optional.
+        page_size (int): Number of events per page.
+    Returns:
+        tuple: (list of events of the page, cursor of the next page or None if it was the last page).
+            An invalid cursor gives an empty last page, so clients never loop back to the first page.
+    """
+    ordering = SORT_ORDERINGS[sort]
+
+    if cursor:
+        values = decode_cursor(sort, cursor)
+        try:
+            if values is None:
+                raise ValueError("malformed or produced for another sort option")
+            events = events.filter(_seek_filter(ordering, values))
+        except (ValidationError, ValueError, TypeError) as e:
+            logger.warning("Dropped explore cursor %r (sort %s): %s", cursor, sort, e)
+            return [], None
+
+    # fetch one extra row to know whether there is a next page
+    page = list(events[:page_size + 1])
+    if len(page) <= page_size:
+        return page, None
+
+    page = page[:page_size]
+    last = page[-1]
+    next_cursor = encode_cursor(sort, [getattr(last, field.lstrip('-')) for field in ordering])
+    return page, next_cursor
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.safestring import mark_safe
+
+from .explore import decode_cursor, get_radius
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+# rendered explore pages are cached under a canonical key of the normalized filters, so equal searches
+# written differently (parameter order, repeated categories, "10" and "10.00") share one entry;
+# the key also holds the generations of the (category, month) buckets the filters can match,
+# a write to an event card bumps the generations of its buckets (old and new ones), and pages
+# of other categories and dates stay cached
+
+_GENERATION_PREFIX = 'explore:gen:'
+_PAGE_PREFIX = 'explore:page:'
+_ANY_MONTH = '*'
+
+
+def _cache():
+    return caches['explore']
+
+
+def _month(day):
+    return f'{day.year:04d}-{day.month:02d}'
+
+
+def _months(first, last):
+    """Returns: list - months from the month of first to the month of last."""
+    months = []
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _decimal(value):
+    return None if value is None else format(value.normalize(), 'f')
+
+
+def canonical_filters(filters, sort, cursor):
+    """
+    Normalize explore filters into the values that decide the results of a page.
+
+    Args:
+        filters (dict): Cleaned data of ExploreFilterValidator.
+        sort (str): Active sort option (see core.explore.get_sort).
+        cursor (str): Cursor of the previous page, optional.
+    Returns:
+        dict: JSON serializable filters (categories sorted, prices and query normalized,
+            date window starting today at the earliest, radius defaulted, cursor decoded).
+    """
+    today = date.today()
+    date_from = filters.get('date_from')
+    place = filters.get('location')
+    free_only = bool(filters.get('free_only'))
+    values = decode_cursor(sort, cursor)
+
+    return {
+        'q': ' '.join((filters.get('q') or '').split()).casefold(),
+        'category': sorted(set(filters.get('category') or [])),
+        'free': free_only,
+        # price bounds are ignored for free events only
+        'price': None if free_only else [_decimal(filters.get('price_min')), _decimal(filters.get('price_max'))],
+        'place': [round(place.latitude, 6), round(place.longitude, 6), get_radius(filters)] if place else None,
+        'dates': [
+            max(date_from, today).isoformat() if date_from else today.isoformat(),
+            filters['date_to'].isoformat() if filters.get('date_to') else None,
+        ],
+        'sort': sort,
+        # cursors that don't decode share a key of their own (an empty page, see paginate_events), not the first page's
+        'cursor': values if values is not None or not cursor else 'invalid',
+    }
+
+
+def _buckets(canonical):
+    """Returns: list - generation keys of the (category, month) buckets the filters can match."""
+    categories = canonical['category'] or [category for category, _ in Event.CATEGORIES]
+    date_from, date_to = canonical['dates']
+    months = [_ANY_MONTH]
+    if date_to:
+        window = _months(date.fromisoformat(date_from), date.fromisoformat(date_to))
+        if len(window) <= settings.EXPLORE_CACHE['MAX_WINDOW_MONTHS']:
+            months = window
+    return [f'{_GENERATION_PREFIX}{category}:{month}' for category in categories for month in months]
+
+
+def _generations(keys):
+    """
+    Returns: list - current generations of the buckets.
+
+    Missing generations (never bumped or evicted) start at the current time, not at zero,
+    so pages cached before an eviction can't match again.
+    """
+    cache = _cache()
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), timeout=None)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        values.update(cache.get_many(missing))
+    return [values.get(key, 0) for key in keys]
+
+
+def generations(canonical, all_events=False):
+    """
+    Returns: list - current generations of the buckets the canonical filters can match
+        (of all categories and dates with all_events, e.g. for counts across all categories).
+    """
+    if all_events:
+        return _generations([f'{_GENERATION_PREFIX}{category}:{_ANY_MONTH}' for category, _ in Event.CATEGORIES])
+    return _generations(_buckets(canonical))
+
+
+def page_key(canonical):
+    """Returns: str - cache key of the page for the canonical filters at the current bucket generations."""
+    payload = json.dumps([canonical, generations(canonical)], sort_keys=True, separators=(',', ':'))
+    return _PAGE_PREFIX + hashlib.sha256(payload.encode()).hexdigest()
+
+
+def invalidate_events(categories_and_dates):
+    """
+    Bump the generations of the buckets of the given events once the current transaction commits
+    (right away outside of transactions), so cached pages that could include them are not served again.
+
+    Args:
+        categories_and_dates (iterable): (category, date) pairs of written events, old and new values.
+    """
+    keys = set()
+    for category, day in categories_and_dates:
+        keys.add(f'{_GENERATION_PREFIX}{category}:{_month(day)}')
+        keys.add(f'{_GENERATION_PREFIX}{category}:{_ANY_MONTH}')
+    if keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def _bump(keys):
+    cache = _cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+    _stats.record('invalidations', len(keys))
+
+
+class CacheStats:
+    """Thread-safe in-process hit and miss counters of the explore cache, logged every REPORT_EVERY lookups."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, outcome, count=1):
+        with self._lock:
+            self._counts[outcome] += count
+            lookups = self._counts['hits'] + self._counts['misses']
+            report = outcome in ('hits', 'misses') and lookups % settings.EXPLORE_CACHE['REPORT_EVERY'] == 0
+            counts = dict(self._counts)
+        if report:
+            logger.info(
+                "Explore cache: %d lookups, hit ratio %.1f%% (first pages %.1f%%, next pages %.1f%%), "
+                "%d bucket invalidations.",
+                lookups, _ratio(counts, 'hits', 'misses'),
+                _ratio(counts, 'first page hits', 'first page misses'),
+                _ratio(counts, 'next page hits', 'next page misses'),
+                counts.get('invalidations', 0),
+            )
+
+
+def _ratio(counts, hits, misses):
+    lookups = counts.get(hits, 0) + counts.get(misses, 0)
+    return 100 * counts.get(hits, 0) / lookups if lookups else 0.0
+
+
+_stats = CacheStats()
+
+
+def cached_page(filters, sort, cursor, render):
+    """
+    Serve a rendered page of explore results from cache, rendering and caching it on a miss.
+
+    Args:
+        filters (dict): Cleaned data of ExploreFilterValidator.
+        sort (str): Active sort option.
+        cursor (str): Cursor of the previous page, optional.
+        render (callable): render() -> dict with html of the event cards, their count and the next cursor.
+    Returns:
+        dict: html (safe string), count and next_cursor of the page.
+    """
+    if not settings.EXPLORE_CACHE['ENABLED']:
+        return render()
+
+    page = 'next page' if cursor else 'first page'
+    key = page_key(canonical_filters(filters, sort, cursor))
+    result = _cache().get(key)
+    if result is None:
+        _stats.record(f'{page} misses')
+        _stats.record('misses')
+        result = render()
+        _cache().set(key, {**result, 'html': str(result['html'])})
+    else:
+        _stats.record(f'{page} hits')
+        _stats.record('hits')
+    return {**result, 'html': mark_safe(result['html'])}
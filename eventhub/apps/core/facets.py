@@ -0,0 +1,289 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .explore import get_explore_events, get_radius
+from .explorecache import canonical_filters, generations
+from .models import Event, EventCard
+
+# price bands of the sidebar (starting price of the card, both bounds inclusive like the price filters)
+PRICE_BANDS = [
+    ('free', 'Free', Decimal('0'), Decimal('0')),
+    ('under-25', 'Under $25', Decimal('0.01'), Decimal('24.99')),
+    ('25-50', '$25 - $50', Decimal('25'), Decimal('49.99')),
+    ('50-100', '$50 - $100', Decimal('50'), Decimal('99.99')),
+    ('100-plus', '$100 & up', Decimal('100'), None),
+]
+
+# quick dates of the sidebar (same ranges as the buttons of explore-events.js)
+DATE_BUCKETS = ['today', 'week', 'month']
+
+CARD_FIELDS = ['category', 'date', 'min_price', 'is_free']
+
+# every facet count is one conditional aggregate over the events matching the search and location
+# filters: an option of a facet is counted with the filters of the other facets applied (selecting it
+# combines with them) but not with its own, so all counts of the sidebar come from a single query
+
+
+def _between(value, low, high):
+    return value is not None and (low is None or value >= low) and (high is None or value <= high)
+
+
+def _date_buckets(today):
+    """Returns: dict - (first, last) day of the quick date ranges."""
+    next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return {
+        'today': (today, today),
+        'week': (today, today + timedelta(days=6)),
+        'month': (today, next_month - timedelta(days=1)),
+    }
+
+
+def _filter_conditions(filters, today):
+    """
+    Returns: dict - (Q, test) of the category, price and date filters, where test(card) checks
+        the filter on a dict of CARD_FIELDS the same way Q does in the database.
+    """
+    categories = set(filters.get('category') or [])
+    category = (
+        (Q(category__in=categories), lambda card: card['category'] in categories) if categories
+        else (Q(), lambda card: True)
+    )
+
+    if filters.get('free_only'):
+        price = (Q(is_free=True), lambda card: card['is_free'])
+    else:
+        low, high = filters.get('price_min'), filters.get('price_max')
+        price_q = Q()
+        if low is not None:
+            price_q &= Q(min_price__gte=low)
+        if high is not None:
+            price_q &= Q(min_price__lte=high)
+        price = (
+            (price_q, lambda card: _between(card['min_price'], low, high)) if low is not None or high is not None
+            else (Q(), lambda card: True)
+        )
+
+    date_from = max(filters['date_from'], today) if filters.get('date_from') else today
+    date_to = filters.get('date_to')
+    date_q = Q(date__gte=date_from) & (Q(date__lte=date_to) if date_to else Q())
+    dates = (date_q, lambda card: _between(card['date'], date_from, date_to))
+
+    return {'category': category, 'price': price, 'date': dates}
+
+
+def _facet_options(today):
+    """Returns: list - (facet, option, Q, test) of every counted option."""
+    options = [
+        ('category', value, Q(category=value), lambda card, value=value: card['category'] == value)
+        for value, _ in Event.CATEGORIES
+    ]
+    for value, _, low, high in PRICE_BANDS:
+        if value == 'free':
+            options.append(('price', value, Q(is_free=True), lambda card: card['is_free']))
+        else:
+            band = Q(min_price__gte=low) & (Q(min_price__lte=high) if high is not None else Q())
+            options.append((
+                'price', value, band,
+                lambda card, low=low, high=high: _between(card['min_price'], low, high)
+            ))
+    for value, (first, last) in _date_buckets(today).items():
+        options.append((
+            'date', value, Q(date__range=(first, last)),
+            lambda card, first=first, last=last: _between(card['date'], first, last)
+        ))
+    return options
+
+
+def _counters(filters, today):
+    """Returns: dict - (Q, test) of every count of the facet vector ('total' and 'facet:option')."""
+    conditions = _filter_conditions(filters, today)
+    counters = {
+        'total': (
+            conditions['category'][0] & conditions['price'][0] & conditions['date'][0],
+            lambda card: all(test(card) for _, test in conditions.values())
+        )
+    }
+    for facet, option, option_q, option_test in _facet_options(today):
+        others = [conditions[name] for name in conditions if name != facet]
+        condition = option_q
+        for other_q, _ in others:
+            condition &= other_q
+        counters[f'{facet}:{option}'] = (
+            condition,
+            lambda card, option_test=option_test, others=others: (
+                option_test(card) and all(test(card) for _, test in others)
+            )
+        )
+    return counters
+
+
+def count_facets(filters, counters=None):
+    """
+    Count events of every facet option for the filters in one conditional aggregate query.
+
+    Args:
+        filters (dict): Cleaned data of ExploreFilterValidator.
+        counters (dict): Result of _counters for the filters, optional.
+    Returns:
+        dict: Counts by 'total' and 'facet:option' keys.
+    """
+    if counters is None:
+        counters = _counters(filters, date.today())
+
+    # search and location narrow the events of all facets, the other filters are counted per option
+    events = get_explore_events({
+        'q': filters.get('q'), 'location': filters.get('location'), 'radius': get_radius(filters),
+    }).order_by()
+    aliases = {f'count_{i}': key for i, key in enumerate(counters)}
+    counts = events.aggregate(**{
+        alias: Count('pk', filter=counters[key][0]) for alias, key in aliases.items()
+    })
+    return {key: counts[alias] for alias, key in aliases.items()}
+
+
+class FacetVectorCache:
+    """
+    Thread-safe in-process LRU cache of facet vectors of filters without search and location
+    (the hot ones: the default sidebar and its checkbox combinations).
+
+    Vectors of created events are adjusted in place (the new card is tested against the filters of
+    every cached vector), other event changes drop all vectors. A vector computed while events were
+    created or changed is not stored, as it could miss or double count them.
+
+    Args:
+        maxsize (int): Maximum number of vectors.
+        ttl (float): Time to live of a vector in seconds (bounds drift from writes of other processes).
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns: tuple - (copy of the cached counts or None, epoch to pass to set)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                return None, self._epoch
+            self._entries.move_to_end(key)
+            return dict(entry[2]), self._epoch
+
+    def set(self, key, counters, counts, epoch):
+        """Store the counts computed since get returned epoch, unless events were written in between."""
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, counters, dict(counts))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def add_cards(self, cards):
+        """Count the created event cards (dicts of CARD_FIELDS) in every cached vector they match."""
+        with self._lock:
+            self._epoch += 1
+            for _, counters, counts in self._entries.values():
+                for card in cards:
+                    for key, (_, test) in counters.items():
+                        if test(card):
+                            counts[key] += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_vectors = FacetVectorCache(settings.FACETS['CACHE_SIZE'], settings.FACETS['CACHE_TTL'])
+
+
+def record_created(event_ids):
+    """
+    Adjust cached facet vectors for created events once the current transaction commits
+    (their cards then hold the final starting price).
+
+    Args:
+        event_ids (iterable): Ids of the created events.
+    """
+    event_ids = list(event_ids)
+
+    def adjust():
+        if len(_vectors):
+            today = date.today()
+            _vectors.add_cards([
+                card for card in EventCard.objects.filter(pk__in=event_ids).values(*CARD_FIELDS)
+                if card['date'] >= today
+            ])
+
+    if event_ids:
+        transaction.on_commit(adjust)
+
+
+def invalidate_facets():
+    """Drop cached facet vectors after events were changed or deleted (once the transaction commits)."""
+    transaction.on_commit(_vectors.clear)
+
+
+def get_facet_counts(filters):
+    """
+    Facet counts of the explore sidebar for the current filters.
+
+    Vectors of filters without search and location are served from the in-process FacetVectorCache,
+    the others from the explore cache (invalidated with the event card generations, see core.explorecache).
+
+    Args:
+        filters (dict): Cleaned data of ExploreFilterValidator.
+    Returns:
+        dict: total count, category and price lists of options (value, label, count) and date counts
+            (today, week, month).
+    """
+    today = date.today()
+    canonical = canonical_filters(filters, None, None)
+    key = json.dumps([canonical, today.isoformat()], sort_keys=True, separators=(',', ':'))
+
+    if canonical['q'] or canonical['place']:
+        # counts span all categories and upcoming dates
+        cache_key = 'explore:facets:' + hashlib.sha256(
+            json.dumps([key, generations(canonical, all_events=True)]).encode()
+        ).hexdigest()
+        counts = caches['explore'].get(cache_key)
+        if counts is None:
+            counts = count_facets(filters)
+            caches['explore'].set(cache_key, counts)
+    else:
+        counts, epoch = _vectors.get(key)
+        if counts is None:
+            counters = _counters(filters, today)
+            counts = count_facets(filters, counters)
+            _vectors.set(key, counters, counts, epoch)
+
+    return {
+        'total': counts['total'],
+        'category': [
+            {'value': value, 'label': label, 'count': counts[f'category:{value}']} for value, label in Event.CATEGORIES
+        ],
+        'price': [
+            {'value': value, 'label': label, 'min': low, 'max': high, 'count': counts[f'price:{value}']}
+            for value, label, low, high in PRICE_BANDS
+        ],
+        'date': {value: counts[f'date:{value}'] for value in DATE_BUCKETS},
+    }
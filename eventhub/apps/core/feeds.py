@@ -0,0 +1,156 @@
+import heapq
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .geo import events_within_radius, haversine_km
+from .models import Event, EventCard, FeedCandidate, Reservation
+from users.models import Profile
+
+# feeds are built offline (manage.py build_feeds): every user gets the best FEED["MAX_CANDIDATES"]
+# of the most relevant upcoming events and the events near them, scored by relevance, proximity
+# and category affinity; the home page then reads the top of the feed in one indexed query
+
+CARD_FIELDS = ['pk', 'category', 'latitude', 'longitude', 'relevance_score']
+
+
+def user_affinities(user_ids):
+    """
+    Category affinity of the users: share of every category among the events they organized or reserved.
+
+    Args:
+        user_ids (list): Ids of the users.
+    Returns:
+        dict: {user id: {category: share (0 to 1)}}, users without events are missing.
+    """
+    counts = defaultdict(Counter)
+    organized = Event.objects.filter(organizer_id__in=user_ids).values('organizer_id', 'category').annotate(
+        events=Count('pk')
+    )
+    for row in organized:
+        counts[row['organizer_id']][row['category']] += row['events']
+
+    reserved = Reservation.objects.filter(
+        buyer_id__in=user_ids, status__in=[Reservation.HELD, Reservation.CONFIRMED]
+    ).values('buyer_id', 'zone__event__category').annotate(events=Count('zone__event', distinct=True))
+    for row in reserved:
+        counts[row['buyer_id']][row['zone__event__category']] += row['events']
+
+    return {
+        user_id: {category: count / sum(categories.values()) for category, count in categories.items()}
+        for user_id, categories in counts.items()
+    }
+
+
+def proximity(latitude, longitude, card, radius_km):
+    """Returns: float - 1 at the location of the user, falling to 0 at radius_km (0 without coordinates)."""
+    if latitude is None or longitude is None or card['latitude'] is None or card['longitude'] is None:
+        return 0.0
+    distance = haversine_km(latitude, longitude, card['latitude'], card['longitude'])
+    return max(0.0, 1 - distance / radius_km)
+
+
+def _nearby_cards(latitude, longitude, today, config):
+    """Returns: list - upcoming event cards within FEED["RADIUS_KM"] of the point, closest first."""
+    cards = events_within_radius(
+        EventCard.objects.filter(date__gte=today), latitude, longitude, config['RADIUS_KM']
+    )
+    return list(cards.order_by('distance_km').values(*CARD_FIELDS)[:config['LOCAL_LIMIT']])
+
+
+def _user_feed(user, pool, affinity, today, config):
+    """Returns: list - (score, card id) of the best candidates of the user."""
+    _, latitude, longitude = user
+    weights = config['WEIGHTS']
+
+    cards = {card['pk']: card for card in pool}
+    if latitude is not None and longitude is not None:
+        cards.update((card['pk'], card) for card in _nearby_cards(latitude, longitude, today, config))
+
+    return heapq.nlargest(config['MAX_CANDIDATES'], (
+        (
+            weights['relevance'] * card['relevance_score']
+            + weights['proximity'] * proximity(latitude, longitude, card, config['RADIUS_KM'])
+            + weights['affinity'] * affinity.get(card['category'], 0.0),
+            pk,
+        )
+        for pk, card in cards.items()
+    ))
+
+
+def build_feeds(batch_size=None):
+    """
+    Rebuild the feed candidates of all active users, one batch of users per transaction.
+
+    The pool of the most relevant upcoming events is read once; every batch reads the category
+    affinities of its users in two grouped queries, plus one indexed radius query per user with
+    a location, and replaces their candidates with one delete and one bulk insert.
+
+    Args:
+        batch_size (int): Users per transaction (FEED["BATCH_SIZE"] by default).
+    Returns:
+        tuple: (number of users, number of candidates).
+    """
+    config = settings.FEED
+    if batch_size is None:
+        batch_size = config['BATCH_SIZE']
+
+    today = date.today()
+    pool = list(
+        EventCard.objects.filter(date__gte=today).order_by('-relevance_score', 'pk').values(*CARD_FIELDS)
+        [:config['POOL_SIZE']]
+    )
+
+    users = Profile.objects.filter(is_active=True).order_by('pk')
+    built = candidates = 0
+    last_id = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_id).values_list('pk', 'latitude', 'longitude')[:batch_size])
+        if not batch:
+            return built, candidates
+        last_id = batch[-1][0]
+        affinities = user_affinities([user_id for user_id, _, _ in batch])
+
+        now = timezone.now()
+        feeds = [
+            FeedCandidate(user_id=user[0], card_id=card_id, score=score, built_at=now)
+            for user in batch
+            for score, card_id in _user_feed(user, pool, affinities.get(user[0], {}), today, config)
+        ]
+        with transaction.atomic():
+            FeedCandidate.objects.filter(user_id__in=[user_id for user_id, _, _ in batch]).delete()
+            FeedCandidate.objects.bulk_create(feeds)
+        built += len(batch)
+        candidates += len(feeds)
+
+
+def render_feed(user):
+    """
+    Render the home feed of the user, cached for FEED["CACHE_TTL"] seconds.
+
+    The top candidates of the user are read in one query through the (user, score) index; users
+    without a built feed yet get the most relevant upcoming events (card relevance index).
+
+    Returns:
+        str: Rendered event cards, empty when there are no upcoming events.
+    """
+    key = f'feed:{user.pk}'
+    html = cache.get(key)
+    if html is None:
+        config = settings.FEED
+        today = date.today()
+        candidates = FeedCandidate.objects.filter(user=user, card__date__gte=today).select_related('card')
+        events = [candidate.card for candidate in candidates.order_by('-score')[:config['PAGE_SIZE']]]
+        if not events:
+            events = list(
+                EventCard.objects.filter(date__gte=today).order_by('-relevance_score', 'pk')[:config['PAGE_SIZE']]
+            )
+        html = render_to_string('core/partials/event-cards.html', {'events': events}).strip()
+        cache.set(key, html, config['CACHE_TTL'])
+    return html
@@ -1,11 +1,16 @@
 
+import json
+
 from django import forms
+from django.conf import settings
 from django.forms import formset_factory
 from django.core.exceptions import ValidationError
 from datetime import date as d, datetime
 
+from .explore import get_radius
 from .models import Event
-from users.utils import validate_location, is_valid_image_format, MAX_FILE_SIZE_MB
+from .zones import parse_price_zones
+from users.utils import geocode_location, is_valid_image_format, MAX_FILE_SIZE_MB
 
 
 class EventInfoValidator(forms.Form):
@@ -21,8 +26,12 @@ class EventInfoValidator(forms.Form):
         description (str): Description of the event, optional.
         seating_type (str): Seating type of the event (general or reserved), required.
         
+    Args:
+        geocode (bool): Geocode the location (True by default); bulk imports defer geocoding
+            to a later phase (manage.py geocode_events) and keep the location as submitted.
+
     Returns:
-        dict: Cleaned and validated data.
+        dict: Cleaned and validated data (with latitude and longitude of the geocoded location).
     """
     
     name =  forms.CharField(
@@ -73,6 +82,10 @@ class EventInfoValidator(forms.Form):
         }
     )
     
+    def __init__(self, *args, geocode=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.geocode = geocode
+
     # check that event date is not in the past
     def clean_date(self):
         date = self.cleaned_data.get('date')
@@ -83,8 +96,11 @@ class EventInfoValidator(forms.Form):
     def clean_location(self):
         location = self.cleaned_data.get('location')
         
-        if location:
-            location = validate_location(location)
+        if location and self.geocode:
+            place = geocode_location(location)
+            location = place.display_name
+            self.cleaned_data['latitude'] = place.latitude
+            self.cleaned_data['longitude'] = place.longitude
             
             # update location on form
             self.data = self.data.copy()
@@ -205,5 +221,137 @@ class PriceZoneValidator(forms.Form):
         }
     )
 
-# formset to handle multiple PriceZoneValidator forms (user can add as many price zones for the new event as needed)
-PriceZoneFormSet = formset_factory(PriceZoneValidator, extra=0, min_num=1, validate_min=True, can_delete=True)
+# formset to handle multiple PriceZoneValidator forms (fallback of the JSON price zone payload when it is not posted,
+# user can add up to PRICE_ZONES["MAX_ZONES"] price zones for the new event)
+PriceZoneFormSet = formset_factory(
+    PriceZoneValidator, extra=0, min_num=1, validate_min=True, can_delete=True,
+    max_num=settings.PRICE_ZONES['MAX_ZONES'], validate_max=True
+)
+
+
+class PriceZonePayloadValidator(forms.Form):
+    """
+    Validates price zones posted as one JSON payload for event (Event) creation.
+
+    The create event page posts its price zones as JSON instead of formset fields, so
+    hundreds of zones are validated in one pass over plain dicts (see core.zones).
+
+    Fields:
+        price_zones (str): JSON list of price zones (zone_name, zone_price, zone_seats), required.
+
+    Returns:
+        dict: Cleaned price zones (list of dicts with zone_name, zone_price and zone_seats).
+    """
+
+    price_zones = forms.CharField(
+        required=True,
+        strip=False,
+        error_messages={'required': 'At least one price zone is required.'}
+    )
+
+    def clean_price_zones(self):
+        return parse_price_zones(self.cleaned_data.get('price_zones'))
+
+    def formset(self):
+        """
+        Bind the submitted zones to PriceZoneFormSet, to render them back when the form has errors.
+
+        Returns:
+            PriceZoneFormSet: Formset with the submitted zones (an empty one if they can't be decoded).
+        """
+        try:
+            zones = json.loads(self.data.get('price_zones') or '')
+        except ValueError:
+            zones = None
+        if not isinstance(zones, list) or not zones:
+            return PriceZoneFormSet(prefix="zones")
+
+        zones = zones[:settings.PRICE_ZONES['MAX_ZONES']]
+        data = {'zones-TOTAL_FORMS': len(zones), 'zones-INITIAL_FORMS': 0}
+        for i, zone in enumerate(zones):
+            if isinstance(zone, dict):
+                for field in PriceZoneValidator.base_fields:
+                    data[f'zones-{i}-{field}'] = zone.get(field)
+        return PriceZoneFormSet(data, prefix="zones")
+
+
+class ExploreFilterValidator(forms.Form):
+    """
+    Validates filters submitted from the explore events sidebar.
+
+    Fields:
+        q (str): Full-text search over event name, description and location, optional.
+        category (list[str]): Event categories to include, optional.
+        free_only (bool): Only include events with a free price zone, optional.
+        price_min (decimal): Lowest starting price in USD, optional.
+        price_max (decimal): Highest starting price in USD, optional.
+        location (str): Place to search events around, optional.
+        radius (int): Search radius around the location in km (1-100), optional.
+        date_from (date): Earliest event date, optional.
+        date_to (date): Latest event date, optional.
+        sort (str): Sort option of the results, optional.
+
+    Returns:
+        dict: Cleaned filters (invalid filters are left out of cleaned data).
+    """
+
+    # the default sort (core.explore.DEFAULT_SORT) comes first
+    SORT_OPTIONS = [
+        ('date', 'Date'),
+        ('relevance', 'Relevance'),
+        ('price-low', 'Price (Low to High)'),
+        ('price-high', 'Price (High to Low)'),
+    ]
+
+    q = forms.CharField(required=False, max_length=200)
+    category = forms.MultipleChoiceField(
+        required=False,
+        choices=Event.CATEGORIES,
+        error_messages={'invalid_choice': 'Select a valid event category.'}
+    )
+    free_only = forms.BooleanField(required=False)
+    price_min = forms.DecimalField(
+        required=False,
+        min_value=0,
+        decimal_places=2,
+        max_digits=10,
+        error_messages={'min_value': 'Price cannot be negative.'}
+    )
+    price_max = forms.DecimalField(
+        required=False,
+        min_value=0,
+        decimal_places=2,
+        max_digits=10,
+        error_messages={'min_value': 'Price cannot be negative.'}
+    )
+    location = forms.CharField(required=False, max_length=255)
+    radius = forms.IntegerField(required=False, min_value=1, max_value=100)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    sort = forms.ChoiceField(required=False, choices=SORT_OPTIONS)
+
+    # geocode location to search around its coordinates
+    def clean_location(self):
+        location = self.cleaned_data.get('location')
+        if location:
+            return geocode_location(location)
+        return None
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        # drop reversed ranges instead of returning an empty result
+        price_min = cleaned_data.get('price_min')
+        price_max = cleaned_data.get('price_max')
+        if price_min is not None and price_max is not None and price_min > price_max:
+            self.add_error('price_max', "Max price cannot be lower than min price.")
+
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            self.add_error('date_to', "End date cannot be before start date.")
+
+        # a missing or invalid radius (dropped from cleaned data) falls back to the default one
+        cleaned_data['radius'] = get_radius(cleaned_data)
+
+        return cleaned_data
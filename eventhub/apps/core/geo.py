@@ -0,0 +1,155 @@
+import math
+
+from django.db import connections
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+GEO_INDEX_TABLE = 'core_event_rtree'
+
+# R*Tree spatial index of event coordinates (a point is stored as a zero-size box);
+# id of the index row is the id of the event
+CREATE_GEO_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {GEO_INDEX_TABLE} USING rtree(id, min_lat, max_lat, min_lon, max_lon)
+"""
+
+# triggers keep the index in sync with coordinates of core_event rows
+CREATE_GEO_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {GEO_INDEX_TABLE}_insert AFTER INSERT ON core_event
+    WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+        INSERT INTO {GEO_INDEX_TABLE} VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {GEO_INDEX_TABLE}_update AFTER UPDATE OF latitude, longitude ON core_event BEGIN
+        DELETE FROM {GEO_INDEX_TABLE} WHERE id = old.id;
+        INSERT INTO {GEO_INDEX_TABLE}
+        SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+        WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {GEO_INDEX_TABLE}_delete AFTER DELETE ON core_event BEGIN
+        DELETE FROM {GEO_INDEX_TABLE} WHERE id = old.id;
+    END
+    """,
+]
+
+DROP_GEO_INDEX_SQL = [
+    f"DROP TRIGGER IF EXISTS {GEO_INDEX_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {GEO_INDEX_TABLE}_update",
+    f"DROP TRIGGER IF EXISTS {GEO_INDEX_TABLE}_delete",
+    f"DROP TABLE IF EXISTS {GEO_INDEX_TABLE}",
+]
+
+
+def create_geo_index(schema_editor):
+    """
+    Create the spatial index table and its sync triggers (idempotent).
+
+    Note: SQLite drops triggers when a migration remakes core_event,
+    such migrations have to call this function again.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_GEO_TABLE_SQL)
+    for sql in CREATE_GEO_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_geo_index(schema_editor):
+    """Drop the spatial index table and its triggers."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_GEO_INDEX_SQL:
+        schema_editor.execute(sql)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Compute the latitude/longitude box that contains the circle of radius_km around the point.
+
+    Returns:
+        tuple: (min_lat, max_lat, min_lon, max_lon) in degrees.
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(latitude - delta_lat, -90.0)
+    max_lat = min(latitude + delta_lat, 90.0)
+
+    # longitude degrees shrink towards the poles; near a pole or across
+    # the antimeridian the box spans all longitudes
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9:
+        return min_lat, max_lat, -180.0, 180.0
+
+    delta_lon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    min_lon = longitude - delta_lon
+    max_lon = longitude + delta_lon
+    if min_lon < -180.0 or max_lon > 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Returns: float - haversine distance between the two points in km (Python counterpart of distance_km)."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def distance_km(latitude, longitude, lat_field='latitude', lon_field='longitude'):
+    """
+    Haversine distance expression between the point and coordinates of the row (in km).
+
+    Returns: Func - ORM expression computed by the database.
+    """
+    lat1 = Value(math.radians(latitude), output_field=FloatField())
+    lon1 = Value(math.radians(longitude), output_field=FloatField())
+    lat2 = Radians(F(lat_field))
+    lon2 = Radians(F(lon_field))
+
+    a = (
+        Power(Sin((lat2 - lat1) / 2), 2)
+        + Cos(lat1) * Cos(lat2) * Power(Sin((lon2 - lon1) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def events_within_radius(events, latitude, longitude, radius_km):
+    """
+    Filter events to those within radius_km from the point and annotate them with `distance_km`.
+
+    The R*Tree index prefilters events by the bounding box of the circle,
+    the exact haversine distance is then checked only for the survivors.
+
+    Args:
+        events (QuerySet): Queryset of rows whose primary key is the event id and that have
+            `latitude` and `longitude` fields.
+        latitude (float): Latitude of the center point.
+        longitude (float): Longitude of the center point.
+        radius_km (float): Search radius in kilometers.
+    Returns:
+        QuerySet: Events within the radius.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+
+    if connections[events.db].vendor == 'sqlite':
+        events = events.filter(pk__in=RawSQL(
+            f"""
+            SELECT id FROM {GEO_INDEX_TABLE}
+            WHERE max_lat >= %s AND min_lat <= %s AND max_lon >= %s AND min_lon <= %s
+            """,
+            (min_lat, max_lat, min_lon, max_lon)
+        ))
+    else:
+        events = events.filter(
+            latitude__range=(min_lat, max_lat),
+            longitude__range=(min_lon, max_lon),
+        )
+
+    return events.annotate(
+        distance_km=distance_km(latitude, longitude)
+    ).filter(distance_km__lte=radius_km)
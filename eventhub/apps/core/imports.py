@@ -0,0 +1,146 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+from django.db.models import F
+
+from .cards import refresh_event_cards
+from .forms import EventInfoValidator
+from .models import Event, EventImage, EventPriceZone, ImportCheckpoint
+from .seatmaps import create_seat_maps
+from .zones import clean_price_zones
+
+# fields of an imported event row (validated by EventInfoValidator)
+EVENT_COLUMNS = ['name', 'date', 'time', 'location', 'category', 'description', 'seating_type']
+
+validate_url = URLValidator(schemes=['http', 'https'])
+
+
+def read_jsonl_rows(file):
+    """
+    Yield rows of a JSON Lines file one by one (one JSON object per non-blank line).
+
+    Yields:
+        tuple: (row dict or None, error message or None).
+    """
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield None, "Row is not a JSON object."
+            continue
+        yield row, None
+
+
+def read_csv_rows(file):
+    """
+    Yield rows of a CSV file with a header one by one.
+
+    Price zones are given in the zones column as "name:price:seats" items separated by
+    semicolons (e.g. "General:25.00:500;VIP:80:50"), image urls in the image_urls column
+    separated by semicolons.
+
+    Yields:
+        tuple: (row dict or None, error message or None).
+    """
+    for row in csv.DictReader(file):
+        try:
+            row['zones'] = [_parse_csv_zone(item) for item in (row.get('zones') or '').split(';') if item.strip()]
+        except ValueError as e:
+            yield None, str(e)
+            continue
+        row['images'] = [url.strip() for url in (row.get('image_urls') or '').split(';') if url.strip()]
+        yield row, None
+
+
+def _parse_csv_zone(item):
+    # zone names may contain colons, price and seats are the last two parts
+    parts = item.rsplit(':', 2)
+    if len(parts) != 3:
+        raise ValueError(f"Invalid price zone \"{item}\" (expected name:price:seats).")
+    return {'zone_name': parts[0].strip(), 'zone_price': parts[1].strip(), 'zone_seats': parts[2].strip()}
+
+
+def _first_error(form):
+    field, errors = next(iter(form.errors.items()))
+    return f"{field}: {errors[0]}"
+
+
+def build_event(row, organizer):
+    """
+    Validate an imported row with the rules of the event creation form (location is not geocoded,
+    price zones are validated like the JSON payload of the form, see core.zones).
+
+    Args:
+        row (dict): Event fields (see EVENT_COLUMNS), zones (list of dicts with zone_name,
+            zone_price and zone_seats) and images (list of image urls, optional).
+        organizer (Profile): Organizer of the imported events.
+    Raises:
+        ValidationError: when the row is not valid.
+    Returns:
+        tuple: (unsaved Event, list of unsaved EventPriceZone without event, list of image urls).
+    """
+    event_form = EventInfoValidator({column: row.get(column) or '' for column in EVENT_COLUMNS}, geocode=False)
+    if not event_form.is_valid():
+        raise ValidationError(_first_error(event_form))
+
+    zones = [
+        EventPriceZone(seats_available=zone['zone_seats'], **zone) for zone in clean_price_zones(row.get('zones') or [])
+    ]
+
+    images = row.get('images') or []
+    if not isinstance(images, list):
+        raise ValidationError("images: Expected a list of urls.")
+    for url in images:
+        validate_url(url)
+
+    data = event_form.cleaned_data
+    event = Event(organizer=organizer, **{column: data[column] for column in EVENT_COLUMNS})
+    return event, zones, images
+
+
+@transaction.atomic
+def import_batch(checkpoint, batch, processed, skipped):
+    """
+    Insert a batch of validated events with their price zones and images, and advance the checkpoint.
+
+    The checkpoint is committed with the batch, so an interrupted import resumes right after
+    the last committed batch.
+
+    Args:
+        checkpoint (ImportCheckpoint): Checkpoint of the import.
+        batch (list): Tuples returned by build_event.
+        processed (int): Number of rows processed since the last batch (including skipped ones).
+        skipped (int): Number of invalid rows since the last batch.
+    Returns:
+        list: Created events.
+    """
+    events = Event.objects.bulk_create([event for event, zones, images in batch])
+
+    price_zones = []
+    event_images = []
+    for event, zones, images in batch:
+        for zone in zones:
+            zone.event = event
+            price_zones.append(zone)
+        event_images.extend(EventImage(event=event, image_url=url) for url in images)
+    EventPriceZone.objects.bulk_create(price_zones)
+    EventImage.objects.bulk_create(event_images)
+    create_seat_maps([zone for zone in price_zones if zone.event.seating_type == 'reserved'])
+
+    # bulk inserts skip model signals, cards are built here
+    refresh_event_cards(event.pk for event in events)
+
+    ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(
+        position=F('position') + processed,
+        imported=F('imported') + len(events),
+        skipped=F('skipped') + skipped,
+    )
+    return events
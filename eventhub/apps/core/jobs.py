@@ -0,0 +1,203 @@
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+
+from .models import Event, EventImage, ImageUploadJob
+from users.media import build_image_variants
+from users.utils import cloud_delete_img, cloud_upload_img
+
+logger = logging.getLogger(__name__)
+
+
+def get_upload_queue_storage():
+    """Returns: FileSystemStorage - local storage of uploaded files waiting for their jobs."""
+    return FileSystemStorage(location=settings.IMAGE_JOBS['UPLOAD_DIR'])
+
+
+def stage_image_uploads(images):
+    """
+    Persist uploaded images to the upload queue storage (before their jobs are queued).
+
+    Args:
+        images (list): Uploaded image files.
+    Returns:
+        list: Names of the staged files in the upload queue storage.
+    """
+    storage = get_upload_queue_storage()
+    names = []
+    try:
+        for image in images:
+            names.append(storage.save(image.name, image))
+    except Exception:
+        discard_staged_uploads(names)
+        raise
+    return names
+
+
+def discard_staged_uploads(names):
+    """Delete staged files whose jobs were not queued (e.g. the transaction creating them was rolled back)."""
+    storage = get_upload_queue_storage()
+    for name in names:
+        storage.delete(name)
+
+
+def enqueue_image_uploads(event, names):
+    """
+    Queue cloud upload jobs of staged images in one insert.
+
+    Args:
+        event (Event): The event to which the images relate (should be marked as having pending media).
+        names (list): Names of the staged files (see stage_image_uploads).
+    Returns:
+        list: Created ImageUploadJob objects.
+    """
+    return ImageUploadJob.objects.bulk_create([ImageUploadJob(event=event, file=name) for name in names])
+
+
+def claim_jobs(limit):
+    """
+    Claim up to limit due jobs for this worker.
+
+    Jobs are claimed one by one with a conditional update, so concurrent workers never
+    claim the same job. Running jobs whose lease expired (crashed worker) are retried.
+
+    Returns:
+        list: Claimed ImageUploadJob objects.
+    """
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=settings.IMAGE_JOBS['LEASE'])
+
+    ImageUploadJob.objects.filter(status=ImageUploadJob.RUNNING, locked_at__lt=lease_expired).update(
+        status=ImageUploadJob.PENDING
+    )
+
+    due = ImageUploadJob.objects.filter(
+        status=ImageUploadJob.PENDING, next_attempt_at__lte=now
+    ).order_by('next_attempt_at').values_list('pk', flat=True)[:limit]
+
+    claimed = []
+    for pk in due:
+        updated = ImageUploadJob.objects.filter(pk=pk, status=ImageUploadJob.PENDING).update(
+            status=ImageUploadJob.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_at=now,
+        )
+        if updated:
+            claimed.append(pk)
+
+    return list(ImageUploadJob.objects.filter(pk__in=claimed))
+
+
+def _finish_event_media(event_id):
+    """Clear pending media flag of the event once none of its jobs is waiting or running."""
+    active = ImageUploadJob.objects.filter(
+        event_id=event_id, status__in=[ImageUploadJob.PENDING, ImageUploadJob.RUNNING]
+    )
+    if not active.exists():
+        Event.objects.filter(pk=event_id).update(has_pending_media=False)
+
+
+def run_job(job):
+    """
+    Upload the image of the job and attach it to the event (with urls of its resized variants).
+
+    On failure the job is retried with exponential backoff until the maximum number
+    of attempts, then it is marked as failed.
+
+    Every claim bumps the attempts of the job, so they fence the lease of this worker: once the lease
+    expired and another worker claimed the job again, the updates below match no row and this worker
+    drops its upload instead of attaching a second copy of the image.
+
+    Returns: str | None - status the job was left in (done, pending for a retry or failed),
+        None if the job lost its lease or was deleted with its event.
+    """
+    storage = get_upload_queue_storage()
+    lease = ImageUploadJob.objects.filter(pk=job.pk, status=ImageUploadJob.RUNNING, attempts=job.attempts)
+    status = None
+    try:
+        try:
+            path = storage.path(job.file)
+            with Image.open(path) as image:         # reads the header only
+                width = image.width
+            url = cloud_upload_img(path)
+        except Exception as e:
+            logger.warning("Upload of %s (job %s) failed: %s", job.file, job.pk, e)
+            config = settings.IMAGE_JOBS
+
+            if job.attempts >= config['MAX_ATTEMPTS']:
+                changes = {'status': ImageUploadJob.FAILED}
+            else:
+                backoff = config['RETRY_BACKOFF'] * 2 ** (job.attempts - 1)
+                changes = {
+                    'status': ImageUploadJob.PENDING, 'next_attempt_at': timezone.now() + timedelta(seconds=backoff)
+                }
+
+            with transaction.atomic():
+                if lease.update(last_error=str(e), locked_at=None, **changes):
+                    status = changes['status']
+                _finish_event_media(job.event_id)
+            return status
+
+        try:
+            variants = build_image_variants(url, width)
+        except Exception as e:
+            # variants are optional, markup falls back to the original image
+            logger.warning("Variants of %s (job %s) failed: %s", url, job.pk, e)
+            variants = {}
+
+        # the image is attached only if this worker still holds the lease of the job
+        with transaction.atomic():
+            if lease.update(status=ImageUploadJob.DONE, locked_at=None, last_error=''):
+                status = ImageUploadJob.DONE
+                EventImage.objects.create(event_id=job.event_id, image_url=url, variants=variants)
+                _finish_event_media(job.event_id)
+
+        if status is None:
+            # the event was deleted or another worker claimed the job again during the upload
+            logger.warning("Job %s lost its lease, image %s is dropped.", job.pk, url)
+            try:
+                cloud_delete_img(url)       # drop the reference nothing holds
+            except Exception as e:
+                logger.warning("Image %s of job %s was not deleted: %s", url, job.pk, e)
+        return status
+    finally:
+        # the staged file is kept for a retry, unless the job ended here or is gone with its event
+        if status in (ImageUploadJob.DONE, ImageUploadJob.FAILED) or (
+            status is None and not ImageUploadJob.objects.filter(pk=job.pk).exists()
+        ):
+            storage.delete(job.file)
+
+
+def _run_job_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        connections.close_all()     # every worker thread has its own database connection
+
+
+def process_jobs(concurrency, limit):
+    """
+    Claim due jobs and run them with bounded concurrency.
+
+    Args:
+        concurrency (int): Maximum number of uploads running at once.
+        limit (int): Maximum number of jobs claimed in this round.
+    Returns:
+        tuple: (number of processed jobs, Counter of the statuses they were left in, see run_job).
+    """
+    close_old_connections()
+    jobs = claim_jobs(limit)
+    if not jobs:
+        return 0, Counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        statuses = Counter(executor.map(_run_job_in_thread, jobs))
+    return len(jobs), statuses
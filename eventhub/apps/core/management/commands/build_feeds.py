@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.feeds import build_feeds
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild personalized home feeds of all active users (nearby and relevant upcoming events weighted "
+        "by the categories they organized or reserved). Run it periodically (e.g. hourly, after rank_events)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.FEED['BATCH_SIZE'], help="Users per transaction."
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        started = time.monotonic()
+        users, candidates = build_feeds(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Built feeds of {users} users ({candidates} candidates) in {time.monotonic() - started:.2f}s."
+        ))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cards import refresh_event_cards
+from core.models import EventImage
+from users.media import build_image_variants
+
+
+class Command(BaseCommand):
+    help = "Fill responsive variants of event images uploaded before variants existed and refresh their cards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Number of images updated per transaction.")
+        parser.add_argument('--all', action='store_true', help="Rebuild variants of all images, not only missing ones.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        images = EventImage.objects.order_by('pk')
+        if not options['all']:
+            images = images.filter(variants={})
+
+        started = time.monotonic()
+        built = failed = 0
+        last_id = 0
+        while True:
+            batch = list(images.filter(pk__gt=last_id).only('pk', 'event_id', 'image_url')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].pk
+
+            for image in batch:
+                try:
+                    # width of the original is unknown here, the whole ladder is built
+                    image.variants = build_image_variants(image.image_url)
+                except Exception as e:
+                    self.stderr.write(f"Image {image.pk} ({image.image_url}) failed: {e}")
+                    image.variants = {}
+                    failed += 1
+
+            with transaction.atomic():
+                EventImage.objects.bulk_update(batch, ['variants'])
+                refresh_event_cards({image.event_id for image in batch})
+            built += len(batch)
+            self.stdout.write(f"Processed {built} images...")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Image variants built: {built - failed} images ({failed} failed) in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.reservations import expire_holds
+
+
+class Command(BaseCommand):
+    help = "Expire unconfirmed ticket holds and give their seats back to their price zones in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.RESERVATIONS['EXPIRE_BATCH_SIZE'],
+            help="Holds expired per transaction."
+        )
+        parser.add_argument('--poll-interval', type=float, default=5.0, help="Seconds to sleep when nothing is due.")
+        parser.add_argument('--once', action='store_true', help="Expire due holds and exit instead of polling.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        while True:
+            expired = expire_holds(options['batch_size'])
+            if expired:
+                self.stdout.write(f"Expired {expired} holds.")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cards import refresh_event_cards
+from core.models import Event
+from users.geocoding import geocode
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Geocode locations of events without coordinates (e.g. bulk imported ones) through the cached, "
+        "rate-limited geocoder, in batches (locations of user profiles with --profiles)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Events updated per transaction.")
+        parser.add_argument('--limit', type=int, help="Maximum number of events to geocode in this run.")
+        parser.add_argument(
+            '--profiles', action='store_true',
+            help="Geocode locations of user profiles without coordinates instead (set before profiles kept them)."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        model = Profile if options['profiles'] else Event
+        pending = model.objects.filter(latitude__isnull=True).exclude(location__isnull=True).exclude(location='')
+        pending = pending.order_by('pk').only('pk', 'location')
+        limit = options['limit']
+
+        started = time.monotonic()
+        geocoded = not_found = failed = 0
+        last_id = 0
+        while limit is None or limit > 0:
+            rows = list(pending.filter(pk__gt=last_id)[:batch_size if limit is None else min(batch_size, limit)])
+            if not rows:
+                break
+            last_id = rows[-1].pk
+            if limit is not None:
+                limit -= len(rows)
+
+            batch = []
+            for row in rows:
+                try:
+                    place = geocode(row.location)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {row.pk} ({row.location}) failed: {e}")
+                    continue
+
+                if place is None:
+                    not_found += 1
+                    continue
+                row.latitude, row.longitude = place.latitude, place.longitude
+                batch.append(row)
+
+            geocoded += self._update(model, batch)
+            self.stdout.write(f"Geocoded {geocoded} {model._meta.verbose_name_plural}...")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{model._meta.verbose_name_plural.capitalize()} geocoded: {geocoded} "
+            f"({not_found} not found, {failed} failed) in {elapsed:.2f}s."
+        ))
+
+    @staticmethod
+    def _update(model, batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            model.objects.bulk_update(batch, ['latitude', 'longitude'])
+            if model is Event:
+                refresh_event_cards(event.pk for event in batch)
+        return len(batch)
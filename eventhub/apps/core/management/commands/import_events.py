@@ -0,0 +1,106 @@
+import gzip
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import build_event, import_batch, read_csv_rows, read_jsonl_rows
+from core.models import ImportCheckpoint
+from users.models import Profile
+
+
+def _open(path):
+    """Open plain or gzipped text file for streaming."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a partner catalog (JSON Lines or CSV) into events in batches. Rows have name, date (YYYY-MM-DD), "
+        "time (HH:MM), location, category, description, seating_type, zones and optional image urls. "
+        "Locations are not geocoded, run geocode_events afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the catalog (.jsonl/.csv, optionally .gz).")
+        parser.add_argument(
+            '--format', choices=['jsonl', 'csv'],
+            help="jsonl: one JSON object per line, zones as a list of {zone_name, zone_price, zone_seats}, images as "
+                 "a list of urls; csv: header row, zones as \"name:price:seats;...\", image_urls as \"url;...\". "
+                 "Detected from the file extension by default."
+        )
+        parser.add_argument('--organizer', required=True, help="Email of the user who organizes imported events.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Events inserted per transaction.")
+        parser.add_argument(
+            '--checkpoint', help="Key of the import checkpoint (absolute path of the file by default)."
+        )
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and import from the start.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        path = options['path']
+        file_format = options['format'] or ('csv' if '.csv' in os.path.basename(path) else 'jsonl')
+        read_rows = read_csv_rows if file_format == 'csv' else read_jsonl_rows
+
+        organizer = Profile.objects.filter(email__iexact=options['organizer'].strip()).first()
+        if organizer is None:
+            raise CommandError(f"User {options['organizer']} does not exist.")
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=options['checkpoint'] or os.path.abspath(path))
+        if options['restart']:
+            ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(position=0, imported=0, skipped=0)
+            checkpoint.refresh_from_db()
+        resume_at = checkpoint.position
+        if resume_at:
+            self.stdout.write(f"Resuming after row {resume_at} ({checkpoint.imported} events imported before).")
+
+        started = time.monotonic()
+        imported = skipped = 0
+        batch = []
+        processed = batch_skipped = 0
+
+        try:
+            with _open(path) as file:
+                for number, (row, error) in enumerate(read_rows(file), start=1):
+                    if number <= resume_at:
+                        continue
+
+                    processed += 1
+                    if error is None:
+                        try:
+                            batch.append(build_event(row, organizer))
+                        except ValidationError as e:
+                            error = '; '.join(e.messages)
+                    if error is not None:
+                        batch_skipped += 1
+                        self.stderr.write(f"Row {number} skipped: {error}")
+
+                    if len(batch) >= batch_size:
+                        imported += len(import_batch(checkpoint, batch, processed, batch_skipped))
+                        skipped += batch_skipped
+                        batch, processed, batch_skipped = [], 0, 0
+                        self._report(imported, skipped, started)
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f"Failed to read catalog: {e}")
+
+        if processed:
+            imported += len(import_batch(checkpoint, batch, processed, batch_skipped))
+            skipped += batch_skipped
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog imported: {imported} events ({skipped} rows skipped) in {elapsed:.2f}s "
+            f"({(imported + skipped) / max(elapsed, 1e-9):.0f} rows/s)."
+        ))
+
+    def _report(self, imported, skipped, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Imported {imported} events ({skipped} skipped), {(imported + skipped) / max(elapsed, 1e-9):.0f} rows/s..."
+        )
@@ -0,0 +1,178 @@
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cards import refresh_card_media
+from core.models import Event, EventPriceZone
+from users.models import Profile
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate an on-sale of a temporary event through the full request stack: buyers join its waiting room, "
+        "poll until admitted and hold tickets. Reports hold throughput per second, latency percentiles and errors "
+        "(compare with --no-waiting-room)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=300, help="Number of buyers.")
+        parser.add_argument('--concurrency', type=int, default=100, help="Buyers (threads) arriving at once.")
+        parser.add_argument(
+            '--rate', type=float, default=settings.WAITING_ROOM['ADMISSION_RATE'],
+            help="Buyers admitted per second."
+        )
+        parser.add_argument(
+            '--burst', type=int, default=settings.WAITING_ROOM['BURST'], help="Buyers admitted at once."
+        )
+        parser.add_argument('--poll-interval', type=float, default=0.5, help="Seconds between status polls of a buyer.")
+        parser.add_argument('--no-waiting-room', action='store_true', help="Let all buyers hold tickets right away.")
+
+    def handle(self, *args, **options):
+        if options['buyers'] < 1 or options['concurrency'] < 1 or options['rate'] <= 0 or options['burst'] < 1:
+            raise CommandError("--buyers, --concurrency, --rate and --burst must be positive.")
+
+        organizer = Profile.objects.order_by('pk').first()
+        if organizer is None:
+            raise CommandError("Create a user first, the temporary event needs an organizer.")
+
+        event, zone = self._create_event(organizer, options['buyers'])
+        buyers = self._create_buyers(options['buyers'])
+        try:
+            waiting_room = {
+                **settings.WAITING_ROOM,
+                'ENABLED': not options['no_waiting_room'],
+                'ADMISSION_RATE': options['rate'],
+                'BURST': options['burst'],
+            }
+            with override_settings(WAITING_ROOM=waiting_room):
+                results, elapsed = self._run(event, zone, buyers, options)
+            self._report(results, elapsed)
+        finally:
+            event.delete()
+            Profile.objects.filter(pk__in=[buyer.pk for buyer in buyers]).delete()
+
+    @staticmethod
+    def _create_event(organizer, seats):
+        with transaction.atomic():
+            event = Event.objects.create(
+                name="Waiting room load test",
+                date=timezone.localdate() + timedelta(days=30),
+                time='20:00',
+                location="Load test",
+                category='music',
+                description='',
+                seating_type='general',
+                organizer=organizer,
+            )
+            zone = EventPriceZone.objects.create(event=event, zone_name="General", zone_price=10, zone_seats=seats)
+            refresh_card_media(event.pk)
+        return event, zone
+
+    @staticmethod
+    def _create_buyers(count):
+        run = uuid.uuid4().hex[:8]
+        buyers = [
+            Profile(
+                email=f'loadtest-{run}-{i}@example.invalid', full_name=f"Buyer {i}", avatar='https://example.invalid/'
+            )
+            for i in range(count)
+        ]
+        for buyer in buyers:
+            buyer.set_unusable_password()
+        return Profile.objects.bulk_create(buyers)
+
+    def _run(self, event, zone, buyers, options):
+        queue_url = reverse('core:event_queue', args=[event.pk])
+        status_url = reverse('core:event_queue_status', args=[event.pk])
+        hold_url = reverse('core:hold_tickets', args=[event.pk, zone.pk])
+        waiting_room = settings.WAITING_ROOM['ENABLED']
+
+        # clients log in before the on-sale starts
+        clients = []
+        for buyer in buyers:
+            client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+            client.force_login(buyer)
+            clients.append(client)
+
+        results = []
+        lock = threading.Lock()
+        pending = iter(clients)
+
+        def buy(client):
+            polls = 0
+            if waiting_room:
+                response = client.get(queue_url)
+                while response.status_code == 200:
+                    status = client.get(status_url).json()
+                    polls += 1
+                    if status['admitted']:
+                        break
+                    time.sleep(min(options['poll_interval'], max(status['wait'], 0.01)))
+
+            started = time.monotonic()
+            response = client.post(hold_url, {'seats': 1})
+            return time.monotonic(), response.status_code, time.monotonic() - started, polls
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        client = next(pending, None)
+                    if client is None:
+                        break
+                    result = buy(client)
+                    with lock:
+                        results.append(result)
+                    client.logout()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        return [(finished - started, *result) for finished, *result in results], elapsed
+
+    def _report(self, results, elapsed):
+        statuses = Counter(status for _, status, _, _ in results)
+        latencies = [latency * 1000 for _, status, latency, _ in results if status == 201]
+        per_second = Counter(int(finished) for finished, status, _, _ in results if status == 201)
+        polls = sum(polls for _, _, _, polls in results)
+
+        self.stdout.write(
+            f"{len(results)} buyers in {elapsed:.2f}s, hold responses: "
+            + ", ".join(f"{count} x {status}" for status, count in sorted(statuses.items()))
+            + f", {polls} status polls."
+        )
+        self.stdout.write(
+            f"Hold latency (ms): p50 {_percentile(latencies, 50):.1f}, p95 {_percentile(latencies, 95):.1f}, "
+            f"p99 {_percentile(latencies, 99):.1f}, max {max(latencies, default=0):.1f}."
+        )
+        if per_second:
+            self.stdout.write(
+                "Holds per second: " + " ".join(str(per_second[second]) for second in range(max(per_second) + 1))
+            )
+
+        errors = sum(count for status, count in statuses.items() if status >= 500)
+        if errors:
+            raise CommandError(f"{errors} hold requests failed with server errors.")
+        self.stdout.write(self.style.SUCCESS("No server errors."))
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.jobs import process_jobs
+from core.models import ImageUploadJob
+
+
+class Command(BaseCommand):
+    help = "Worker that uploads queued event images to cloud storage and attaches them to their events."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.IMAGE_JOBS['CONCURRENCY'],
+            help="Maximum number of uploads running at once."
+        )
+        parser.add_argument('--batch', type=int, default=50, help="Maximum number of jobs claimed per round.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty."
+        )
+        parser.add_argument('--once', action='store_true', help="Process due jobs and exit instead of polling.")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['batch'] < 1:
+            raise CommandError("--concurrency and --batch must be positive.")
+
+        while True:
+            processed, statuses = process_jobs(options['concurrency'], options['batch'])
+            if processed:
+                self.stdout.write(
+                    f"Processed {processed} jobs ({statuses[ImageUploadJob.DONE]} uploaded, "
+                    f"{statuses[ImageUploadJob.PENDING]} to retry, {statuses[ImageUploadJob.FAILED]} failed, "
+                    f"{statuses[None]} dropped)."
+                )
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['poll_interval'])
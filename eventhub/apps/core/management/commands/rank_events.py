@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ranking import rank_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh relevance scores of all upcoming events (recency, audience nearby, category demand "
+        "and sell-through) behind the \"Relevance\" sort of explore. Run it periodically (e.g. hourly)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.RANKING['BATCH_SIZE'], help="Events scored per transaction."
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        started = time.monotonic()
+        scored = rank_events(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {scored} upcoming events in {time.monotonic() - started:.2f}s."
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from core.cards import rebuild_event_cards
+from core.models import Event
+
+
+class Command(BaseCommand):
+    help = "Rebuild event cards (listing read model) from events, images and price zones in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Number of event ids rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        bounds = Event.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write("No events to rebuild.")
+            return
+
+        started = time.monotonic()
+        rebuilt = 0
+        for first_id in range(bounds['first'], bounds['last'] + 1, batch_size):
+            rebuilt += rebuild_event_cards(first_id, first_id + batch_size - 1)
+            self.stdout.write(f"Rebuilt {rebuilt} cards...")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Event cards rebuilt: {rebuilt} cards in {elapsed:.2f}s."))
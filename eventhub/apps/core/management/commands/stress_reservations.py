@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.cards import refresh_card_media
+from core.models import Event, EventPriceZone, Reservation, SeatMap
+from core.reservations import SeatsUnavailable, confirm_hold, hold_seats, release_hold
+from core.seatmaps import SeatMapConflict, count_free_seats, create_seat_maps
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one price zone with concurrent holds, confirmations and releases, then check that "
+        "no seat was oversold (held + confirmed + available seats == zone seats)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', type=int, help="Id of the price zone (a temporary event is created by default).")
+        parser.add_argument('--seats', type=int, default=500, help="Seats of the temporary price zone.")
+        parser.add_argument(
+            '--reserved', action='store_true',
+            help="Make the temporary event reserved seating, so holds also take adjacent seats of its seat map."
+        )
+        parser.add_argument('--requests', type=int, default=5000, help="Number of hold requests.")
+        parser.add_argument('--concurrency', type=int, default=32, help="Buyers (threads) holding at once.")
+        parser.add_argument('--max-seats', type=int, default=4, help="Maximum seats per hold (random from 1).")
+        parser.add_argument('--confirm-ratio', type=float, default=0.7, help="Share of holds confirmed.")
+        parser.add_argument('--release-ratio', type=float, default=0.2, help="Share of holds released.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1 or options['max_seats'] < 1:
+            raise CommandError("--requests, --concurrency and --max-seats must be positive.")
+
+        buyer = Profile.objects.order_by('pk').first()
+        if buyer is None:
+            raise CommandError("Create a user first, holds need a buyer.")
+
+        event = None
+        if options['zone']:
+            zone_id = options['zone']
+            if not EventPriceZone.objects.filter(pk=zone_id).exists():
+                raise CommandError(f"Price zone {zone_id} does not exist.")
+        else:
+            event, zone_id = self._create_zone(buyer, options['seats'], options['reserved'])
+
+        try:
+            outcomes, elapsed = self._run(buyer, zone_id, options)
+            self._check(zone_id, outcomes, elapsed)
+        finally:
+            if event is not None:
+                event.delete()
+
+    @staticmethod
+    def _create_zone(organizer, seats, reserved):
+        with transaction.atomic():
+            event = Event.objects.create(
+                name="Reservation stress test",
+                date=timezone.localdate() + timedelta(days=30),
+                time='20:00',
+                location="Stress test",
+                category='music',
+                description='',
+                seating_type='reserved' if reserved else 'general',
+                organizer=organizer,
+            )
+            zone = EventPriceZone.objects.create(event=event, zone_name="General", zone_price=10, zone_seats=seats)
+            if reserved:
+                create_seat_maps([zone])
+            refresh_card_media(event.pk)
+        return event, zone.pk
+
+    def _run(self, buyer, zone_id, options):
+        outcomes = Counter()
+        lock = threading.Lock()
+        requests = iter(range(options['requests']))
+
+        def worker():
+            local = Counter()
+            try:
+                while True:
+                    with lock:
+                        if next(requests, None) is None:
+                            break
+                    try:
+                        hold = hold_seats(buyer, zone_id, random.randint(1, options['max_seats']))
+                    except SeatsUnavailable:
+                        local['sold out'] += 1
+                        continue
+                    except SeatMapConflict:
+                        local['seat map conflicts'] += 1
+                        continue
+                    except DatabaseError:
+                        local['database errors'] += 1
+                        continue
+                    local['held'] += 1
+
+                    action = random.random()
+                    if action < options['confirm_ratio']:
+                        confirm_hold(buyer, hold.pk)
+                        local['confirmed'] += 1
+                    elif action < options['confirm_ratio'] + options['release_ratio']:
+                        release_hold(buyer, hold.pk)
+                        local['released'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    outcomes.update(local)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes, time.monotonic() - started
+
+    def _check(self, zone_id, outcomes, elapsed):
+        zone = EventPriceZone.objects.get(pk=zone_id)
+        reserved = Reservation.objects.filter(
+            zone_id=zone_id, status__in=[Reservation.HELD, Reservation.CONFIRMED]
+        ).aggregate(seats=Sum('seats'))['seats'] or 0
+
+        requests = sum(outcomes[key] for key in ('held', 'sold out', 'seat map conflicts', 'database errors'))
+        self.stdout.write(
+            f"{requests} hold requests in {elapsed:.2f}s ({requests / max(elapsed, 1e-9):.0f} req/s): "
+            + ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+        )
+        self.stdout.write(
+            f"Zone of {zone.zone_seats} seats: {reserved} held or sold, {zone.seats_available} available."
+        )
+
+        if reserved + zone.seats_available != zone.zone_seats or reserved > zone.zone_seats:
+            raise CommandError("Seats were oversold or lost.")
+
+        seat_map = SeatMap.objects.filter(zone_id=zone_id).first()
+        if seat_map is not None:
+            active = Reservation.objects.filter(
+                zone_id=zone_id, status__in=[Reservation.HELD, Reservation.CONFIRMED]
+            ).values_list('seat_numbers', flat=True)
+            seat_numbers = [seat for numbers in active for seat in numbers]
+            taken = seat_map.seats - count_free_seats(bytes(seat_map.bitmap), seat_map.seats)
+            self.stdout.write(f"Seat map: {taken} seats taken by {len(seat_numbers)} seats of active reservations.")
+            if len(set(seat_numbers)) != len(seat_numbers) or taken != len(seat_numbers):
+                raise CommandError("A seat was held twice or the seat map is out of sync.")
+        self.stdout.write(self.style.SUCCESS("No seat was oversold."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'category'], name='event_date_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventpricezone',
+            index=models.Index(fields=['event', 'zone_price'], name='pricezone_event_price_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from core.search import create_search_index, drop_search_index
+
+
+def forwards(apps, schema_editor):
+    create_search_index(schema_editor)
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "INSERT INTO core_event_fts(rowid, name, description, location) "
+            "SELECT id, name, description, location FROM core_event"
+        )
+
+
+def backwards(apps, schema_editor):
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_explore_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
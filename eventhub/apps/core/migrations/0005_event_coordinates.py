@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+from core.geo import create_geo_index, drop_geo_index
+
+
+def create_index(apps, schema_editor):
+    create_geo_index(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    drop_geo_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_event_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def populate_cards(apps, schema_editor):
+    Event = apps.get_model('core', 'Event')
+    EventCard = apps.get_model('core', 'EventCard')
+    EventImage = apps.get_model('core', 'EventImage')
+
+    cards = []
+    for event in Event.objects.annotate(card_min_price=Min('price_zones__zone_price')).iterator():
+        image = EventImage.objects.filter(event=event).order_by('pk').first()
+        cards.append(EventCard(
+            event=event,
+            name=event.name,
+            date=event.date,
+            time=event.time,
+            location=event.location,
+            latitude=event.latitude,
+            longitude=event.longitude,
+            category=event.category,
+            cover_url=image.image_url if image else '',
+            min_price=event.card_min_price,
+            is_free=event.card_min_price == 0,
+        ))
+    EventCard.objects.bulk_create(cards, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_event_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCard',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='core.event')),
+                ('name', models.CharField(max_length=50)),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('location', models.CharField(max_length=255)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('category', models.CharField(choices=[('arts', 'Arts'), ('business', 'Business'), ('family', 'Family'), ('food', 'Food & Drink'), ('music', 'Music & Concerts'), ('social', 'Social & Comedy'), ('sports', 'Sports'), ('tech', 'Technology')], max_length=20)),
+                ('cover_url', models.URLField(blank=True)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('is_free', models.BooleanField(default=False)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'time'], name='card_date_time_idx'), models.Index(fields=['category', 'date', 'time'], name='card_category_date_idx'), models.Index(fields=['min_price', 'date', 'time'], name='card_price_date_idx'), models.Index(fields=['is_free', 'date', 'time'], name='card_free_date_idx')],
+            },
+        ),
+        migrations.RunPython(populate_cards, migrations.RunPython.noop),
+    ]
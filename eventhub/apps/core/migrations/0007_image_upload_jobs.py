@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+from core.geo import create_geo_index
+from core.search import create_search_index
+
+
+def restore_event_triggers(apps, schema_editor):
+    # SQLite remakes core_event to add a non-null column, which drops its triggers
+    create_search_index(schema_editor)
+    create_geo_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_event_card_read_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='has_pending_media',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(restore_event_triggers, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ImageUploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_jobs', to='core.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='imagejob_status_due_idx')],
+            },
+        ),
+    ]
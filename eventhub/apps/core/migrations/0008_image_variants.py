@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_image_upload_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventcard',
+            name='cover_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='eventimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_seats_available(apps, schema_editor):
+    # nothing is sold yet, all seats are available
+    EventPriceZone = apps.get_model('core', 'EventPriceZone')
+    EventPriceZone.objects.update(seats_available=models.F('zone_seats'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_import_checkpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seats', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('held', 'Held'), ('confirmed', 'Confirmed'), ('expired', 'Expired')], default='held', max_length=10)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='eventpricezone',
+            name='seats_available',
+            field=models.PositiveBigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_seats_available, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='eventpricezone',
+            constraint=models.CheckConstraint(condition=models.Q(('seats_available__lte', models.F('zone_seats'))), name='pricezone_seats_available_lte_seats'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='buyer',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='zone',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='core.eventpricezone'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'expires_at'], name='reservation_status_due_idx'),
+        ),
+    ]
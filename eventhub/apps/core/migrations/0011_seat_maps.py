@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_seat_maps(apps, schema_editor):
+    # existing reserved seating zones start with all seats free
+    EventPriceZone = apps.get_model('core', 'EventPriceZone')
+    SeatMap = apps.get_model('core', 'SeatMap')
+    zones = EventPriceZone.objects.filter(
+        event__seating_type='reserved', zone_seats__lte=settings.SEAT_MAPS['MAX_SEATS']
+    ).values_list('pk', 'zone_seats')
+    SeatMap.objects.bulk_create([
+        SeatMap(
+            zone_id=zone_id,
+            seats=seats,
+            row_length=min(settings.SEAT_MAPS['ROW_LENGTH'], seats),
+            bitmap=bytes((seats + 7) // 8)
+        )
+        for zone_id, seats in zones.iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_reservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatMap',
+            fields=[
+                ('zone', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seat_map', serialize=False, to='core.eventpricezone')),
+                ('seats', models.PositiveIntegerField()),
+                ('row_length', models.PositiveIntegerField()),
+                ('bitmap', models.BinaryField()),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='seat_numbers',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(create_seat_maps, migrations.RunPython.noop),
+    ]
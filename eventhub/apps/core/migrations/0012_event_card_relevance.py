@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_seat_maps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventcard',
+            name='relevance_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='eventcard',
+            index=models.Index(fields=['-relevance_score', 'event'], name='card_relevance_idx'),
+        ),
+    ]
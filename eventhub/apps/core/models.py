@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Event(models.Model):
     """
@@ -10,9 +11,12 @@ class Event(models.Model):
         date (date): The scheduled date of the event, required.
         time (time): The scheduled start time of the event, required.
         location (str): The full address or location of the event, required.
+        latitude (float): Latitude of the event location, optional (not geocoded yet).
+        longitude (float): Longitude of the event location, optional (not geocoded yet).
         category (str): The category of the event, required.
         description (str): A detailed description of the event (max 5000 characters), optional.
         seating_type (str): Seating type of the event (general or reserved), required.
+        has_pending_media (bool): Whether uploads of event images are still queued.
         organizer (Profile): The user who created the event.
     """
     
@@ -36,15 +40,24 @@ class Event(models.Model):
     date = models.DateField()
     time = models.TimeField()
     location = models.CharField(max_length=255)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
     category = models.CharField(max_length=20, choices=CATEGORIES)
     description = models.TextField(blank=True)
     seating_type = models.CharField(max_length=10, choices=SEATING_TYPES)
+    has_pending_media = models.BooleanField(default=False)
     
     organizer = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name='events',
     )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'category'], name='event_date_category_idx'),
+            models.Index(fields=['date', 'time'], name='event_date_time_idx'),     # keyset pagination
+        ]
     
     def __str__(self):
         return self.name
@@ -57,6 +70,7 @@ class EventImage(models.Model):
     Attributes:
         event (Event): The event to which this image relates.
         image_url(str): The url by which the image can be accessed.
+        variants (dict): Urls of resized variants by format, {format: [[width, url], ...]} (see users.media).
     """
     
     event = models.ForeignKey(
@@ -65,11 +79,60 @@ class EventImage(models.Model):
         related_name='images'
     )
     image_url = models.URLField()
+    variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Image for {self.event.name}"
 
 
+class ImageUploadJob(models.Model):
+    """
+    A queued upload of an event image to cloud storage (processed by process_image_jobs command).
+
+    Attributes:
+        event (Event): The event to which the image relates.
+        file (str): Name of the uploaded file in the upload queue storage.
+        status (str): Status of the job (pending, running, done or failed).
+        attempts (int): Number of upload attempts.
+        next_attempt_at (datetime): When the job can be (re)tried.
+        locked_at (datetime): When a worker claimed the job, optional.
+        last_error (str): Error of the last failed attempt, optional.
+        created_at (datetime): When the job was queued.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='image_jobs'
+    )
+    file = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='imagejob_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Upload of {self.file} for {self.event.name} event ({self.status})"
+
+
 class EventPriceZone(models.Model):
     """
     A price zone (range of tickets selling for the same price) for the event.
@@ -79,6 +142,8 @@ class EventPriceZone(models.Model):
         zone_name (str): The name of the price zone.
         zone_price (float): The price of the price zone in USD.
         zone_seats (int): The capacity of seats of the price zone.
+        seats_available (int): Seats neither held nor sold (changed only by core.reservations
+            with conditional updates, starts equal to zone_seats).
     """
     
     event = models.ForeignKey(
@@ -89,6 +154,227 @@ class EventPriceZone(models.Model):
     zone_name = models.CharField(max_length=50)
     zone_price = models.DecimalField(max_digits=8, decimal_places=2)
     zone_seats = models.PositiveBigIntegerField()
+    seats_available = models.PositiveBigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'zone_price'], name='pricezone_event_price_idx'),
+        ]
+        constraints = [
+            # last line of defence against overselling
+            models.CheckConstraint(
+                condition=models.Q(seats_available__lte=models.F('zone_seats')),
+                name='pricezone_seats_available_lte_seats'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # a new zone has all its seats available (bulk inserts set seats_available explicitly)
+        if self.seats_available is None:
+            self.seats_available = self.zone_seats
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Price Zone {self.zone_name} for {self.event.name} event"
+
+
+class EventCard(models.Model):
+    """
+    Denormalized read model of an event card for listing pages (one row per event).
+
+    Kept in sync with Event, EventImage and EventPriceZone by core.cards,
+    so listings read a single narrow indexed table instead of joining the normalized models.
+
+    Attributes:
+        event (Event): The event of the card (primary key).
+        name (str): The name of the event.
+        date (date): The scheduled date of the event.
+        time (time): The scheduled start time of the event.
+        location (str): The full address or location of the event.
+        latitude (float): Latitude of the event location, optional.
+        longitude (float): Longitude of the event location, optional.
+        category (str): The category of the event.
+        cover_url (str): The url of the first image of the event, optional.
+        cover_variants (dict): Resized variants of the first image (see EventImage.variants).
+        min_price (Decimal): The cheapest price among the price zones of the event, optional.
+        is_free (bool): Whether the event has a free price zone.
+        relevance_score (float): Precomputed rank of the "Relevance" sort (higher first, see core.ranking).
+    """
+
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='card'
+    )
+    name = models.CharField(max_length=50)
+    date = models.DateField()
+    time = models.TimeField()
+    location = models.CharField(max_length=255)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    category = models.CharField(max_length=20, choices=Event.CATEGORIES)
+    cover_url = models.URLField(blank=True)
+    cover_variants = models.JSONField(default=dict, blank=True)
+    min_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    is_free = models.BooleanField(default=False)
+    relevance_score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'time'], name='card_date_time_idx'),
+            models.Index(fields=['-relevance_score', 'event'], name='card_relevance_idx'),
+            models.Index(fields=['category', 'date', 'time'], name='card_category_date_idx'),
+            models.Index(fields=['min_price', 'date', 'time'], name='card_price_date_idx'),
+            models.Index(fields=['is_free', 'date', 'time'], name='card_free_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Card of {self.name} event"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of a bulk event import (manage.py import_events), committed together with every batch.
+
+    Attributes:
+        source (str): Key of the imported file (absolute path unless given explicitly), unique.
+        position (int): Number of data rows of the file already processed (imported or skipped).
+        imported (int): Number of imported events.
+        skipped (int): Number of invalid rows.
+        updated_at (datetime): When the last batch was committed.
+    """
+
+    source = models.CharField(max_length=255, unique=True)
+    position = models.PositiveBigIntegerField(default=0)
+    imported = models.PositiveBigIntegerField(default=0)
+    skipped = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Import of {self.source} at row {self.position}"
+
+
+class Reservation(models.Model):
+    """
+    Seats of a price zone held for or sold to a buyer (see core.reservations).
+
+    A hold takes seats from the zone right away and keeps them until it is confirmed or it
+    expires; expired holds give their seats back to the zone (manage.py expire_reservations).
+
+    Attributes:
+        zone (EventPriceZone): The price zone of the seats.
+        buyer (Profile): The user who reserved the seats, optional (kept after the user is deleted).
+        seats (int): Number of reserved seats.
+        status (str): Status of the reservation (held, confirmed or expired).
+        expires_at (datetime): When the hold expires unless confirmed.
+        seat_numbers (list[int]): Held seats of a zone with a seat map (SeatMap), empty otherwise.
+        created_at (datetime): When the seats were held.
+        confirmed_at (datetime): When the hold was confirmed, optional.
+    """
+
+    HELD = 'held'
+    CONFIRMED = 'confirmed'
+    EXPIRED = 'expired'
+    STATUSES = [
+        (HELD, 'Held'),
+        (CONFIRMED, 'Confirmed'),
+        (EXPIRED, 'Expired'),
+    ]
+
+    zone = models.ForeignKey(
+        EventPriceZone,
+        on_delete=models.CASCADE,
+        related_name='reservations'
+    )
+    buyer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='reservations'
+    )
+    seats = models.PositiveIntegerField()
+    seat_numbers = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='reservation_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.seats} seats of {self.zone.zone_name} zone ({self.status})"
+
+
+class SeatMap(models.Model):
+    """
+    Availability of the individual seats of a reserved seating price zone, packed as a bitmap (see core.seatmaps).
+
+    Seat n is bit n % 8 of byte n // 8 (1 = held or sold), so a 50,000 seat zone takes 6.25 KB.
+    Every write is a compare-and-swap on version.
+
+    Attributes:
+        zone (EventPriceZone): The price zone of the seats (primary key).
+        seats (int): Number of seats of the zone.
+        row_length (int): Seats per row (adjacent seats are searched within one row).
+        bitmap (bytes): Packed seat availability.
+        version (int): Incremented by every write.
+        updated_at (datetime): When the seat map was last written.
+    """
+
+    zone = models.OneToOneField(
+        EventPriceZone,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='seat_map'
+    )
+    seats = models.PositiveIntegerField()
+    row_length = models.PositiveIntegerField()
+    bitmap = models.BinaryField()
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Seat map of {self.zone.zone_name} zone (version {self.version})"
+
+
+class FeedCandidate(models.Model):
+    """
+    Event of the personalized home feed of a user, precomputed by manage.py build_feeds (see core.feeds).
+
+    Every user keeps at most FEED["MAX_CANDIDATES"] candidates, so the feed is one indexed read
+    whatever the number of events.
+
+    Attributes:
+        user (Profile): The user of the feed.
+        card (EventCard): Card of the suggested event.
+        score (float): Rank of the event in the feed of the user (higher first).
+        built_at (datetime): When the feed of the user was built.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_candidates'
+    )
+    card = models.ForeignKey(
+        EventCard,
+        on_delete=models.CASCADE,
+        related_name='feed_candidates'
+    )
+    score = models.FloatField()
+    built_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'card'], name='feed_candidate_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score'], name='feed_user_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.card_id} in feed of {self.user_id}"
@@ -0,0 +1,155 @@
+import math
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .explorecache import invalidate_events
+from .geo import EARTH_RADIUS_KM, bounding_box
+from .models import EventCard, EventPriceZone, Reservation
+from users.models import Profile
+
+# relevance scores are computed offline for all upcoming events (manage.py rank_events) and stored
+# in the indexed EventCard.relevance_score column, so the "Relevance" sort of explore is an index scan;
+# every component is between 0 and 1 and the score is their weighted sum (RANKING["WEIGHTS"]);
+# cards of new events are seeded with their recency component (seed_score) until the next run
+
+
+def recency(days_until, half_life):
+    """Returns: float - 1 for events of today, halved every half_life days."""
+    return 0.5 ** (max(days_until, 0) / half_life)
+
+
+def sell_through(seats, available):
+    """Returns: float - share of the seats already held or sold (0 for events without price zones)."""
+    return (seats - available) / seats if seats else 0.0
+
+
+def seed_score(day, today):
+    """
+    Score of a new event until the next rank_events: its weighted recency only, since it has no reservations
+    yet (sell-through) and the audience and category demand components read all users and reservations.
+
+    Returns: float - initial relevance score of the card of an event taking place on day.
+    """
+    config = settings.RANKING
+    return config['WEIGHTS']['recency'] * recency((day - today).days, config['RECENCY_HALF_LIFE'])
+
+
+def category_demand(window_days):
+    """
+    Demand for tickets of every category: seats reserved in the last window_days, relative to the top category.
+
+    Returns:
+        dict: Demand (0 to 1) by category, categories without reservations are missing.
+    """
+    reserved = Reservation.objects.filter(
+        status__in=[Reservation.HELD, Reservation.CONFIRMED],
+        created_at__gte=timezone.now() - timedelta(days=window_days),
+    ).values('zone__event__category').annotate(seats=Sum('seats'))
+
+    seats = {row['zone__event__category']: row['seats'] for row in reserved}
+    top = max(seats.values(), default=0)
+    return {category: count / top for category, count in seats.items()} if top else {}
+
+
+class AudienceGrid:
+    """
+    Users with coordinates counted in cells of a latitude/longitude grid, so the audience around
+    any point is a sum over the few cells of its bounding box instead of a distance to every user.
+
+    Args:
+        radius_km (float): Radius of the audience of a point (sets the cell size).
+    """
+
+    def __init__(self, radius_km):
+        self.radius_km = radius_km
+        self.cell = math.degrees(radius_km / EARTH_RADIUS_KM)
+        coordinates = Profile.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list(
+            'latitude', 'longitude'
+        )
+        self.cells = Counter(self._cell(lat, lon) for lat, lon in coordinates.iterator())
+        self.total = sum(self.cells.values())
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.cell), math.floor(longitude / self.cell)
+
+    def audience(self, latitude, longitude):
+        """Returns: int - users in the cells of the bounding box of the radius around the point (approximate)."""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, self.radius_km)
+        first_row, first_column = self._cell(min_lat, min_lon)
+        last_row, last_column = self._cell(max_lat, max_lon)
+        return sum(
+            self.cells.get((row, column), 0)
+            for row in range(first_row, last_row + 1)
+            for column in range(first_column, last_column + 1)
+        )
+
+    def proximity(self, latitude, longitude):
+        """Returns: float - audience of the point on a log scale relative to all users (0 without coordinates)."""
+        if latitude is None or longitude is None or not self.total:
+            return 0.0
+        return math.log1p(self.audience(latitude, longitude)) / math.log1p(self.total)
+
+
+def _sell_through(event_ids):
+    """Returns: dict - sell-through by event id, from one grouped query over the price zones of the events."""
+    zones = EventPriceZone.objects.filter(event_id__in=event_ids).values('event_id').annotate(
+        seats=Sum('zone_seats'), available=Sum('seats_available')
+    )
+    return {zone['event_id']: sell_through(zone['seats'], zone['available']) for zone in zones}
+
+
+def rank_events(batch_size=None):
+    """
+    Score all upcoming events and store the scores in their cards, one batch per transaction.
+
+    Inputs shared by all events (category demand, audience grid) are computed once; every batch
+    reads the card columns and sell-through of its events in two queries and writes all scores
+    in one bulk update. Cached explore pages of the batch are invalidated.
+
+    Args:
+        batch_size (int): Events scored per transaction (RANKING["BATCH_SIZE"] by default).
+    Returns:
+        int: Number of scored events.
+    """
+    config = settings.RANKING
+    weights = config['WEIGHTS']
+    if batch_size is None:
+        batch_size = config['BATCH_SIZE']
+
+    today = date.today()
+    demand = category_demand(config['AFFINITY_WINDOW'])
+    grid = AudienceGrid(config['AUDIENCE_RADIUS_KM'])
+
+    upcoming = EventCard.objects.filter(date__gte=today).order_by('pk')
+    scored = 0
+    last_id = 0
+    while True:
+        columns = list(upcoming.filter(pk__gt=last_id).values_list(
+            'pk', 'date', 'category', 'latitude', 'longitude'
+        )[:batch_size])
+        if not columns:
+            return scored
+        last_id = columns[-1][0]
+        sold = _sell_through([pk for pk, *_ in columns])
+
+        cards = [
+            EventCard(
+                pk=pk,
+                relevance_score=(
+                    weights['recency'] * recency((day - today).days, config['RECENCY_HALF_LIFE'])
+                    + weights['proximity'] * grid.proximity(latitude, longitude)
+                    + weights['affinity'] * demand.get(category, 0.0)
+                    + weights['sell_through'] * sold.get(pk, 0.0)
+                ),
+            )
+            for pk, day, category, latitude, longitude in columns
+        ]
+        with transaction.atomic():
+            EventCard.objects.bulk_update(cards, ['relevance_score'])
+            invalidate_events((category, day) for _, day, category, _, _ in columns)
+        scored += len(cards)
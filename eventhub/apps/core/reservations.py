@@ -0,0 +1,196 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import EventPriceZone, Reservation
+from .seatmaps import find_adjacent_seats, is_seat_free, set_seats, update_seat_map
+
+
+class ReservationError(Exception):
+    """Base error of reservation operations."""
+
+
+class SeatsUnavailable(ReservationError):
+    """Not enough seats are available in the price zone."""
+
+
+class HoldExpired(ReservationError):
+    """The hold doesn't exist (for the buyer), expired or was already confirmed."""
+
+
+# seats are never counted in Python: every change of EventPriceZone.seats_available is a single
+# conditional UPDATE (guarded by seats_available >= n), so concurrent buyers can't oversell a zone
+# and no table or row lock is held between reading and writing availability; seat maps of
+# reserved seating zones are written in the same transaction with compare-and-swap on their version
+
+
+def hold_seats(buyer, zone_id, seats, seat_numbers=None, event_id=None):
+    """
+    Hold seats of a price zone for the buyer until they confirm or the hold expires.
+
+    In zones with a seat map (reserved seating) the given seats are held, or the first run of
+    adjacent free seats in a row when none are given (see core.seatmaps). When the zone looks
+    sold out, its own expired holds are reclaimed once and the hold retried.
+
+    Args:
+        buyer (Profile): The user who reserves the seats.
+        zone_id (int): Id of the price zone (EventPriceZone).
+        seats (int): Number of seats (1 to RESERVATIONS["MAX_SEATS_PER_HOLD"]), ignored with seat_numbers.
+        seat_numbers (list[int]): Selected seats of a zone with a seat map, optional.
+        event_id (int): Only hold seats of a zone of this event, optional.
+    Raises:
+        ValueError: when the number of seats is out of range or the seats can't be selected.
+        SeatsUnavailable: when the zone doesn't have enough available seats (or doesn't exist).
+        SeatMapConflict: when the seat map kept changing concurrently.
+    Returns:
+        Reservation: The created hold.
+    """
+    if seat_numbers is not None:
+        seat_numbers = sorted(set(seat_numbers))
+        seats = len(seat_numbers)
+    if not 1 <= seats <= settings.RESERVATIONS['MAX_SEATS_PER_HOLD']:
+        raise ValueError(f"Between 1 and {settings.RESERVATIONS['MAX_SEATS_PER_HOLD']} seats can be reserved at once.")
+
+    zone = EventPriceZone.objects.filter(pk=zone_id)
+    if event_id is not None:
+        zone = zone.filter(event_id=event_id)
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                taken = zone.filter(seats_available__gte=seats).update(
+                    seats_available=F('seats_available') - seats
+                )
+                if not taken:
+                    raise SeatsUnavailable("Not enough seats are available in this price zone.")
+                return Reservation.objects.create(
+                    zone_id=zone_id,
+                    buyer=buyer,
+                    seats=seats,
+                    seat_numbers=_take_seats(zone_id, seats, seat_numbers),
+                    expires_at=timezone.now() + timedelta(seconds=settings.RESERVATIONS['HOLD_TTL']),
+                )
+        except SeatsUnavailable:
+            if attempt or not expire_holds(zone_id=zone_id):
+                raise
+
+
+def _take_seats(zone_id, seats, seat_numbers):
+    """Returns: list - seats taken in the seat map of the zone (empty for zones without seat map)."""
+    def take(seat_map):
+        if seat_numbers is None:
+            wanted = find_adjacent_seats(seat_map.bitmap, seat_map.seats, seat_map.row_length, seats)
+            if not wanted:
+                raise SeatsUnavailable(f"No {seats} adjacent seats are available in this price zone.")
+        else:
+            wanted = seat_numbers
+            if wanted[0] < 0 or wanted[-1] >= seat_map.seats:
+                raise ValueError(f"Seats of this price zone are numbered 0 to {seat_map.seats - 1}.")
+            if not all(is_seat_free(seat_map.bitmap, seat) for seat in wanted):
+                raise SeatsUnavailable("Some of the selected seats are already taken.")
+        return wanted, set_seats(seat_map.bitmap, wanted, True)
+
+    taken = update_seat_map(zone_id, take)
+    if taken is None:
+        if seat_numbers is not None:
+            raise ValueError("Seats of this price zone can't be selected.")
+        return []
+    return taken
+
+
+def _free_seats(zone_id, seat_numbers):
+    if seat_numbers:
+        update_seat_map(zone_id, lambda seat_map: (None, set_seats(seat_map.bitmap, seat_numbers, False)))
+
+
+def confirm_hold(buyer, reservation_id):
+    """
+    Confirm a hold of the buyer before it expires (its seats are sold).
+
+    Args:
+        buyer (Profile): The user who holds the seats.
+        reservation_id (int): Id of the hold.
+    Raises:
+        HoldExpired: when the hold isn't active anymore.
+    Returns:
+        Reservation: The confirmed reservation.
+    """
+    now = timezone.now()
+    confirmed = Reservation.objects.filter(
+        pk=reservation_id, buyer=buyer, status=Reservation.HELD, expires_at__gt=now
+    ).update(status=Reservation.CONFIRMED, confirmed_at=now)
+    if not confirmed:
+        raise HoldExpired("The hold expired, reserve the seats again.")
+    return Reservation.objects.get(pk=reservation_id)
+
+
+def release_hold(buyer, reservation_id):
+    """
+    Give the seats of an active hold of the buyer back to its price zone.
+
+    Args:
+        buyer (Profile): The user who holds the seats.
+        reservation_id (int): Id of the hold.
+    Returns:
+        bool: Whether the hold was released (False if it already expired or was confirmed).
+    """
+    with transaction.atomic():
+        hold = Reservation.objects.filter(pk=reservation_id, buyer=buyer, status=Reservation.HELD)
+        reservation = hold.values('zone_id', 'seats', 'seat_numbers').first()
+        if reservation is None or not hold.update(status=Reservation.EXPIRED):
+            return False
+        EventPriceZone.objects.filter(pk=reservation['zone_id']).update(
+            seats_available=F('seats_available') + reservation['seats']
+        )
+        _free_seats(reservation['zone_id'], reservation['seat_numbers'])
+    return True
+
+
+def expire_holds(batch_size=None, zone_id=None):
+    """
+    Expire one batch of due holds and give their seats back to their price zones in bulk.
+
+    The batch is locked (select_for_update, a no-op with SQLite transactions which take the
+    write lock at BEGIN), so a hold confirmed concurrently is never expired and credited twice.
+
+    Args:
+        batch_size (int): Maximum number of expired holds (RESERVATIONS["EXPIRE_BATCH_SIZE"] by default).
+        zone_id (int): Only expire holds of this price zone, optional.
+    Returns:
+        int: Number of expired holds.
+    """
+    if batch_size is None:
+        batch_size = settings.RESERVATIONS['EXPIRE_BATCH_SIZE']
+
+    due = Reservation.objects.filter(status=Reservation.HELD, expires_at__lte=timezone.now())
+    if zone_id is not None:
+        due = due.filter(zone_id=zone_id)
+
+    with transaction.atomic():
+        holds = list(due.select_for_update(skip_locked=True).order_by('expires_at').values_list(
+            'pk', 'zone_id', 'seats', 'seat_numbers'
+        )[:batch_size])
+        if not holds:
+            return 0
+
+        Reservation.objects.filter(pk__in=[pk for pk, _, _, _ in holds]).update(status=Reservation.EXPIRED)
+
+        reclaimed = Counter()
+        seat_numbers = defaultdict(list)
+        for _, zone, seats, numbers in holds:
+            reclaimed[zone] += seats
+            seat_numbers[zone].extend(numbers)
+        EventPriceZone.objects.filter(pk__in=reclaimed).update(
+            seats_available=F('seats_available') + Case(
+                *(When(pk=zone, then=Value(seats)) for zone, seats in reclaimed.items()),
+                default=Value(0)
+            )
+        )
+        # one seat map write per zone
+        for zone, numbers in seat_numbers.items():
+            _free_seats(zone, numbers)
+    return len(holds)
@@ -0,0 +1,154 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Event
+
+SEARCH_TABLE = 'core_event_fts'
+MAX_SEARCH_TERMS = 10
+
+# bm25 weights of the indexed columns (name, description, location)
+SEARCH_WEIGHTS = (10.0, 1.0, 4.0)
+
+# full-text index of event name, description and location;
+# rowid of the index row is the id of the event
+CREATE_SEARCH_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        name, description, location,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+# triggers keep the index in sync with every write to core_event (forms, bulk_create, queryset.update)
+CREATE_SEARCH_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON core_event BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, description, location)
+        VALUES (new.id, new.name, new.description, new.location);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF name, description, location ON core_event
+    BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        INSERT INTO {SEARCH_TABLE}(rowid, name, description, location)
+        VALUES (new.id, new.name, new.description, new.location);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON core_event BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+    END
+    """,
+]
+
+DROP_SEARCH_INDEX_SQL = [
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+]
+
+
+def is_search_index_supported(conn=connection):
+    """Returns: True if the database supports the FTS5 search index (SQLite only)."""
+    return conn.vendor == 'sqlite'
+
+
+def create_search_index(schema_editor):
+    """
+    Create the search index table and its sync triggers (idempotent).
+
+    Note: SQLite drops triggers when a migration remakes core_event,
+    such migrations have to call this function again.
+    """
+    if not is_search_index_supported(schema_editor.connection):
+        return
+    schema_editor.execute(CREATE_SEARCH_TABLE_SQL)
+    for sql in CREATE_SEARCH_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(schema_editor):
+    """Drop the search index table and its triggers."""
+    if not is_search_index_supported(schema_editor.connection):
+        return
+    for sql in DROP_SEARCH_INDEX_SQL:
+        schema_editor.execute(sql)
+
+
+def index_events_range(first_id, last_id):
+    """
+    (Re)index events with ids in the [first_id, last_id] range in one transaction.
+
+    Returns: int - number of indexed events.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid BETWEEN %s AND %s", [first_id, last_id])
+        cursor.execute(
+            f"""
+            INSERT INTO {SEARCH_TABLE}(rowid, name, description, location)
+            SELECT id, name, description, location FROM core_event WHERE id BETWEEN %s AND %s
+            """,
+            [first_id, last_id]
+        )
+        return cursor.rowcount
+
+
+def to_match_query(text):
+    """
+    Convert free text of the search box into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so FTS5 operators typed by the user
+    are matched literally and "jaz fest" finds "Jazz Festival".
+
+    Returns:
+        str | None: MATCH expression, or None if the text has no searchable words.
+    """
+    terms = re.findall(r'\w+', text.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_events(events, text, pk_column='core_event.id'):
+    """
+    Filter events to full-text matches of the text and annotate them with `search_rank`.
+
+    The index lookup produces the candidate ids first, the BM25 rank (lower is better)
+    is then computed only for the matching events.
+
+    Args:
+        events (QuerySet): Queryset of rows whose primary key is the event id.
+        text (str): Search text entered by the user.
+        pk_column (str): Qualified event id column of the queryset table.
+    Returns:
+        QuerySet: Matching events annotated with `search_rank`.
+    """
+    match = to_match_query(text)
+    if match is None:
+        return events
+
+    # fallback for databases without FTS5
+    if not is_search_index_supported():
+        words = Q()
+        for word in text.split()[:MAX_SEARCH_TERMS]:
+            words &= Q(name__icontains=word) | Q(description__icontains=word) | Q(location__icontains=word)
+        matches = Event.objects.filter(words).values('pk')
+        return events.filter(pk__in=matches).annotate(search_rank=RawSQL('0.0', (), output_field=FloatField()))
+
+    weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+    return events.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", (match,))
+    ).annotate(
+        search_rank=RawSQL(
+            f"""
+            SELECT bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH %s AND rowid = {pk_column}
+            """,
+            (match,),
+            output_field=FloatField()
+        )
+    )
@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SeatMap
+
+# bitmaps are handled as Python integers (seat n = bit n), so checks of all seats and the search
+# of adjacent free seats are a few word-parallel big integer operations instead of loops over seats
+
+
+class SeatMapConflict(Exception):
+    """The seat map kept changing concurrently for all write attempts."""
+
+
+def empty_bitmap(seats):
+    """Returns: bytes - bitmap of the seats with all seats free."""
+    return bytes((seats + 7) // 8)
+
+
+def is_seat_free(bitmap, seat):
+    """Returns: bool - whether the seat is free (O(1), reads a single byte)."""
+    return not bitmap[seat >> 3] >> (seat & 7) & 1
+
+
+def count_free_seats(bitmap, seats):
+    """Returns: int - number of free seats."""
+    return seats - int.from_bytes(bitmap, 'little').bit_count()
+
+
+def _row_starts(seats, row_length, count):
+    """Returns: int - mask of seats where a run of count seats starts without crossing its row."""
+    rows = (seats + row_length - 1) // row_length
+    row_start = ((1 << (row_length * rows)) - 1) // ((1 << row_length) - 1)     # bit at first seat of every row
+    return row_start * ((1 << (row_length - count + 1)) - 1)
+
+
+def find_adjacent_seats(bitmap, seats, row_length, count):
+    """
+    Find the first run of count adjacent free seats within one row.
+
+    Runs are found by doubling: after runs &= runs >> step, bit n is set when seats n to
+    n + width - 1 are all free, so a run of count seats takes O(log count) big integer operations.
+
+    Args:
+        bitmap (bytes): Packed seat availability.
+        seats (int): Number of seats.
+        row_length (int): Seats per row.
+        count (int): Number of adjacent seats.
+    Returns:
+        list: Seat numbers of the run, empty when no row has count adjacent free seats.
+    """
+    if count < 1 or count > row_length:
+        return []
+
+    runs = ~int.from_bytes(bitmap, 'little') & ((1 << seats) - 1)
+    width = 1
+    while width < count:
+        step = min(width, count - width)
+        runs &= runs >> step
+        width += step
+
+    runs &= _row_starts(seats, row_length, count)
+    if not runs:
+        return []
+    first = (runs & -runs).bit_length() - 1
+    return list(range(first, first + count))
+
+
+def set_seats(bitmap, seat_numbers, taken):
+    """
+    Mark the seats as taken or free.
+
+    Args:
+        bitmap (bytes): Packed seat availability.
+        seat_numbers (iterable): Seats to change.
+        taken (bool): Whether the seats are taken.
+    Returns:
+        bytes: The changed bitmap.
+    """
+    bitmap = bytearray(bitmap)
+    for seat in seat_numbers:
+        if taken:
+            bitmap[seat >> 3] |= 1 << (seat & 7)
+        else:
+            bitmap[seat >> 3] &= ~(1 << (seat & 7))
+    return bytes(bitmap)
+
+
+def create_seat_maps(zones):
+    """
+    Create empty seat maps of reserved seating price zones (larger zones than SEAT_MAPS["MAX_SEATS"] are skipped).
+
+    Args:
+        zones (list): Saved EventPriceZone objects of reserved seating events.
+    Returns:
+        list: Created SeatMap objects.
+    """
+    return SeatMap.objects.bulk_create([
+        SeatMap(
+            zone_id=zone.pk,
+            seats=zone.zone_seats,
+            row_length=min(settings.SEAT_MAPS['ROW_LENGTH'], zone.zone_seats),
+            bitmap=empty_bitmap(zone.zone_seats),
+        )
+        for zone in zones if zone.zone_seats <= settings.SEAT_MAPS['MAX_SEATS']
+    ])
+
+
+def update_seat_map(zone_id, change):
+    """
+    Change the seat map of the zone with compare-and-swap on its version.
+
+    The map is read, changed in Python and written only if nobody wrote it in between
+    (version unchanged); otherwise it's read again, up to SEAT_MAPS["CAS_ATTEMPTS"] times.
+
+    Args:
+        zone_id (int): Id of the price zone.
+        change (callable): change(seat_map) -> (result, new bitmap), may raise to cancel the write.
+    Raises:
+        SeatMapConflict: when all attempts lost to concurrent writes.
+    Returns:
+        Result of change, None when the zone has no seat map.
+    """
+    for _ in range(settings.SEAT_MAPS['CAS_ATTEMPTS']):
+        seat_map = SeatMap.objects.filter(zone_id=zone_id).first()
+        if seat_map is None:
+            return None
+        seat_map.bitmap = bytes(seat_map.bitmap)
+
+        result, bitmap = change(seat_map)
+        swapped = SeatMap.objects.filter(zone_id=zone_id, version=seat_map.version).update(
+            bitmap=bitmap, version=F('version') + 1, updated_at=timezone.now()
+        )
+        if swapped:
+            return result
+    raise SeatMapConflict("Seats are changing too fast, try again.")
@@ -0,0 +1,63 @@
+from django.db import transaction
+
+from .cards import refresh_card_media
+from .jobs import discard_staged_uploads, enqueue_image_uploads, stage_image_uploads
+from .models import Event, EventPriceZone
+from .seatmaps import create_seat_maps
+
+
+def create_event(organizer, event_data, zones, images):
+    """
+    Create an event with its price zones and queue uploads of its images, all or nothing.
+
+    The event, its price zones (with seat maps for reserved seating) and image upload jobs are
+    inserted in one transaction with bulk inserts, so the number of queries doesn't grow with
+    the number of zones or images.
+    Images are staged to the upload queue storage first and discarded if the transaction fails.
+
+    Args:
+        organizer (Profile): The user who creates the event.
+        event_data (dict): Cleaned data of EventInfoValidator.
+        zones (list): Cleaned data of price zones (dicts with zone_name, zone_price and zone_seats).
+        images (list): Uploaded image files.
+    Returns:
+        Event: The created event.
+    """
+    staged = stage_image_uploads(images)
+    try:
+        with transaction.atomic():
+            event = Event.objects.create(
+                name=event_data['name'],
+                date=event_data['date'],
+                time=event_data['time'],
+                location=event_data['location'],
+                latitude=event_data.get('latitude'),
+                longitude=event_data.get('longitude'),
+                category=event_data['category'],
+                description=event_data['description'],
+                seating_type=event_data['seating_type'],
+                has_pending_media=bool(staged),
+                organizer=organizer
+            )
+
+            price_zones = EventPriceZone.objects.bulk_create([
+                EventPriceZone(
+                    event=event,
+                    zone_name=zone['zone_name'],
+                    zone_price=zone['zone_price'],
+                    zone_seats=zone['zone_seats'],
+                    seats_available=zone['zone_seats']
+                )
+                for zone in zones
+            ])
+            if event.seating_type == 'reserved':
+                create_seat_maps(price_zones)
+            enqueue_image_uploads(event, staged)
+
+            # bulk inserts skip model signals, the card gets the prices here
+            refresh_card_media(event.pk)
+    except Exception:
+        discard_staged_uploads(staged)
+        raise
+
+    return event
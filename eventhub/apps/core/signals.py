@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cards import refresh_card_media, refresh_event_cards
+from .explorecache import invalidate_events
+from .facets import invalidate_facets
+from .models import Event, EventImage, EventPriceZone
+from users.utils import cloud_delete_imgs
+
+
+# keep event cards (read model) in sync within the transaction of the write
+
+@receiver(post_save, sender=Event)
+def update_event_card(sender, instance, **kwargs):
+    refresh_event_cards([instance.pk])
+
+
+@receiver(post_save, sender=EventImage)
+@receiver(post_delete, sender=EventImage)
+@receiver(post_save, sender=EventPriceZone)
+@receiver(post_delete, sender=EventPriceZone)
+def update_event_card_media(sender, instance, **kwargs):
+    refresh_card_media(instance.event_id)
+
+
+@receiver(post_save, sender=EventPriceZone)
+@receiver(post_delete, sender=EventPriceZone)
+def invalidate_price_facets(sender, instance, **kwargs):
+    """
+    Starting prices of cached facet counts may have changed
+    (bulk created zones of new events are counted instead).
+    """
+    invalidate_facets()
+
+
+@receiver(pre_delete, sender=Event)
+def release_event_images(sender, instance, **kwargs):
+    """Release images of the deleted event (the cascade only deletes rows), in the transaction of the deletion."""
+    cloud_delete_imgs(EventImage.objects.filter(event_id=instance.pk).values_list('image_url', flat=True))
+
+
+@receiver(post_delete, sender=Event)
+def invalidate_explore_pages(sender, instance, **kwargs):
+    """Stop serving cached explore pages and facet counts that could include the deleted event."""
+    invalidate_events([(instance.category, instance.date)])
+    invalidate_facets()
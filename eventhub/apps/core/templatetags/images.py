@@ -0,0 +1,18 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def srcset(variants, image_format):
+    """
+    Build srcset attribute value from image variants of a format.
+
+    Usage: {{ event.cover_variants|srcset:"webp" }} -> "https://.../320 320w, https://.../480 480w"
+
+    Args:
+        variants (dict): Variants by format, {format: [[width, url], ...]} (see EventImage.variants).
+        image_format (str): Format of the variants.
+    Returns: str - srcset value, empty if there are no variants of the format.
+    """
+    return ', '.join(f"{url} {width}w" for width, url in (variants or {}).get(image_format, []))
@@ -0,0 +1,497 @@
+import io
+import json
+import tempfile
+import threading
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+from PIL import Image
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from .explore import DEFAULT_RADIUS_KM, SORT_ORDERINGS, encode_cursor, get_explore_events, get_sort, paginate_events
+from .explorecache import cached_page, canonical_filters, page_key
+from .facets import get_facet_counts, invalidate_facets
+from .jobs import claim_jobs, enqueue_image_uploads, get_upload_queue_storage, run_job, stage_image_uploads
+from .models import Event, EventCard, EventImage, EventPriceZone, ImageUploadJob, Reservation
+from .reservations import SeatsUnavailable, hold_seats
+from .zones import clean_price_zones, parse_price_zones
+from . import services
+from users.geocoding import Place
+from users.models import Profile
+
+
+def create_event(organizer, name='Concert', category='music', days=7, prices=('10',), zone_seats=100):
+    """Returns: Event - upcoming event saved the way the app saves it, with a price zone per price."""
+    event = Event.objects.create(
+        name=name, date=date.today() + timedelta(days=days), time=time(20), location='Arena',
+        category=category, description='Description', seating_type='general', organizer=organizer,
+    )
+    for i, price in enumerate(prices):
+        EventPriceZone.objects.create(
+            event=event, zone_name=f'Zone {i}', zone_price=Decimal(price), zone_seats=zone_seats
+        )
+    return event
+
+
+class CacheIsolationMixin:
+    """Start every test with empty explore and facet caches (they outlive the rows of previous tests)."""
+
+    def setUp(self):
+        super().setUp()
+        caches['explore'].clear()
+        invalidate_facets()
+
+
+class ConcurrentHoldsTest(TransactionTestCase):
+    """Concurrent buyers holding seats of one price zone (committed transactions, one connection per thread)."""
+
+    ZONE_SEATS = 25
+    BUYERS = 12
+    SEATS_PER_HOLD = 3
+
+    def setUp(self):
+        organizer = Profile.objects.create_user(email='organizer@example.com', full_name='Organizer')
+        self.zone = create_event(organizer, name='On-sale', zone_seats=self.ZONE_SEATS).price_zones.get()
+        self.buyers = [
+            Profile.objects.create_user(email=f'buyer{i}@example.com', full_name=f'Buyer {i}')
+            for i in range(self.BUYERS)
+        ]
+
+    def _hold_all_at_once(self):
+        """Returns: list - outcome of every buyer (Reservation or the raised exception)."""
+        barrier = threading.Barrier(self.BUYERS)
+        outcomes = [None] * self.BUYERS
+
+        def buy(i):
+            try:
+                barrier.wait()
+                outcomes[i] = hold_seats(self.buyers[i], self.zone.pk, self.SEATS_PER_HOLD)
+            except Exception as e:
+                outcomes[i] = e
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy, args=(i,)) for i in range(self.BUYERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_zone_is_never_oversold(self):
+        outcomes = self._hold_all_at_once()
+
+        errors = [e for e in outcomes if isinstance(e, Exception) and not isinstance(e, SeatsUnavailable)]
+        self.assertEqual(errors, [])
+
+        self.zone.refresh_from_db()
+        held = Reservation.objects.filter(
+            zone=self.zone, status__in=[Reservation.HELD, Reservation.CONFIRMED]
+        ).aggregate(seats=Sum('seats'))['seats'] or 0
+        holds = [outcome for outcome in outcomes if isinstance(outcome, Reservation)]
+
+        self.assertGreaterEqual(self.zone.seats_available, 0)
+        self.assertLessEqual(held, self.ZONE_SEATS)
+        self.assertEqual(held, self.ZONE_SEATS - self.zone.seats_available)
+        self.assertEqual(len(holds), self.ZONE_SEATS // self.SEATS_PER_HOLD)
+
+
+class FacetCountsTest(CacheIsolationMixin, TransactionTestCase):
+    """Cached facet counts follow created events (autocommit, so on_commit callbacks run like in production)."""
+
+    def setUp(self):
+        super().setUp()
+        self.organizer = Profile.objects.create_user(email='organizer@example.com', full_name='Organizer')
+        for i in range(3):
+            create_event(self.organizer, name=f'Concert {i}', days=i + 1)
+        create_event(self.organizer, name='Match', category='sports', prices=('0', '30'))
+
+    def assertCountsMatchExplore(self, filters):
+        counts = get_facet_counts(filters)
+        self.assertEqual(counts['total'], get_explore_events(filters).count())
+        for option in counts['category']:
+            self.assertEqual(
+                option['count'], get_explore_events({**filters, 'category': [option['value']]}).count(),
+                option['value']
+            )
+
+    def test_event_without_price_zones(self):
+        self.assertCountsMatchExplore({})      # caches the facet vector
+        create_event(self.organizer, name='Gig', prices=())
+        self.assertCountsMatchExplore({})
+        self.assertCountsMatchExplore({'category': ['music']})
+
+    def test_event_created_by_service(self):
+        self.assertCountsMatchExplore({'category': ['music']})
+        services.create_event(self.organizer, {
+            'name': 'Festival', 'date': date.today() + timedelta(days=3), 'time': time(18), 'location': 'Park',
+            'category': 'music', 'description': 'Festival', 'seating_type': 'general',
+        }, [{'zone_name': 'GA', 'zone_price': Decimal('40'), 'zone_seats': 500}], [])
+        self.assertCountsMatchExplore({'category': ['music']})
+        self.assertCountsMatchExplore({'price_min': Decimal('25'), 'price_max': Decimal('49.99')})
+
+
+class ExplorePaginationTest(TestCase):
+    """Keyset pagination of every sort through ties and NULL sort keys (events without price zones)."""
+
+    PAGE_SIZE = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        organizer = Profile.objects.create_user(email='organizer@example.com', full_name='Organizer')
+        # (days, prices): NULL starting prices at the start, in the middle and at the end of dates, ties on both
+        events = [
+            (1, ()), (1, ('10',)), (1, ('10',)), (2, ()), (2, ('0',)), (2, ('25', '10')), (3, ()), (3, ()),
+            (3, ('99.50',)), (4, ('10',)), (4, ()), (5, ('0',)), (5, ('250',)), (6, ()),
+        ]
+        for i, (days, prices) in enumerate(events):
+            event = create_event(organizer, name=f'Concert {i}', days=days, prices=prices)
+            # relevance ties too
+            EventCard.objects.filter(pk=event.pk).update(relevance_score=(i % 4) / 4)
+
+    def walk(self, filters):
+        """Returns: list - ids of the events of all pages, following the cursors."""
+        sort = get_sort(filters)
+        events = get_explore_events(filters)
+        ids, cursor, pages = [], None, 0
+        while True:
+            page, cursor = paginate_events(events, sort, cursor, page_size=self.PAGE_SIZE)
+            ids += [card.pk for card in page]
+            pages += 1
+            self.assertLessEqual(pages, EventCard.objects.count(), "pagination doesn't end")
+            if cursor is None:
+                return ids
+
+    def test_every_sort_without_duplicates_or_gaps(self):
+        for sort in SORT_ORDERINGS:
+            filters = {'sort': sort, 'q': 'concert'} if sort == 'rank' else {'sort': sort}
+            with self.subTest(sort=sort):
+                self.assertEqual(get_sort(filters), sort)
+                expected = list(get_explore_events(filters).values_list('pk', flat=True))
+                self.assertEqual(len(expected), EventCard.objects.count())
+                self.assertEqual(self.walk(filters), expected)
+
+    def test_null_prices_sort_first_ascending_and_last_descending(self):
+        low = list(get_explore_events({'sort': 'price-low'}).values_list('min_price', flat=True))
+        high = list(get_explore_events({'sort': 'price-high'}).values_list('min_price', flat=True))
+        nulls = low.count(None)
+        self.assertEqual(low[:nulls], [None] * nulls)
+        self.assertEqual(high[-nulls:], [None] * nulls)
+        self.assertNotIn(None, low[nulls:] + high[:-nulls])
+
+    def test_filtered_pages(self):
+        filtered = [{'sort': 'price-high', 'category': ['music']}, {'sort': 'price-low', 'price_max': Decimal('10')}]
+        for filters in filtered:
+            with self.subTest(filters=filters):
+                self.assertEqual(self.walk(filters), list(get_explore_events(filters).values_list('pk', flat=True)))
+
+    def test_invalid_cursors_end_pagination(self):
+        cursors = {
+            'malformed': 'not a cursor',
+            'other sort': encode_cursor('date', [date.today().isoformat(), '20:00:00', 1]),
+            'wrong length': encode_cursor('price-low', [None, 1]),
+            'bad value': encode_cursor('price-low', ['ten', date.today().isoformat(), '20:00:00', 1]),
+        }
+        events = get_explore_events({'sort': 'price-low'})
+        for name, cursor in cursors.items():
+            with self.subTest(cursor=name), self.assertLogs('core.explore', 'WARNING'):
+                self.assertEqual(paginate_events(events, 'price-low', cursor), ([], None))
+
+
+class ExploreCacheKeyTest(TestCase):
+    """Equal searches written differently share one canonical key, different ones don't."""
+
+    def assertSameKey(self, first, second, sort='date', cursors=(None, None)):
+        self.assertEqual(canonical_filters(first, sort, cursors[0]), canonical_filters(second, sort, cursors[1]))
+        self.assertEqual(page_key(canonical_filters(first, sort, cursors[0])),
+                         page_key(canonical_filters(second, sort, cursors[1])))
+
+    def test_equivalent_filters(self):
+        place = Place('Montreal', 45.5017, -73.5673)
+        self.assertSameKey({'price_min': Decimal('10'), 'price_max': Decimal('50.5')},
+                           {'price_min': Decimal('10.00'), 'price_max': Decimal('50.50')})
+        self.assertSameKey({'category': ['music', 'arts', 'music']}, {'category': ['arts', 'music']})
+        self.assertSameKey({'q': '  Jazz   Night '}, {'q': 'jazz night'})
+        self.assertSameKey({'free_only': True, 'price_min': Decimal('5')}, {'free_only': True})
+        self.assertSameKey({'date_from': date.today() - timedelta(days=3)}, {})
+        # a missing or invalid (dropped) radius is the default one
+        self.assertSameKey({'location': place}, {'location': place, 'radius': DEFAULT_RADIUS_KM})
+        self.assertSameKey({'location': place, 'radius': None}, {'location': place, 'radius': DEFAULT_RADIUS_KM})
+
+    def test_different_filters(self):
+        place = Place('Montreal', 45.5017, -73.5673)
+        different = [
+            ({'category': ['music']}, {'category': ['arts']}),
+            ({'price_max': Decimal('10')}, {'price_max': Decimal('10.01')}),
+            ({'location': place}, {'location': place, 'radius': 50}),
+            ({'date_to': date.today() + timedelta(days=7)}, {}),
+        ]
+        for first, second in different:
+            with self.subTest(first=first, second=second):
+                self.assertNotEqual(canonical_filters(first, 'date', None), canonical_filters(second, 'date', None))
+        self.assertNotEqual(canonical_filters({}, 'date', None), canonical_filters({}, 'price-low', None))
+
+    def test_cursors(self):
+        cursor = encode_cursor('date', [date.today().isoformat(), '20:00:00', 7])
+        self.assertEqual(canonical_filters({}, 'date', cursor)['cursor'], [date.today().isoformat(), '20:00:00', '7'])
+        # cursors that don't decode get a key of their own, never the key of the first page
+        self.assertEqual(canonical_filters({}, 'date', 'garbage')['cursor'], 'invalid')
+        self.assertEqual(canonical_filters({}, 'price-low', cursor)['cursor'], 'invalid')
+        self.assertIsNone(canonical_filters({}, 'date', '')['cursor'])
+        self.assertSameKey({}, {}, cursors=('garbage', 'other garbage'))
+
+
+@override_settings(EXPLORE_CACHE={'ENABLED': True, 'MAX_WINDOW_MONTHS': 12, 'REPORT_EVERY': 1})
+class ExploreCacheInvalidationTest(CacheIsolationMixin, TransactionTestCase):
+    """Writes to event cards invalidate cached pages of their (category, month) buckets only."""
+
+    def setUp(self):
+        super().setUp()
+        self.organizer = Profile.objects.create_user(email='organizer@example.com', full_name='Organizer')
+        self.concert = create_event(self.organizer, name='Concert', days=3)
+        self.renders = 0
+
+    def page(self, filters):
+        """Returns: bool - True if the page was served from cache."""
+        rendered = self.renders
+
+        def render():
+            self.renders += 1
+            return {'html': '', 'count': 0, 'next_cursor': None}
+
+        with self.assertLogs('core.explorecache', 'INFO') as logs:
+            cached_page(filters, 'date', None, render)
+        self.assertIn('hit ratio', logs.output[-1])
+        return self.renders == rendered
+
+    def test_other_categories_stay_cached(self):
+        music, sports = {'category': ['music']}, {'category': ['sports']}
+        self.assertFalse(self.page(music))
+        self.assertFalse(self.page(sports))
+        self.assertTrue(self.page(music))
+
+        create_event(self.organizer, name='Match', category='sports')
+        self.assertTrue(self.page(music))
+        self.assertFalse(self.page(sports))
+
+        create_event(self.organizer, name='Gig')
+        self.assertFalse(self.page(music))
+        self.assertFalse(self.page({}))
+
+    def test_other_months_stay_cached(self):
+        this_week = {'date_to': date.today() + timedelta(days=6)}
+        self.assertFalse(self.page(this_week))
+        create_event(self.organizer, name='Next year', days=400)
+        self.assertTrue(self.page(this_week))
+        create_event(self.organizer, name='Tomorrow', days=1)
+        self.assertFalse(self.page(this_week))
+
+    def test_moved_event_invalidates_old_and_new_buckets(self):
+        music, arts = {'category': ['music']}, {'category': ['arts']}
+        self.assertFalse(self.page(music))
+        self.assertFalse(self.page(arts))
+        self.concert.category = 'arts'
+        self.concert.save()
+        self.assertFalse(self.page(music))
+        self.assertFalse(self.page(arts))
+
+    def test_price_and_deletion_invalidate(self):
+        music = {'category': ['music']}
+        self.assertFalse(self.page(music))
+        self.concert.price_zones.update(zone_price=Decimal('5'))       # no signals
+        self.assertTrue(self.page(music))
+        EventPriceZone.objects.create(event=self.concert, zone_name='VIP', zone_price=Decimal('80'), zone_seats=10)
+        self.assertFalse(self.page(music))
+        self.concert.delete()
+        self.assertFalse(self.page(music))
+
+
+@override_settings(PRICE_ZONES={'MAX_ZONES': 3, 'MAX_PAYLOAD_SIZE': 1024})
+class PriceZonesTest(SimpleTestCase):
+    """Validation of the JSON price zone payload of the create event form."""
+
+    def zone(self, name='General', price='25', seats=100):
+        return {'zone_name': name, 'zone_price': price, 'zone_seats': seats}
+
+    def assertInvalid(self, zones, *messages, max_zones=None):
+        with self.assertRaises(ValidationError) as raised:
+            clean_price_zones(zones, max_zones)
+        self.assertEqual(raised.exception.messages, list(messages))
+
+    def test_valid_zones(self):
+        zones = parse_price_zones(json.dumps([self.zone(' Floor ', 19.99, '10'), self.zone('Balcony', 0, 5.0)]))
+        self.assertEqual(zones, [
+            {'zone_name': 'Floor', 'zone_price': Decimal('19.99'), 'zone_seats': 10},
+            {'zone_name': 'Balcony', 'zone_price': Decimal('0.00'), 'zone_seats': 5},
+        ])
+
+    def test_payload_size_limit(self):
+        payload = json.dumps([self.zone('x' * 1024)])
+        with self.assertRaisesMessage(ValidationError, "Price zones are too large."):
+            parse_price_zones(payload)
+        # checked before decoding
+        with self.assertRaisesMessage(ValidationError, "Price zones are too large."):
+            parse_price_zones('[' * 1025)
+
+    def test_payload_not_json(self):
+        with self.assertRaisesMessage(ValidationError, "Price zones are not valid JSON."):
+            parse_price_zones('[{"zone_name": ')
+
+    def test_zone_count_limit(self):
+        self.assertInvalid({'zone_name': 'General'}, "Price zones must be a list.")
+        self.assertInvalid([], "At least one price zone is required.")
+        self.assertInvalid([self.zone(f'Zone {i}') for i in range(4)], "An event can have at most 3 price zones.")
+        self.assertEqual(len(clean_price_zones([self.zone(f'Zone {i}') for i in range(4)], max_zones=4)), 4)
+
+    def test_duplicate_names_case_insensitive(self):
+        self.assertInvalid(
+            [self.zone('VIP'), self.zone(' vip '), self.zone('Floor')],
+            'Zone 2: Zone name "vip" is used more than once.'
+        )
+        self.assertInvalid(
+            [self.zone('Straße'), self.zone('STRASSE')], 'Zone 2: Zone name "STRASSE" is used more than once.'
+        )
+
+    def test_errors_of_all_zones_prefixed_by_number(self):
+        self.assertInvalid(
+            [self.zone(''), 'zone', self.zone(price='-1'), self.zone('A', price='1.999'),
+             self.zone('B', seats=0), self.zone('C', seats=True), self.zone('D', price='NaN')],
+            "Zone 1: Zone name is required.",
+            "Zone 2: Expected an object with zone_name, zone_price and zone_seats.",
+            "Zone 3: Price cannot be negative.",
+            "Zone 4: Price cannot have more than 2 decimal places.",
+            "Zone 5: The minimum seat capacity for the price zone is 1.",
+            "Zone 6: Enter a whole number of seats.",
+            "Zone 7: Enter a valid price.",
+            max_zones=10,
+        )
+
+
+class ImageJobLeaseTest(TransactionTestCase):
+    """Image upload jobs are finished by the worker holding their lease only (committed, as workers see them)."""
+
+    def setUp(self):
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        jobs_settings = override_settings(IMAGE_JOBS={
+            'UPLOAD_DIR': upload_dir.name, 'CONCURRENCY': 1, 'MAX_ATTEMPTS': 3, 'RETRY_BACKOFF': 10, 'LEASE': 60,
+        })
+        jobs_settings.enable()
+        self.addCleanup(jobs_settings.disable)
+
+        for target, value in [('cloud_upload_img', 'https://cdn.example.com/uploaded/'), ('cloud_delete_img', None),
+                              ('build_image_variants', {})]:
+            patcher = mock.patch(f'core.jobs.{target}', return_value=value)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+
+        organizer = Profile.objects.create_user(email='organizer@example.com', full_name='Organizer')
+        self.event = create_event(organizer)
+        self.storage = get_upload_queue_storage()
+
+    def queue_job(self):
+        """Returns: ImageUploadJob - a queued job of a staged image."""
+        image = io.BytesIO()
+        Image.new('RGB', (40, 20)).save(image, 'PNG')
+        names = stage_image_uploads([SimpleUploadedFile('cover.png', image.getvalue())])
+        return enqueue_image_uploads(self.event, names)[0]
+
+    def take_over(self, job):
+        """Returns: ImageUploadJob - the job claimed again by another worker after its lease expired."""
+        ImageUploadJob.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        claimed, = claim_jobs(10)
+        self.assertEqual(claimed.attempts, job.attempts + 1)
+        return claimed
+
+    def test_stale_worker_cannot_finish_taken_over_job(self):
+        job = self.queue_job()
+        stale, = claim_jobs(10)
+        fresh = self.take_over(stale)
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertIsNone(run_job(stale))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (ImageUploadJob.RUNNING, fresh.attempts))
+        self.assertFalse(EventImage.objects.filter(image_url='https://cdn.example.com/uploaded/').exists())
+        self.assertTrue(self.storage.exists(job.file))
+        self.cloud_delete_img.assert_called_once_with('https://cdn.example.com/uploaded/')
+
+        self.assertEqual(run_job(fresh), ImageUploadJob.DONE)
+        self.assertEqual(EventImage.objects.filter(image_url='https://cdn.example.com/uploaded/').count(), 1)
+        self.assertFalse(self.storage.exists(job.file))
+
+    def test_stale_worker_cannot_fail_taken_over_job(self):
+        job = self.queue_job()
+        ImageUploadJob.objects.filter(pk=job.pk).update(attempts=2)
+        stale, = claim_jobs(10)          # last attempt: a failure would mark the job failed
+        fresh = self.take_over(stale)
+
+        self.cloud_upload_img.side_effect = OSError("Connection reset")
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertIsNone(run_job(stale))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (ImageUploadJob.RUNNING, ''))
+        self.assertTrue(self.storage.exists(job.file))
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(run_job(fresh), ImageUploadJob.FAILED)
+        self.assertFalse(self.storage.exists(job.file))
+
+    def test_retry_keeps_staged_file(self):
+        job = self.queue_job()
+        claimed, = claim_jobs(10)
+        self.cloud_upload_img.side_effect = OSError("Connection reset")
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(run_job(claimed), ImageUploadJob.PENDING)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageUploadJob.PENDING)
+        self.assertGreater(job.next_attempt_at, timezone.now())
+        self.assertTrue(self.storage.exists(job.file))
+
+    def test_deleted_event_drops_upload_and_staged_file(self):
+        job = self.queue_job()
+        claimed, = claim_jobs(10)
+        with mock.patch('core.signals.cloud_delete_imgs'):
+            self.event.delete()
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertIsNone(run_job(claimed))
+        self.assertFalse(self.storage.exists(job.file))
+
+    def test_command_counts_retries_apart_from_failures(self):
+        self.queue_job()
+        job = self.queue_job()
+        ImageUploadJob.objects.filter(pk=job.pk).update(attempts=2)
+        self.cloud_upload_img.side_effect = OSError("Connection reset")
+
+        out = io.StringIO()
+        with self.assertLogs('core.jobs', 'WARNING'):
+            call_command('process_image_jobs', '--once', stdout=out)
+        self.assertIn("Processed 2 jobs (0 uploaded, 1 to retry, 1 failed, 0 dropped).", out.getvalue())
+
+
+class EventCardsTemplateTest(TestCase):
+    """Price line of the event cards partial."""
+
+    def test_prices(self):
+        organizer = Profile.objects.create_user(email='organizer@example.com', full_name='Organizer')
+        create_event(organizer, name='Paid', prices=('25', '10.50'))
+        create_event(organizer, name='Free', prices=('0', '30'))
+        create_event(organizer, name='Unpriced', prices=())
+
+        cards = {
+            card.name: ' '.join(render_to_string('core/partials/event-cards.html', {'events': [card]}).split())
+            for card in EventCard.objects.all()
+        }
+        self.assertIn('From $10.50', cards['Paid'])
+        self.assertIn('<span class="event-price free"> Free </span>', cards['Free'])
+        self.assertNotIn('$', cards['Unpriced'])
+        self.assertNotIn('None', cards['Unpriced'])
@@ -6,5 +6,12 @@ app_name = 'core'
 urlpatterns = [
     path('', views.home, name="home"),
     path('explore/', views.explore, name="explore"),
-    path('event/create/', views.create_event, name="create_event")
+    path('explore/events/', views.explore_page, name="explore_page"),
+    path('event/create/', views.create_event, name="create_event"),
+    path('event/<int:event_id>/queue/', views.event_queue, name="event_queue"),
+    path('event/<int:event_id>/queue/status/', views.event_queue_status, name="event_queue_status"),
+    path('event/<int:event_id>/zones/<int:zone_id>/hold/', views.hold_tickets, name="hold_tickets"),
+    path('zones/<int:zone_id>/seats/', views.seat_availability, name="seat_availability"),
+    path('reservations/<int:reservation_id>/confirm/', views.confirm_tickets, name="confirm_tickets"),
+    path('reservations/<int:reservation_id>/release/', views.release_tickets, name="release_tickets")
 ]
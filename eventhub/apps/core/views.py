@@ -1,28 +1,119 @@
 import os
 import io
-import json
+import base64
 from dotenv import load_dotenv
-from django.shortcuts import render
+from django.http import Http404, HttpResponseNotModified, JsonResponse
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.safestring import mark_safe
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.files.storage import FileSystemStorage
+from django.views.decorators.http import require_POST
 
 from .models import *
-from .forms import EventInfoValidator, EventImageValidator, PriceZoneFormSet
-from users.utils import cloud_upload_img
+from .forms import (
+    EventInfoValidator, EventImageValidator, PriceZoneFormSet, PriceZonePayloadValidator, ExploreFilterValidator
+)
+from .explore import get_explore_events, get_sort, paginate_events
+from .explorecache import cached_page
+from .facets import get_facet_counts
+from .feeds import render_feed
+from . import services
+from .reservations import HoldExpired, SeatsUnavailable, confirm_hold, hold_seats, release_hold
+from .seatmaps import SeatMapConflict, count_free_seats
+from .waitingroom import join_queue, queue_status, read_ticket, set_ticket_cookie, waiting_room
 
 load_dotenv()
 
-# TODO: home page for logged in user
 def home(request):
-    return render(request, 'core/home.html')
+    """
+    Serve home page.
+
+    GET:
+        - Guests: landing page.
+        - Logged in users: their personalized feed of upcoming events (precomputed, see core.feeds).
+    """
+    context = {}
+    if request.user.is_authenticated:
+        context['feed_html'] = mark_safe(render_feed(request.user))
+    return render(request, 'core/home.html', context)
+
+def _explore_page(request):
+    """
+    Helper function that returns a page of explore results for the request filters.
+
+    Pages are served from the explore cache (see core.explorecache) and rendered on a miss.
+
+    Returns:
+        tuple: (validated filter form, page dict with html and count of the event cards,
+            url of the next page or None).
+    """
+    filter_form = ExploreFilterValidator(request.GET)
+    filter_form.is_valid()      # populates cleaned data with valid filters only
+
+    sort = get_sort(filter_form.cleaned_data)
+    cursor = request.GET.get('cursor')
+
+    def render_page():
+        events = get_explore_events(filter_form.cleaned_data)
+        page, next_cursor = paginate_events(events, sort, cursor)
+        return {
+            'html': render_to_string('core/partials/event-cards.html', {'events': page}),
+            'count': len(page),
+            'next_cursor': next_cursor,
+        }
+
+    page = cached_page(filter_form.cleaned_data, sort, cursor, render_page)
+
+    next_page_url = None
+    if page['next_cursor']:
+        params = request.GET.copy()
+        params['cursor'] = page['next_cursor']
+        next_page_url = f"{reverse('core:explore_page')}?{params.urlencode()}"
+
+    return filter_form, page, next_page_url
+
 
-# TODO: dynamic event rendering + filtering
 def explore(request):
-    file_path = os.path.join(settings.APP_ROOT,'apps', 'core', 'data', 'dummy_data.json')
-    with open(file_path, "r") as f:
-        dummy_data = json.load(f)
-    return render(request, 'core/explore-events.html', {'events': dummy_data, 'CDN_DOMAIN': os.getenv('CDN_DOMAIN')})
+    """
+    Serve explore events page with upcoming events filtered by the sidebar filters.
+
+    GET:
+        - Validate filters (invalid filters are ignored).
+        - Render the first page of events matching the filters in the selected sort order.
+        - Count events of every category, price band and quick date for the sidebar (see core.facets).
+    """
+    filter_form, page, next_page_url = _explore_page(request)
+    sort = get_sort(filter_form.cleaned_data)
+    return render(request, 'core/explore-events.html', {
+        'events_html': page['html'],
+        'events_count': page['count'],
+        'facets': get_facet_counts(filter_form.cleaned_data),
+        'filters': filter_form,
+        # the sort option applied by the server (search results sorted by search rank show as relevance)
+        'sort': 'relevance' if sort == 'rank' else sort,
+        'next_page_url': next_page_url
+    })
+
+
+def explore_page(request):
+    """
+    Serve the next page of explore results for infinite scroll.
+
+    GET:
+        - Same filters as explore page plus `cursor` of the previous page.
+
+    Returns: JSON with rendered event cards (html), their count and url of the next page (null on last page).
+    """
+    _, page, next_page_url = _explore_page(request)
+    return JsonResponse({
+        'html': page['html'],
+        'count': page['count'],
+        'next_page_url': next_page_url
+    })
 
 
 @login_required
@@ -34,13 +125,14 @@ def create_event(request):
         - Serve create event form page.
 
     POST:
-        Validate submitted form.
+        Validate submitted form (price zones from the JSON payload, or the formset when it's not posted).
         - On errors:
             - Return create event form form with errors
-        - On success:
+        - On success (all or nothing, see core.services.create_event):
             - Create event object (Event) with the validated provided details.
             - Create price zone objects (EventPriceZone) associated with the event.
-            - Create image objects (EventImage) associated with the event.
+            - Queue upload jobs of the event images (image objects (EventImage) are created by the
+              process_image_jobs worker once uploaded).
             - Redirect to event page.
     """
 
@@ -48,58 +140,198 @@ def create_event(request):
         user = request.user
         event_form = EventInfoValidator(request.POST)
         image_form = EventImageValidator(request.POST, request.FILES)
-        price_zone_forms = PriceZoneFormSet(request.POST, prefix="zones")
         
-        if ( event_form.is_valid() and image_form.is_valid() and price_zone_forms.is_valid() ):
-            
-            # create event object
-            event = Event.objects.create(
-                name=event_form.cleaned_data['name'],
-                date=event_form.cleaned_data['date'],
-                time=event_form.cleaned_data['time'],
-                location=event_form.cleaned_data['location'],
-                category=event_form.cleaned_data['category'],
-                description=event_form.cleaned_data['description'],
-                seating_type=event_form.cleaned_data['seating_type'],
-                organizer=user
-            )
-            
-            # create price zone object
-            for zone in price_zone_forms.cleaned_data:
-                if (zone):
-                    EventPriceZone.objects.create(
-                        event=event,
-                        zone_name=zone['zone_name'],
-                        zone_price=zone['zone_price'],
-                        zone_seats=zone['zone_seats']
-                    )
+        # price zones come as one JSON payload (see core.zones), the formset is the fallback without javascript
+        if 'price_zones' in request.POST:
+            price_zone_payload = PriceZonePayloadValidator(request.POST)
+            zones_valid = price_zone_payload.is_valid()
+            zones = price_zone_payload.cleaned_data.get('price_zones')
+            # zones are rendered back as the formset
+            price_zone_forms = price_zone_payload.formset()
+        else:
+            price_zone_payload = None
+            price_zone_forms = PriceZoneFormSet(request.POST, prefix="zones")
+            zones_valid = price_zone_forms.is_valid()
+            if zones_valid:
+                zones = [zone for zone in price_zone_forms.cleaned_data if zone and not zone.get('DELETE')]
+        
+        if ( event_form.is_valid() and image_form.is_valid() and zones_valid ):
             
-            # upload images and create image objects
             try:
-                images = image_form.cleaned_data.get('images', [])
-                fs = FileSystemStorage()
-                
-                for img in images:
-                    file = fs.save(img.name, img)
-                    file_path = fs.path(file)
-                    url = cloud_upload_img(file_path)
-                    fs.delete(file)
-                    
-                    EventImage.objects.create(
-                        event=event,
-                        image_url = url
-                    )
+                event = services.create_event(
+                    user, event_form.cleaned_data, zones, image_form.cleaned_data.get('images', [])
+                )
             except Exception:
-                event_form.add_error('images', "Something went wrong.")
+                event_form.add_error(None, "Something went wrong. The event was not created.")
 
             # TODO: on success redirect to event page
     else:
         event_form = EventInfoValidator()
         image_form = EventImageValidator()
+        price_zone_payload = None
         price_zone_forms = PriceZoneFormSet(prefix="zones")
     
     return render(request, 'core/create-event.html', {
             'event_form': event_form,
             'image_form': image_form,
-            'price_zone_forms': price_zone_forms
+            'price_zone_forms': price_zone_forms,
+            'price_zone_payload': price_zone_payload,
+            'max_price_zones': settings.PRICE_ZONES['MAX_ZONES']
+        })
+
+
+def _reservation_json(reservation):
+    return {
+        'id': reservation.pk,
+        'zone': reservation.zone_id,
+        'seats': reservation.seats,
+        'seat_numbers': reservation.seat_numbers,
+        'status': reservation.status,
+        'expires_at': reservation.expires_at.isoformat(),
+    }
+
+
+@login_required
+def event_queue(request, event_id):
+    """
+    Serve the waiting room in front of ticket purchase of the event (see core.waitingroom).
+
+    GET:
+        - Join the queue once (the signed queue ticket is kept in a cookie).
+        - Redirect to `next` (same site url) once admitted, otherwise render the polling page.
+    """
+    event = Event.objects.filter(pk=event_id, date__gte=timezone.localdate()).values('name').first()
+    if event is None:
+        raise Http404("Event does not exist.")
+
+    next_url = request.GET.get('next')
+    if not next_url or not url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        next_url = reverse('core:explore')
+
+    token = None
+    ticket = read_ticket(request, event_id)
+    if ticket is None or ticket['u'] != request.user.pk:
+        token, ticket = join_queue(event_id, request.user.pk)
+
+    status = queue_status(ticket)
+    if status['admitted']:
+        response = redirect(next_url)
+    else:
+        response = render(request, 'core/waiting-room.html', {
+            'event': event,
+            'status': status,
+            'status_url': reverse('core:event_queue_status', args=[event_id]),
+            'next_url': next_url,
+            'poll_interval': settings.WAITING_ROOM['POLL_INTERVAL'],
+        })
+    if token:
+        set_ticket_cookie(response, event_id, token, ticket)
+    return response
+
+
+def event_queue_status(request, event_id):
+    """
+    Serve the position of the user in the waiting room of the event for polling.
+
+    Read from the signed queue ticket in the cookie only (no session, user or database reads),
+    so crowds of an on-sale can poll without touching the database.
+
+    Returns: JSON with admitted, position and wait in seconds (404 when not in the queue).
+    """
+    ticket = read_ticket(request, event_id)
+    if ticket is None:
+        return JsonResponse({'error': "You are not in the waiting room of this event."}, status=404)
+    return JsonResponse(queue_status(ticket))
+
+
+@login_required
+@require_POST
+@waiting_room
+def hold_tickets(request, event_id, zone_id):
+    """
+    Hold seats of a price zone of the event for the user admitted from its waiting room (see core.reservations).
+
+    POST:
+        - `seats` to hold (1 by default), or
+        - `seat_numbers` selected in the seat map of a reserved seating zone (comma separated).
+
+    Returns: JSON with the hold (201), error when seats are invalid (400), the user wasn't admitted
+    from the waiting room yet (429) or seats are not available (409).
+    """
+    try:
+        seats = int(request.POST.get('seats', 1))
+        seat_numbers = request.POST.get('seat_numbers')
+        if seat_numbers is not None:
+            seat_numbers = [int(seat) for seat in seat_numbers.split(',') if seat.strip()]
+    except ValueError:
+        return JsonResponse({'error': "Enter a whole number of seats."}, status=400)
+
+    try:
+        reservation = hold_seats(request.user, zone_id, seats, seat_numbers, event_id=event_id)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except (SeatsUnavailable, SeatMapConflict) as e:
+        return JsonResponse({'error': str(e)}, status=409)
+
+    return JsonResponse(_reservation_json(reservation), status=201)
+
+
+@login_required
+@require_POST
+def confirm_tickets(request, reservation_id):
+    """
+    Confirm a hold of the user before it expires.
+
+    Returns: JSON with the confirmed reservation, error when the hold is not active anymore (410).
+    """
+    try:
+        reservation = confirm_hold(request.user, reservation_id)
+    except HoldExpired as e:
+        return JsonResponse({'error': str(e)}, status=410)
+    return JsonResponse(_reservation_json(reservation))
+
+
+@login_required
+@require_POST
+def release_tickets(request, reservation_id):
+    """
+    Give seats of a hold of the user back before it expires.
+
+    Returns: JSON with whether the hold was released.
+    """
+    return JsonResponse({'released': release_hold(request.user, reservation_id)})
+
+
+def seat_availability(request, zone_id):
+    """
+    Serve seat availability of a reserved seating price zone for the seat picker.
+
+    GET:
+        - Bitmap of the seats (seat n is bit n % 8 of byte n // 8, 1 = taken), base64 encoded
+          (about 8 KB for 50,000 seats).
+        - Answers 304 while the seat map version matches the If-None-Match header (ETag).
+
+    Returns: JSON with seats, seats per row, free seats, version and the bitmap (404 without seat map).
+    """
+    seat_map = SeatMap.objects.filter(zone_id=zone_id).first()
+    if seat_map is None:
+        return JsonResponse({'error': "This price zone has no seat map."}, status=404)
+
+    etag = f'"{seat_map.version}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        bitmap = bytes(seat_map.bitmap)
+        response = JsonResponse({
+            'zone': zone_id,
+            'seats': seat_map.seats,
+            'row_length': seat_map.row_length,
+            'free_seats': count_free_seats(bitmap, seat_map.seats),
+            'version': seat_map.version,
+            'bitmap': base64.b64encode(bitmap).decode('ascii'),
         })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,148 @@
+import math
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+
+COOKIE_PREFIX = 'queue_'
+_SALT = 'core.waitingroom'
+
+
+class AdmissionScheduler:
+    """
+    Thread-safe in-process schedule of admissions from the waiting rooms of events.
+
+    Every buyer who joins the queue of an event gets the time of their admission (GCRA):
+    admissions of an event are spaced 1 / rate seconds apart, and up to burst buyers
+    are admitted at once after idle time. Only the next admission time per event is kept.
+    """
+
+    # events kept before stale schedules are pruned
+    MAX_EVENTS = 1000
+
+    def __init__(self):
+        self._next_admission = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, event_id, rate, burst=1):
+        """
+        Args:
+            event_id (int): Id of the event.
+            rate (float): Buyers admitted per second.
+            burst (int): Buyers admitted at once after idle time.
+        Returns:
+            float: Unix time when the joining buyer is admitted.
+        """
+        interval = 1 / rate
+        tolerance = (burst - 1) * interval
+        with self._lock:
+            now = time.time()
+            next_admission = max(self._next_admission.get(event_id, now), now)
+            self._next_admission[event_id] = next_admission + interval
+
+            if len(self._next_admission) > self.MAX_EVENTS:
+                # schedules in the past are the same as missing ones
+                self._next_admission = {event: at for event, at in self._next_admission.items() if at > now}
+        return max(now, next_admission - tolerance)
+
+    def clear(self):
+        with self._lock:
+            self._next_admission.clear()
+
+
+_scheduler = AdmissionScheduler()
+
+
+def join_queue(event_id, user_id):
+    """
+    Queue the user for the purchase of tickets of the event.
+
+    Args:
+        event_id (int): Id of the event.
+        user_id (int): Id of the buyer (the ticket is valid for them only).
+    Returns:
+        tuple: (signed queue token, ticket dict with event id, user id and admission time).
+    """
+    config = settings.WAITING_ROOM
+    ticket = {
+        'e': event_id,
+        'u': user_id,
+        'a': _scheduler.schedule(event_id, config['ADMISSION_RATE'], config['BURST']),
+    }
+    return signing.dumps(ticket, salt=_SALT), ticket
+
+
+def read_ticket(request, event_id):
+    """
+    Read the queue ticket of the event from the request cookie (no database queries).
+
+    Returns:
+        dict: Ticket of the event (e: event id, u: user id, a: admission time), None if it's missing,
+            forged or its admission window passed.
+    """
+    token = request.COOKIES.get(f'{COOKIE_PREFIX}{event_id}')
+    if not token:
+        return None
+    try:
+        ticket = signing.loads(token, salt=_SALT)
+    except signing.BadSignature:
+        return None
+    if ticket.get('e') != event_id or ticket['a'] + settings.WAITING_ROOM['ADMISSION_TTL'] < time.time():
+        return None
+    return ticket
+
+
+def queue_status(ticket):
+    """
+    Returns:
+        dict: admitted (bool), position (buyers admitted before this one, estimated) and wait (seconds).
+    """
+    wait = max(0.0, ticket['a'] - time.time())
+    return {
+        'admitted': wait == 0,
+        'position': math.ceil(wait * settings.WAITING_ROOM['ADMISSION_RATE']),
+        'wait': math.ceil(wait),
+    }
+
+
+def set_ticket_cookie(response, event_id, token, ticket):
+    """Store the queue token of the event in a cookie valid until its admission window passes."""
+    response.set_cookie(
+        f'{COOKIE_PREFIX}{event_id}', token,
+        max_age=max(0, int(ticket['a'] - time.time())) + settings.WAITING_ROOM['ADMISSION_TTL'],
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+def waiting_room(view):
+    """
+    Let only buyers admitted from the waiting room of the event (event_id URL argument) into the view.
+
+    Others are redirected to the waiting room (GET) or get 429 with its url (other methods),
+    so crowds of an on-sale queue in memory instead of competing for the same price zone rows.
+    """
+    @wraps(view)
+    def wrapper(request, *args, event_id, **kwargs):
+        if settings.WAITING_ROOM['ENABLED']:
+            ticket = read_ticket(request, event_id)
+            if ticket is None or ticket['u'] != request.user.pk or ticket['a'] > time.time():
+                queue_url = reverse('core:event_queue', args=[event_id])
+                if request.method == 'GET':
+                    return redirect(f"{queue_url}?{urlencode({'next': request.get_full_path()})}")
+                wait = queue_status(ticket)['wait'] if ticket and ticket['u'] == request.user.pk else 0
+                response = JsonResponse(
+                    {'error': "Join the waiting room to buy tickets for this event.", 'queue_url': queue_url},
+                    status=429
+                )
+                response['Retry-After'] = str(wait)
+                return response
+        return view(request, *args, event_id=event_id, **kwargs)
+
+    return wrapper
@@ -0,0 +1,139 @@
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .models import EventPriceZone
+
+_name_field = EventPriceZone._meta.get_field('zone_name')
+_price_field = EventPriceZone._meta.get_field('zone_price')
+
+MAX_ZONE_SEATS = 2 ** 63 - 1    # PositiveBigIntegerField
+
+
+def parse_price_zones(payload, max_zones=None):
+    """
+    Decode and validate a JSON price zone payload of the create event form.
+
+    The payload is a JSON list of zones, e.g.
+    [{"zone_name": "General", "zone_price": "25.00", "zone_seats": 500}, ...].
+    Its size is checked before decoding and its length before validating any zone.
+
+    Args:
+        payload (str): JSON price zone payload.
+        max_zones (int): Maximum number of zones (PRICE_ZONES["MAX_ZONES"] by default).
+    Raises:
+        ValidationError: when the payload is not valid (with all errors of the zones).
+    Returns:
+        list: Cleaned price zones (dicts with zone_name, zone_price and zone_seats).
+    """
+    if len(payload) > settings.PRICE_ZONES['MAX_PAYLOAD_SIZE']:
+        raise ValidationError("Price zones are too large.")
+    try:
+        zones = json.loads(payload)
+    except ValueError:
+        raise ValidationError("Price zones are not valid JSON.")
+    return clean_price_zones(zones, max_zones)
+
+
+def clean_price_zones(zones, max_zones=None):
+    """
+    Validate price zones in one pass over plain dicts, with the rules of PriceZoneValidator.
+
+    Zone names must be unique within the event (case insensitive).
+
+    Args:
+        zones (list): Price zones (dicts with zone_name, zone_price and zone_seats).
+        max_zones (int): Maximum number of zones (PRICE_ZONES["MAX_ZONES"] by default).
+    Raises:
+        ValidationError: when any zone is not valid (with all errors, prefixed by the zone number).
+    Returns:
+        list: Cleaned price zones (zone_name stripped, zone_price Decimal, zone_seats int).
+    """
+    if max_zones is None:
+        max_zones = settings.PRICE_ZONES['MAX_ZONES']
+
+    if not isinstance(zones, list):
+        raise ValidationError("Price zones must be a list.")
+    if not zones:
+        raise ValidationError("At least one price zone is required.")
+    if len(zones) > max_zones:
+        raise ValidationError(f"An event can have at most {max_zones} price zones.")
+
+    cleaned = []
+    errors = []
+    names = set()
+    for number, zone in enumerate(zones, start=1):
+        if not isinstance(zone, dict):
+            errors.append(f"Zone {number}: Expected an object with zone_name, zone_price and zone_seats.")
+            continue
+        try:
+            name = _clean_name(zone.get('zone_name'))
+            if name.casefold() in names:
+                raise ValidationError(f"Zone name \"{name}\" is used more than once.")
+            names.add(name.casefold())
+            cleaned.append({
+                'zone_name': name,
+                'zone_price': _clean_price(zone.get('zone_price')),
+                'zone_seats': _clean_seats(zone.get('zone_seats')),
+            })
+        except ValidationError as e:
+            errors.append(f"Zone {number}: {e.messages[0]}")
+
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def _clean_name(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValidationError("Zone name is required.")
+    value = value.strip()
+    if len(value) > _name_field.max_length:
+        raise ValidationError(f"Name cannot exceed {_name_field.max_length} characters.")
+    return value
+
+
+def _clean_price(value):
+    # floats go through str, so 19.99 stays 19.99
+    if value is None or value == '':
+        raise ValidationError("Price is required.")
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValidationError("Enter a valid price.")
+    try:
+        price = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValidationError("Enter a valid price.")
+    if not price.is_finite():
+        raise ValidationError("Enter a valid price.")
+    if price < 0:
+        raise ValidationError("Price cannot be negative.")
+
+    if price.as_tuple().exponent < -_price_field.decimal_places:
+        raise ValidationError(f"Price cannot have more than {_price_field.decimal_places} decimal places.")
+    if price.adjusted() + 1 > _price_field.max_digits - _price_field.decimal_places:
+        raise ValidationError("Price is too high.")
+    return price.quantize(Decimal(1).scaleb(-_price_field.decimal_places))
+
+
+def _clean_seats(value):
+    if value is None or value == '':
+        raise ValidationError("Seats capacity is required.")
+    if isinstance(value, bool):
+        raise ValidationError("Enter a whole number of seats.")
+    if isinstance(value, str):
+        try:
+            value = int(value.strip())
+        except ValueError:
+            raise ValidationError("Enter a whole number of seats.")
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif not isinstance(value, int):
+        raise ValidationError("Enter a whole number of seats.")
+
+    if value < 1:
+        raise ValidationError("The minimum seat capacity for the price zone is 1.")
+    if value > MAX_ZONE_SEATS:
+        raise ValidationError("Seats capacity is too high.")
+    return value
@@ -5,7 +5,7 @@ from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
 
 from .models import Profile
-from .utils import validate_location
+from .utils import geocode_location
 
 load_dotenv()
 
@@ -171,7 +171,8 @@ class ProfileValidator(forms.Form):
         user (Profile): The current user instance for whom information is being updated.
 
     Returns:
-        dict: Cleaned data with validated and transformed (if needed) input.
+        dict: Cleaned data with validated and transformed (if needed) input, plus coordinates
+            (latitude, longitude) when the location was changed or cleared.
     """
     
     def __init__(self, *args, user, **kwargs):
@@ -222,11 +223,16 @@ class ProfileValidator(forms.Form):
         
         return phone
     
+    # geocode a changed location, its coordinates are kept for events near the user
     def clean_location(self):
         location = self.cleaned_data.get('location')
         
         if location and location != self.user.location:
-            location = validate_location(location)
+            place = geocode_location(location)
+            self.cleaned_data['coordinates'] = (place.latitude, place.longitude)
+            location = place.display_name
+        elif not location:
+            self.cleaned_data['coordinates'] = (None, None)
             
         return location
     
@@ -0,0 +1,371 @@
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import GazetteerPlace, GeocodeCache
+
+# geocoded location: full display name and WGS84 coordinates
+Place = namedtuple('Place', ['display_name', 'latitude', 'longitude'])
+
+_MISSING = object()
+
+
+class GeocoderBusy(Exception):
+    """Raised when the geocoder rate limit does not allow a request in time."""
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with per-entry expiration.
+
+    Args:
+        maxsize (int): Maximum number of entries (least recently used entries are evicted).
+        ttl (float): Time to live of an entry in seconds.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Returns: cached value of the key or default if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store the value under the key (ttl overrides the default time to live)."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Args:
+        rate (float): Tokens added per second (sustained requests per second).
+        burst (int): Maximum number of tokens (requests allowed at once after idle time).
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """
+        Take a token, waiting for it up to timeout seconds (forever if None).
+
+        Returns: bool - True if the token was taken, False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    The first caller of a key runs the function, callers arriving while it runs
+    wait and receive the same result (or exception).
+    """
+
+    class _Call:
+        __slots__ = ('done', 'result', 'error')
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class NominatimBackend:
+    """
+    Geocoding backend of OpenStreetMap Nominatim (or a compatible server, e.g. a local stand-in).
+
+    Args:
+        url (str): Search endpoint url.
+        timeout (tuple): (connect, read) timeouts in seconds.
+        pool_size (int): Maximum number of kept-alive connections.
+    """
+
+    def __init__(self, url='https://nominatim.openstreetmap.org/search', timeout=(3.05, 10), pool_size=10):
+        self.url = url
+        self.timeout = tuple(timeout)
+
+        # pooled session keeps connections (and TLS sessions) alive between lookups
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': f'Eventhub/{os.getenv("APP_VERSION", "1.0")}',
+            'Accept-Language': 'en'
+        })
+
+    def search(self, location):
+        """
+        Geocode location.
+
+        Raises:
+            Exception: when something is wrong with the fetch.
+
+        Returns:
+            Place | None: The first match, or None if location is not found.
+        """
+        response = self.session.get(self.url, params={'q': location, 'format': 'json'}, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        if len(data) == 0:
+            return None
+        return Place(data[0]['display_name'], float(data[0]['lat']), float(data[0]['lon']))
+
+
+class GazetteerBackend:
+    """
+    Offline geocoding backend over the local gazetteer table (see import_gazetteer command).
+
+    Looks up the whole query first, then its leading part ("Central Park, New York" -> "central park"),
+    first by exact and then by prefix match of the normalized name; the most populated place wins.
+    """
+
+    rate_limited = False        # local lookups are not subject to the remote usage policy
+
+    def __init__(self, min_prefix=3):
+        self.min_prefix = min_prefix
+
+    def search(self, location):
+        """
+        Geocode location.
+
+        Returns:
+            Place | None: The best match, or None if location is not found.
+        """
+        candidates = [normalize_place_name(location)]
+        if ',' in location:
+            candidates.append(normalize_place_name(location.split(',', 1)[0]))
+
+        places = GazetteerPlace.objects.order_by('-population')
+        for name in filter(None, candidates):
+            place = places.filter(normalized_name=name).first()
+            if place is None and len(name) >= self.min_prefix:
+                # range scan on the name index (startswith would compile to a non-indexed LIKE)
+                place = places.filter(normalized_name__gte=name, normalized_name__lt=name + '\uffff').first()
+            if place is not None:
+                return Place(place.display_name, place.latitude, place.longitude)
+        return None
+
+
+def normalize_place_name(name):
+    """
+    Normalize place name for gazetteer lookups ("São Paulo!" -> "sao paulo").
+
+    Returns: str - case folded name without accents and punctuation, with collapsed whitespace.
+    """
+    name = unicodedata.normalize('NFKD', name.casefold())
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', name).split())[:200]
+
+
+def normalize_query(location):
+    """
+    Normalize location query for cache lookups ("  New  York " and "new york" share an entry).
+
+    Returns: str - case folded query with collapsed whitespace.
+    """
+    return ' '.join(location.casefold().split())[:255]
+
+
+def _read_db_cache(query):
+    """Returns: Place or None (negative entry) from the database cache, or _MISSING if absent or expired."""
+    entry = GeocodeCache.objects.filter(query=query).first()
+    if entry is None:
+        return _MISSING
+
+    ttl = settings.GEOCODER['FOUND_TTL'] if entry.found else settings.GEOCODER['NOT_FOUND_TTL']
+    if entry.updated_at < timezone.now() - timedelta(seconds=ttl):
+        return _MISSING
+
+    if not entry.found:
+        return None
+    return Place(entry.display_name, entry.latitude, entry.longitude)
+
+
+def _write_db_cache(query, place):
+    GeocodeCache.objects.update_or_create(
+        query=query,
+        defaults={
+            'found': place is not None,
+            'display_name': place.display_name if place else '',
+            'latitude': place.latitude if place else None,
+            'longitude': place.longitude if place else None,
+        }
+    )
+
+
+class GeocoderClient:
+    """
+    Geocoder client: two-tier cache (in-process LRU, then database) in front of a rate-limited backend.
+
+    Concurrent lookups of the same query are coalesced, so only one of them reads the
+    database cache and calls the backend. Cache misses are stored in both tiers,
+    including "not found" results (negative caching, shorter time to live in both tiers,
+    so a lookup that failed transiently is retried soon). Fetch errors are not cached.
+
+    Args:
+        backend: Object with `search(location) -> Place | None` method.
+        rate (float): Maximum backend requests per second (process-wide).
+        burst (int): Maximum backend requests at once.
+        rate_wait (float): Maximum seconds to wait for the rate limiter before giving up.
+        cache_size (int): Entries of the in-process cache.
+        cache_ttl (float): Seconds an entry lives in the in-process cache.
+        not_found_ttl (float): Seconds a "not found" entry lives in the in-process cache (at most cache_ttl).
+    """
+
+    def __init__(self, backend, rate=1.0, burst=1, rate_wait=5.0, cache_size=2048, cache_ttl=3600, not_found_ttl=300):
+        self.backend = backend
+        self.rate_wait = rate_wait
+        self.not_found_ttl = min(not_found_ttl, cache_ttl)
+        self.rate_limiter = TokenBucket(rate, burst)
+        self.memory_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._inflight = SingleFlight()
+
+    def geocode(self, location):
+        """
+        Geocode location.
+
+        Raises:
+            GeocoderBusy: when the rate limit does not allow a backend request in time.
+            Exception: when something is wrong with the fetch.
+        Returns:
+            Place | None: The geocoded location, or None if location is not found.
+        """
+        query = normalize_query(location)
+
+        place = self.memory_cache.get(query, _MISSING)
+        if place is not _MISSING:
+            return place
+
+        return self._inflight.do(query, lambda: self._geocode_miss(query, location))
+
+    def _geocode_miss(self, query, location):
+        place = _read_db_cache(query)
+        if place is _MISSING:
+            rate_limited = getattr(self.backend, 'rate_limited', True)
+            if rate_limited and not self.rate_limiter.acquire(timeout=self.rate_wait):
+                raise GeocoderBusy("Geocoder rate limit exceeded.")
+            place = self.backend.search(location)
+            _write_db_cache(query, place)
+
+        self.memory_cache.set(query, place, None if place is not None else self.not_found_ttl)
+        return place
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder():
+    """Returns: GeocoderClient - process-wide client configured by settings.GEOCODER (created on first use)."""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                config = settings.GEOCODER
+                backend = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+                _geocoder = GeocoderClient(
+                    backend,
+                    rate=config['RATE_LIMIT'],
+                    burst=config['RATE_BURST'],
+                    rate_wait=config['RATE_WAIT'],
+                    cache_size=config['CACHE_SIZE'],
+                    cache_ttl=config['CACHE_TTL'],
+                    not_found_ttl=config['NOT_FOUND_CACHE_TTL'],
+                )
+    return _geocoder
+
+
+def geocode(location):
+    """
+    Geocode location with the configured geocoder client.
+
+    Raises:
+        Exception: when the location is not cached and something is wrong with the fetch.
+    Returns:
+        Place | None: The geocoded location, or None if location is not found.
+    """
+    return get_geocoder().geocode(location)
@@ -0,0 +1,148 @@
+import io
+
+from PIL import Image
+
+# leading bytes of supported image formats: (offset, signature) pairs that all have to match
+IMAGE_SIGNATURES = {
+    'JPEG': [(0, b'\xff\xd8\xff')],
+    'PNG': [(0, b'\x89PNG\r\n\x1a\n')],
+    'GIF': [(0, b'GIF8')],
+    'WEBP': [(0, b'RIFF'), (8, b'WEBP')],
+}
+SNIFF_SIZE = 12
+
+# decompression bomb guard: images with more pixels are rejected before decoding
+MAX_IMAGE_PIXELS = 40_000_000
+
+# resample from at most REDUCING_GAP times the target size (cheap box reduction does the rest)
+REDUCING_GAP = 2.0
+
+
+class ImageTooLarge(ValueError):
+    """Raised when the image has more pixels than MAX_IMAGE_PIXELS."""
+
+
+def sniff_image_format(file):
+    """
+    Detect the image format from the leading bytes of the file (without decoding it).
+
+    Args:
+        file: Seekable file object, its position is restored.
+    Returns:
+        str | None: 'JPEG', 'PNG', 'GIF' or 'WEBP', None for other content.
+    """
+    position = file.tell()
+    header = file.read(SNIFF_SIZE)
+    file.seek(position)
+
+    for image_format, signatures in IMAGE_SIGNATURES.items():
+        if all(header[offset:offset + len(signature)] == signature for offset, signature in signatures):
+            return image_format
+    return None
+
+
+def _square_box(width, height):
+    """Returns: tuple - (left, top, right, bottom) of the centered square of the image."""
+    side = min(width, height)
+    left = (width - side) // 2
+    top = (height - side) // 2
+    return left, top, left + side, top + side
+
+
+def _open_image(file, image_format=None):
+    """
+    Open the image lazily: only the sniffed decoder is tried, the header is parsed but no pixels are decoded yet.
+
+    Raises:
+        ImageTooLarge: when the image has more pixels than MAX_IMAGE_PIXELS.
+        ValueError: when the file is not a supported image.
+    Returns:
+        tuple: (PIL.Image, image format).
+    """
+    image_format = image_format or sniff_image_format(file)
+    if image_format is None:
+        raise ValueError("Unsupported image format.")
+
+    try:
+        image = Image.open(file, formats=[image_format])
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e))
+    if image.width * image.height > MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(f"Image has {image.width * image.height} pixels (max {MAX_IMAGE_PIXELS}).")
+    return image, image_format
+
+
+def make_thumbnail(file, size, image_format=None):
+    """
+    Crop the center of the image with 1:1 ratio, resize it and encode it in its original format.
+
+    The image is decoded once. JPEG images are decoded already downscaled (draft mode),
+    other formats are box-reduced before the final LANCZOS resample, so the memory
+    is bounded by a few times the target size rather than the full resolution.
+
+    Args:
+        file: Seekable file object with the image.
+        size (tuple): (width, height) of the thumbnail.
+        image_format (str): Format sniffed before (see sniff_image_format), optional.
+    Raises:
+        ImageTooLarge: when the image has more pixels than MAX_IMAGE_PIXELS.
+        ValueError: when the file is not a supported image.
+    Returns:
+        tuple: (io.BytesIO with the encoded thumbnail, image format).
+    """
+    image, image_format = _open_image(file, image_format)
+    width, height = image.size
+
+    if image_format == 'JPEG':
+        # let the decoder scale by 1/2, 1/4 or 1/8 while keeping the cropped square above the target
+        scale = max(size) * REDUCING_GAP / min(width, height)
+        if scale < 1:
+            image.draft(image.mode, (int(width * scale) + 1, int(height * scale) + 1))
+
+    box = _square_box(*image.size)
+    if image.mode == 'P':
+        # palette images can't be filtered: pick pixels down to the reducing gap, then filter
+        # the small image in full color (GIF/PNG encoders quantize it back)
+        reduced = tuple(min(int(edge * REDUCING_GAP), box[2] - box[0]) for edge in size)
+        image = image.resize(reduced, Image.Resampling.NEAREST, box=box).convert('RGBA')
+        box = (0, 0) + image.size
+
+    # crop box, box reduction and resampling in one pass (no full resolution intermediate copies)
+    thumbnail = image.resize(size, Image.Resampling.LANCZOS, box=box, reducing_gap=REDUCING_GAP)
+
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format=image_format)
+    buffer.seek(0)
+    return buffer, image_format
+
+
+def make_variant(file, width, image_format):
+    """
+    Resize the image to width (keeping aspect ratio, never upscaling) and encode it as image_format.
+
+    Args:
+        file: Seekable file object with the image.
+        width (int): Width of the variant in pixels.
+        image_format (str): Output format ('webp' or 'jpeg').
+    Raises:
+        ImageTooLarge: when the image has more pixels than MAX_IMAGE_PIXELS.
+        ValueError: when the file is not a supported image.
+    Returns:
+        io.BytesIO: The encoded variant.
+    """
+    image, source_format = _open_image(file)
+    width = min(width, image.width)
+    height = max(round(image.height * width / image.width), 1)
+    if source_format == 'JPEG':
+        image.draft('RGB', (int(width * REDUCING_GAP), int(height * REDUCING_GAP)))
+
+    image_format = image_format.upper()
+    mode = 'RGBA' if image_format == 'WEBP' and image.has_transparency_data else 'RGB'
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert(mode)     # palette and CMYK images can't be resampled as they are
+    variant = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP).convert(mode)
+
+    buffer = io.BytesIO()
+    variant.save(buffer, format=image_format, quality=80)
+    buffer.seek(0)
+    return buffer
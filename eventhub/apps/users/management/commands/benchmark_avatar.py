@@ -0,0 +1,123 @@
+import io
+import multiprocessing
+import multiprocessing.forkserver
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from users.imaging import IMAGE_SIGNATURES, make_thumbnail
+
+PIPELINES = ['legacy', 'pipeline']
+
+
+def _legacy_thumbnail(file, size):
+    """Avatar processing before the single-decode pipeline (reference for the benchmark)."""
+    Image.open(file).format         # format validation opened the image separately
+    file.seek(0)
+    image = Image.open(file)
+    image_format = image.format
+
+    width, height = image.size
+    side = min(width, height)
+    left, top = (width - side) // 2, (height - side) // 2
+    image = image.crop((left, top, left + side, top + side))
+    image = image.resize(size, Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024      # bytes on macOS, KiB on Linux
+
+
+def _measure(path, pipeline, size, repeat):
+    """
+    Run one pipeline in a fresh process (peak RSS is per process and never decreases).
+
+    Returns:
+        tuple: (peak RSS before processing in MB, peak RSS after in MB, median latency in ms).
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    baseline = _peak_rss_mb()
+
+    timings = []
+    for _ in range(repeat):
+        file = io.BytesIO(data)
+        started = time.perf_counter()
+        if pipeline == 'legacy':
+            _legacy_thumbnail(file, size)
+        else:
+            make_thumbnail(file, size)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return baseline, _peak_rss_mb(), statistics.median(timings)
+
+
+def _sample_image(width, height):
+    """Returns: PIL.Image - synthetic photo-like RGB image (smooth areas, edges and noise)."""
+    red = Image.effect_mandelbrot((width, height), (-2.0, -1.5, 1.0, 1.5), 64)
+    green = Image.linear_gradient('L').resize((width, height))
+    blue = Image.effect_noise((width, height), 48)
+    return Image.merge('RGB', (red, green, blue))
+
+
+class Command(BaseCommand):
+    help = "Compare peak memory (RSS) and latency of the avatar processing pipeline against the legacy path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=4000, help="Width of generated sample images.")
+        parser.add_argument('--height', type=int, default=3000, help="Height of generated sample images.")
+        parser.add_argument(
+            '--formats', nargs='+', default=list(IMAGE_SIGNATURES), choices=list(IMAGE_SIGNATURES),
+            help="Formats of generated sample images."
+        )
+        parser.add_argument('--file', action='append', default=[], help="Benchmark this image file (repeatable).")
+        parser.add_argument('--size', type=int, default=300, help="Edge of the square avatar in pixels.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per image and pipeline.")
+
+    def handle(self, *args, **options):
+        if min(options['repeat'], options['size'], options['width'], options['height']) < 1:
+            raise CommandError("--repeat, --size, --width and --height must be positive.")
+
+        size = (options['size'], options['size'])
+
+        # a fresh process per measurement, forked from a server started before the sample images
+        # are generated (peak RSS of a child starts at the peak RSS of its parent)
+        context = multiprocessing.get_context('forkserver')
+        multiprocessing.forkserver.ensure_running()
+
+        with tempfile.TemporaryDirectory() as directory:
+            samples = [(os.path.basename(path), path) for path in options['file']]
+            if not samples:
+                image = _sample_image(options['width'], options['height'])
+                for image_format in options['formats']:
+                    path = os.path.join(directory, f"sample.{image_format.lower()}")
+                    image.save(path, format=image_format)
+                    samples.append((f"{image_format} {options['width']}x{options['height']}", path))
+
+            self.stdout.write(
+                f"{'image':<24}{'size':>9}{'pipeline':>10}{'peak RSS':>12}{'+decode':>11}{'latency':>12}"
+            )
+            for label, path in samples:
+                size_mb = os.path.getsize(path) / 1024 / 1024
+                for pipeline in PIPELINES:
+                    with context.Pool(1) as pool:
+                        try:
+                            baseline, peak, latency = pool.apply(_measure, (path, pipeline, size, options['repeat']))
+                        except Exception as e:
+                            self.stdout.write(self.style.ERROR(f"{label:<24}{pipeline:>10} failed: {e}"))
+                            continue
+                    self.stdout.write(
+                        f"{label:<24}{size_mb:>7.1f}MB{pipeline:>10}{peak:>10.1f}MB{peak - baseline:>9.1f}MB"
+                        f"{latency:>10.1f}ms"
+                    )
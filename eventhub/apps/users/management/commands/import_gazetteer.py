@@ -0,0 +1,109 @@
+import csv
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from users.geocoding import normalize_place_name
+from users.models import GazetteerPlace
+
+# columns of GeoNames dump (https://download.geonames.org/export/dump/readme.txt)
+GEONAMES_NAME = 1
+GEONAMES_LATITUDE = 4
+GEONAMES_LONGITUDE = 5
+GEONAMES_COUNTRY = 8
+GEONAMES_POPULATION = 14
+
+
+def _open(path):
+    """Open plain or gzipped text file for streaming."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _geonames_rows(file):
+    """Yield (name, display_name, latitude, longitude, population) from tab separated GeoNames dump."""
+    csv.field_size_limit(sys.maxsize)       # alternate names column can be huge
+    for row in csv.reader(file, delimiter='\t', quoting=csv.QUOTE_NONE):
+        if len(row) <= GEONAMES_POPULATION:
+            continue
+        name = row[GEONAMES_NAME]
+        country = row[GEONAMES_COUNTRY]
+        display_name = f"{name}, {country}" if country else name
+        yield name, display_name, row[GEONAMES_LATITUDE], row[GEONAMES_LONGITUDE], row[GEONAMES_POPULATION] or 0
+
+
+def _csv_rows(file):
+    """Yield (name, display_name, latitude, longitude, population) from CSV with a header row (OSM extract)."""
+    for row in csv.DictReader(file):
+        name = row['name']
+        yield name, row.get('display_name') or name, row['latitude'], row['longitude'], row.get('population') or 0
+
+
+class Command(BaseCommand):
+    help = "Stream a gazetteer dump (GeoNames or CSV) into the local gazetteer table used by offline geocoding."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to the dump (.txt/.csv, optionally .gz).")
+        parser.add_argument(
+            '--format', choices=['geonames', 'csv'], default='geonames',
+            help="geonames: tab separated GeoNames dump; csv: header with name, display_name, latitude, longitude, "
+                 "population columns."
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help="Places inserted per transaction.")
+        parser.add_argument('--replace', action='store_true', help="Delete previously imported places first.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        if options['replace']:
+            GazetteerPlace.objects.all().delete()
+
+        read_rows = _geonames_rows if options['format'] == 'geonames' else _csv_rows
+        started = time.monotonic()
+        imported = skipped = 0
+        batch = []
+
+        try:
+            with _open(options['path']) as file:
+                for name, display_name, latitude, longitude, population in read_rows(file):
+                    try:
+                        place = GazetteerPlace(
+                            name=name[:200],
+                            normalized_name=normalize_place_name(name),
+                            display_name=display_name[:255],
+                            latitude=float(latitude),
+                            longitude=float(longitude),
+                            population=int(population),
+                        )
+                    except (ValueError, TypeError):
+                        skipped += 1
+                        continue
+
+                    batch.append(place)
+                    if len(batch) >= batch_size:
+                        imported += self._insert(batch)
+                        batch = []
+                        self.stdout.write(f"Imported {imported} places...")
+        except (OSError, KeyError) as e:
+            raise CommandError(f"Failed to read gazetteer dump: {e}")
+
+        imported += self._insert(batch)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Gazetteer imported: {imported} places ({skipped} skipped) in {elapsed:.2f}s "
+            f"({imported / max(elapsed, 1e-9):.0f} rows/s)."
+        ))
+
+    @staticmethod
+    def _insert(batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            GazetteerPlace.objects.bulk_create(batch)
+        return len(batch)
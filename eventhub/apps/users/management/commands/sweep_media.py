@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.media import reconcile_media, sweep_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete released media files from the storage in batches (run periodically, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.MEDIA_GC['BATCH_SIZE'],
+            help="Files deleted per storage request."
+        )
+        parser.add_argument(
+            '--reconcile', action='store_true',
+            help="First list remote files and schedule the ones no avatar or event image references."
+        )
+        parser.add_argument('--poll-interval', type=float, default=60.0, help="Seconds to sleep when nothing is due.")
+        parser.add_argument('--once', action='store_true', help="Delete due files and exit instead of polling.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        if options['reconcile']:
+            listed, orphaned = reconcile_media()
+            self.stdout.write(f"Reconciled {listed} remote files: {orphaned} orphans scheduled for deletion.")
+
+        while True:
+            deleted, kept, postponed = sweep_tombstones(options['batch_size'])
+            if deleted or kept or postponed:
+                self.stdout.write(
+                    f"Deleted {deleted} files ({kept} kept as referenced again, {postponed} postponed after a failure)."
+                )
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,240 @@
+import hashlib
+import os
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import MediaBlob, MediaTombstone
+from .storage import get_media_storage
+from .uploads import open_upload_source
+
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_AVATAR_PATH = os.path.join(settings.APP_ROOT, 'static/img/avatar.jpg')
+
+# responsive image variants: widths ladder (up to 2x of the 400px card) and formats, preferred first
+IMAGE_VARIANT_WIDTHS = (320, 480, 640, 800)
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+
+# (app label, model, url field) of rows referring to stored files; a referenced file is never deleted
+MEDIA_REFERENCES = [
+    ('users', 'Profile', 'avatar'),
+    ('users', 'MediaBlob', 'url'),
+    ('core', 'EventImage', 'image_url'),
+]
+
+
+def content_digest(source, name=None):
+    """
+    Hash the content of an upload source.
+
+    Returns:
+        tuple: (hex SHA-256 digest, size in bytes).
+    """
+    digest = hashlib.sha256()
+    with open_upload_source(source, name) as (file, size):
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest(), size
+
+
+def store_media(source, name=None, pinned=False):
+    """
+    Store a file once per content: identical content reuses the stored file and gains a reference.
+
+    Args:
+        source: Local path, file-like object or bytes-like buffer (see users.uploads.open_upload_source).
+        name (str): File name, optional.
+        pinned (bool): Never delete the file (shared files, references are not counted).
+    Returns:
+        str: URL of the stored file.
+    """
+    sha256, size = content_digest(source, name)
+    references = 0 if pinned else 1
+
+    blob = MediaBlob.objects.filter(sha256=sha256).first()
+    # the row may be released and deleted in between, so the reference is added conditionally
+    changes = {'ref_count': F('ref_count') + references}
+    if pinned:
+        changes['pinned'] = True
+    if blob is not None and MediaBlob.objects.filter(pk=blob.pk).update(**changes):
+        return blob.url
+
+    url = get_media_storage().upload(source, name)
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(sha256=sha256, url=url, size=size, ref_count=references, pinned=pinned)
+    except IntegrityError:
+        # the same content was stored concurrently, keep that file
+        get_media_storage().delete(url)
+        return store_media(source, name, pinned)
+    return url
+
+
+def release_media(urls):
+    """
+    Drop one reference per url and schedule files that are no longer referenced for deletion.
+
+    Pinned files are never deleted; urls not tracked by MediaBlob (uploaded before
+    deduplication) are scheduled right away. Files are deleted later, in batches,
+    by sweep_tombstones (manage.py sweep_media), so releasing costs no storage request.
+
+    Args:
+        urls (iterable): URLs of the released files (a url may repeat).
+    Returns:
+        list: URLs scheduled for deletion.
+    """
+    counts = Counter(url for url in urls if url)
+    if not counts:
+        return []
+
+    with transaction.atomic():
+        tracked = set(MediaBlob.objects.filter(url__in=counts).values_list('url', flat=True))
+
+        # one UPDATE per distinct number of released references (usually one)
+        by_count = {}
+        for url in tracked:
+            by_count.setdefault(counts[url], []).append(url)
+        for count, count_urls in by_count.items():
+            MediaBlob.objects.filter(url__in=count_urls).update(ref_count=Greatest(F('ref_count') - count, 0))
+
+        orphans = MediaBlob.objects.filter(url__in=tracked, ref_count=0, pinned=False)
+        released = list(orphans.values_list('url', flat=True))
+        orphans.delete()
+
+        released += [url for url in counts if url not in tracked]
+        schedule_deletion(released)
+    return released
+
+
+def schedule_deletion(urls):
+    """Record tombstones of the files (in the current transaction), already scheduled files are skipped."""
+    MediaTombstone.objects.bulk_create([MediaTombstone(url=url) for url in urls], ignore_conflicts=True)
+
+
+def referenced_urls(urls):
+    """Returns: set - those of the urls that are still referenced by a model row (see MEDIA_REFERENCES)."""
+    referenced = set()
+    for app_label, model_name, field in MEDIA_REFERENCES:
+        model = apps.get_model(app_label, model_name)
+        referenced.update(model.objects.filter(**{f"{field}__in": urls}).values_list(field, flat=True))
+    return referenced
+
+
+def sweep_tombstones(batch_size=None):
+    """
+    Delete one batch of due tombstoned files from the storage in one request.
+
+    Files referenced again (e.g. restored rows) are not deleted. When the storage request
+    fails, the batch is retried with exponential backoff up to MEDIA_GC['MAX_ATTEMPTS'] attempts.
+
+    Returns:
+        tuple: (number of deleted files, number of files kept as referenced again,
+            number of files postponed after a failure).
+    """
+    config = settings.MEDIA_GC
+    batch_size = batch_size or config['BATCH_SIZE']
+    now = timezone.now()
+
+    tombstones = list(MediaTombstone.objects.filter(
+        attempts__lt=config['MAX_ATTEMPTS'], next_attempt_at__lte=now
+    ).order_by('next_attempt_at')[:batch_size])
+    if not tombstones:
+        return 0, 0, 0
+
+    urls = [tombstone.url for tombstone in tombstones]
+    referenced = referenced_urls(urls)
+    deletable = [url for url in urls if url not in referenced]
+
+    try:
+        get_media_storage().delete_many(deletable)
+    except Exception as e:
+        for tombstone in tombstones:
+            tombstone.attempts += 1
+            tombstone.last_error = str(e)
+            backoff = config['RETRY_BACKOFF'] * 2 ** (tombstone.attempts - 1)
+            tombstone.next_attempt_at = now + timedelta(seconds=backoff)
+        MediaTombstone.objects.bulk_update(tombstones, ['attempts', 'last_error', 'next_attempt_at'])
+        return 0, 0, len(tombstones)
+
+    MediaTombstone.objects.filter(pk__in=[tombstone.pk for tombstone in tombstones]).delete()
+    return len(deletable), len(urls) - len(deletable), 0
+
+
+def reconcile_media(chunk_size=500):
+    """
+    Tombstone remote files that no model row references (leaked by crashes or code paths that bypass release_media).
+
+    Files uploaded less than MEDIA_GC['ORPHAN_GRACE'] seconds ago are skipped, as their
+    rows may not be committed yet.
+
+    Returns:
+        tuple: (number of listed remote files, number of tombstoned orphans).
+    """
+    grace_start = timezone.now() - timedelta(seconds=settings.MEDIA_GC['ORPHAN_GRACE'])
+    listed = orphaned = 0
+    chunk = []
+
+    def flush(chunk):
+        orphans = set(chunk) - referenced_urls(chunk)
+        schedule_deletion(sorted(orphans))
+        return len(orphans)
+
+    for url, uploaded_at in get_media_storage().list_files():
+        listed += 1
+        if uploaded_at is not None and uploaded_at > grace_start:
+            continue
+        chunk.append(url)
+        if len(chunk) >= chunk_size:
+            orphaned += flush(chunk)
+            chunk = []
+
+    if chunk:
+        orphaned += flush(chunk)
+    return listed, orphaned
+
+
+def build_image_variants(url, source_width=None):
+    """
+    Build urls of resized variants of a stored image for responsive markup (srcset).
+
+    Args:
+        url (str): URL of the stored image.
+        source_width (int): Width of the original, wider variants are skipped (no upscaling); optional.
+    Returns:
+        dict: Format -> list of [width, url] pairs in ascending width, e.g. {'webp': [[320, '...'], ...]}.
+    """
+    widths = [width for width in IMAGE_VARIANT_WIDTHS if source_width is None or width <= source_width]
+    if not widths:
+        widths = [source_width]
+
+    storage = get_media_storage()
+    return {
+        image_format: [[width, storage.variant_url(url, width, image_format)] for width in widths]
+        for image_format in IMAGE_VARIANT_FORMATS
+    }
+
+
+_default_avatar_url = None
+_default_avatar_lock = threading.Lock()
+
+
+def get_default_avatar_url():
+    """
+    Returns: str - URL of the default avatar.
+
+    The image is uploaded once (pinned MediaBlob) and its url is then cached in process,
+    so assigning the default avatar makes no uploads.
+    """
+    global _default_avatar_url
+    if _default_avatar_url is None:
+        with _default_avatar_lock:
+            if _default_avatar_url is None:
+                _default_avatar_url = store_media(DEFAULT_AVATAR_PATH, pinned=True)
+    return _default_avatar_url
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_geocode_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GazetteerPlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200)),
+                ('display_name', models.CharField(max_length=255)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('population', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['normalized_name', '-population'], name='gazetteer_name_idx')],
+            },
+        ),
+    ]
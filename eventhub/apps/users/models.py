@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 
 class ProfileManager(BaseUserManager):
@@ -50,6 +51,9 @@ class Profile(AbstractBaseUser, PermissionsMixin):
     Attributes:
         email (EmailField): Unique email used for authentication.
         full_name (CharField): User's full name.
+        location (str): Location of the user, optional.
+        latitude (float): Latitude of the location, optional.
+        longitude (float): Longitude of the location, optional.
         is_active (bool): Account activation status.
         is_staff (bool): Admin site access status.
     """
@@ -59,6 +63,8 @@ class Profile(AbstractBaseUser, PermissionsMixin):
     full_name = models.CharField(max_length=100)
     phone = models.CharField(max_length=20, blank=True, null=True)
     location = models.CharField(max_length=255, blank=True, null=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     
@@ -76,3 +82,108 @@ class Profile(AbstractBaseUser, PermissionsMixin):
     def get_short_name(self):
         """Returns: first name (before space) or defaults to full name if no space."""
         return self.full_name.split()[0]
+
+
+class GeocodeCache(models.Model):
+    """
+    Persistent cache of geocoded locations (second tier behind the in-process cache).
+
+    Attributes:
+        query (str): Normalized location query (unique).
+        found (bool): Whether the location was found (False entries are negative cache).
+        display_name (str): Full display name of the location, empty if not found.
+        latitude (float): Latitude of the location, empty if not found.
+        longitude (float): Longitude of the location, empty if not found.
+        updated_at (datetime): When the location was geocoded (used for expiration).
+    """
+
+    query = models.CharField(max_length=255, unique=True)
+    found = models.BooleanField()
+    display_name = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.query
+
+
+class GazetteerPlace(models.Model):
+    """
+    A place of the offline gazetteer (imported from GeoNames/OSM extract) used for local geocoding.
+
+    Attributes:
+        name (str): Name of the place.
+        normalized_name (str): Name normalized for lookups (case folded, without accents and punctuation).
+        display_name (str): Full display name of the place.
+        latitude (float): Latitude of the place.
+        longitude (float): Longitude of the place.
+        population (int): Population of the place (ranks places with the same name).
+    """
+
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200)
+    display_name = models.CharField(max_length=255)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    population = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # exact and prefix lookups, most populated place first
+            models.Index(fields=['normalized_name', '-population'], name='gazetteer_name_idx'),
+        ]
+
+    def __str__(self):
+        return self.display_name
+
+
+class MediaBlob(models.Model):
+    """
+    Uploaded media file addressed by its content (deduplicates uploads of identical files).
+
+    Attributes:
+        sha256 (str): Hex SHA-256 digest of the file content (unique).
+        url (str): URL of the stored file (see users.storage).
+        size (int): File size in bytes.
+        ref_count (int): Number of references (avatars, event images) to the file.
+        pinned (bool): Shared file (e.g. the default avatar) that is never deleted.
+        created_at (datetime): When the file was uploaded.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    url = models.URLField(unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    pinned = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.url
+
+
+class MediaTombstone(models.Model):
+    """
+    Media file waiting for deletion from the storage (deleted in batches by manage.py sweep_media).
+
+    Attributes:
+        url (str): URL of the file (unique).
+        attempts (int): Number of failed deletion attempts.
+        next_attempt_at (datetime): When the deletion is due.
+        last_error (str): Error of the last failed attempt.
+        created_at (datetime): When the file was released.
+    """
+
+    url = models.URLField(unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['attempts', 'next_attempt_at'], name='tombstone_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.url
@@ -0,0 +1,190 @@
+import os
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from .imaging import make_variant
+from .uploads import open_upload_source
+
+VARIANTS_DIR = 'variants'
+
+
+class MediaStorage:
+    """
+    Interface of media (image) storage backends.
+
+    Files are addressed by their public url; every url ends with "/<file id>/"
+    (optionally followed by a file name), e.g. https://cdn.domain/UUID/.
+    """
+
+    def upload(self, source, name=None):
+        """
+        Store a file.
+
+        Args:
+            source: Local path, file-like object or bytes-like buffer (see users.uploads.open_upload_source).
+            name (str): File name, optional.
+        Returns:
+            str: URL by which the stored file can be accessed.
+        """
+        raise NotImplementedError
+
+    def delete(self, url):
+        """Delete the file stored under the url."""
+        self.delete_many([url])
+
+    def delete_many(self, urls):
+        """Delete files stored under the urls in as few requests as the backend allows."""
+        raise NotImplementedError
+
+    def list_files(self):
+        """Returns: iterator of (url, upload datetime or None) of all stored files (originals, not variants)."""
+        raise NotImplementedError
+
+    def variant_url(self, url, width, image_format):
+        """
+        URL of the stored image resized to width (keeping aspect ratio) and encoded as image_format.
+
+        Args:
+            url (str): URL of the stored image.
+            width (int): Width of the variant in pixels.
+            image_format (str): 'webp' or 'jpeg'.
+        Returns:
+            str: URL of the variant.
+        """
+        raise NotImplementedError
+
+    def file_id(self, url):
+        """Returns: str - id of the file stored under the url."""
+        return url.strip('/').split('/')[-1]
+
+
+class UploadcareStorage(MediaStorage):
+    """
+    Uploadcare cloud storage served by its CDN.
+
+    The API client is created on first use, so importing the backend needs neither keys nor network.
+
+    Args:
+        public_key (str): Uploadcare public key.
+        secret_key (str): Uploadcare secret key.
+        cdn_domain (str): Base url of the CDN (without trailing slash).
+    """
+
+    def __init__(self, public_key, secret_key, cdn_domain):
+        self.public_key = public_key
+        self.secret_key = secret_key
+        self.cdn_domain = cdn_domain
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from pyuploadcare import Uploadcare
+                    self._client = Uploadcare(public_key=self.public_key, secret_key=self.secret_key)
+        return self._client
+
+    def upload(self, source, name=None):
+        with open_upload_source(source, name) as (file, size):
+            ucare_file = self.client.upload(file, size=size)
+        return f"{self.cdn_domain}/{ucare_file.uuid}/"
+
+    def delete(self, url):
+        self.client.file(self.file_id(url)).delete()
+
+    def delete_many(self, urls):
+        # batch delete endpoint, the client splits uuids into chunks of the API limit (100 per request)
+        uuids = [self.file_id(url) for url in urls]
+        if uuids:
+            self.client.delete_files(uuids)
+
+    def list_files(self):
+        # the listing pages carry file info, no request per file
+        for ucare_file in self.client.list_files(stored=True, removed=False):
+            uploaded_at = ucare_file.datetime_uploaded
+            if isinstance(uploaded_at, str):
+                uploaded_at = parse_datetime(uploaded_at)
+            yield f"{self.cdn_domain}/{ucare_file.uuid}/", uploaded_at
+
+    def variant_url(self, url, width, image_format):
+        # processed on the fly and cached by the CDN (URL API image transformations)
+        return f"{self.cdn_domain}/{self.file_id(url)}/-/resize/{width}x/-/format/{image_format}/-/quality/smart/"
+
+
+class LocalMediaStorage(MediaStorage):
+    """
+    Local filesystem stand-in for the cloud storage (development, benchmarks and load tests).
+
+    Files are stored as <location>/<file id>/<name> and served over HTTP under base_url
+    (by the development server when DEBUG is on, see eventhub/urls.py). Image variants
+    are rendered when requested and stored next to the original, in <file id>/variants/.
+
+    Args:
+        location (str): Directory of stored files.
+        base_url (str): URL prefix of stored files (with trailing slash).
+    """
+
+    def __init__(self, location, base_url):
+        self.storage = FileSystemStorage(location=location, base_url=base_url)
+
+    def upload(self, source, name=None):
+        file_id = uuid.uuid4().hex
+        with open_upload_source(source, name) as (file, _):
+            name = os.path.basename(name or getattr(file, 'name', None) or 'upload')
+            path = self.storage.save(f"{file_id}/{name}", file)
+        return self.storage.url(path)
+
+    def file_id(self, url):
+        return url[len(self.storage.base_url):].split('/')[0]
+
+    def delete_many(self, urls):
+        for url in urls:
+            file_id = self.file_id(url)
+            if not file_id or not self.storage.exists(file_id):
+                continue
+            for directory in [f"{file_id}/{VARIANTS_DIR}", file_id]:
+                if not self.storage.exists(directory):
+                    continue
+                for name in self.storage.listdir(directory)[1]:
+                    self.storage.delete(f"{directory}/{name}")
+                self.storage.delete(directory)      # the directory is empty now
+
+    def list_files(self):
+        if not self.storage.exists(''):
+            return
+        for file_id in self.storage.listdir('')[0]:
+            for name in self.storage.listdir(file_id)[1]:
+                path = f"{file_id}/{name}"
+                yield self.storage.url(path), self.storage.get_modified_time(path)
+
+    def variant_url(self, url, width, image_format):
+        file_id = self.file_id(url)
+        name = f"{file_id}/{VARIANTS_DIR}/{width}.{image_format}"
+        if not self.storage.exists(name):
+            original = self.storage.listdir(file_id)[1][0]
+            with self.storage.open(f"{file_id}/{original}") as file:
+                buffer = make_variant(file, width, image_format)
+            self.storage.save(name, buffer)
+        return self.storage.url(name)
+
+
+_media_storage = None
+_media_storage_lock = threading.Lock()
+
+
+def get_media_storage():
+    """Returns: MediaStorage - process-wide backend configured by settings.MEDIA_STORAGE (created on first use)."""
+    global _media_storage
+    if _media_storage is None:
+        with _media_storage_lock:
+            if _media_storage is None:
+                config = settings.MEDIA_STORAGE
+                _media_storage = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return _media_storage
@@ -0,0 +1,212 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import geocoding, media
+from .geocoding import GeocoderClient, Place
+from .media import get_default_avatar_url, release_media, store_media, sweep_tombstones
+from .models import MediaBlob, MediaTombstone, Profile
+from .storage import LocalMediaStorage, get_media_storage
+
+
+class LocalMediaTestCase(TestCase):
+    """Media stored by LocalMediaStorage in a temporary directory (a fresh backend and default avatar per test)."""
+
+    def setUp(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        storage_settings = override_settings(MEDIA_STORAGE={
+            'BACKEND': 'users.storage.LocalMediaStorage',
+            'OPTIONS': {'location': location.name, 'base_url': 'http://testserver/media/'},
+        })
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        for target in ['users.storage._media_storage', 'users.media._default_avatar_url']:
+            patcher = mock.patch(target, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.storage = get_media_storage()
+        self.assertIsInstance(self.storage, LocalMediaStorage)
+
+    def stored_urls(self):
+        """Returns: set - urls of the files in the storage."""
+        return {url for url, _ in self.storage.list_files()}
+
+    def ref_count(self, url):
+        return MediaBlob.objects.get(url=url).ref_count
+
+
+class MediaReferencesTest(LocalMediaTestCase):
+    """Reference counting of deduplicated media: a file is released when its last reference is."""
+
+    def test_identical_content_is_stored_once(self):
+        first = store_media(b'same image', 'a.jpg')
+        second = store_media(bytearray(b'same image'), 'b.jpg')
+        other = store_media(b'other image', 'a.jpg')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(self.stored_urls(), {first, other})
+        self.assertEqual(self.ref_count(first), 2)
+        self.assertEqual(self.ref_count(other), 1)
+
+    def test_release_keeps_files_until_the_last_reference(self):
+        url = store_media(b'image', 'a.jpg')
+        store_media(b'image', 'a.jpg')
+        store_media(b'image', 'a.jpg')
+
+        self.assertEqual(release_media([url]), [])
+        self.assertEqual(self.ref_count(url), 2)
+        self.assertFalse(MediaTombstone.objects.exists())
+
+        # repeated urls drop one reference each
+        self.assertEqual(release_media([url, url, '', None]), [url])
+        self.assertFalse(MediaBlob.objects.filter(url=url).exists())
+        self.assertEqual(list(MediaTombstone.objects.values_list('url', flat=True)), [url])
+        self.assertIn(url, self.stored_urls())     # deleted by the sweeper only
+
+    def test_over_release_never_goes_negative(self):
+        url = store_media(b'image', 'a.jpg')
+        kept = store_media(b'kept image', 'b.jpg')
+        store_media(b'kept image', 'b.jpg')
+
+        self.assertEqual(sorted(release_media([url, url, kept])), [url])
+        self.assertEqual(self.ref_count(kept), 1)
+        self.assertEqual(release_media([url]), [url])      # untracked now, already scheduled
+        self.assertEqual(MediaTombstone.objects.filter(url=url).count(), 1)
+
+    def test_untracked_urls_are_scheduled_right_away(self):
+        legacy = 'http://testserver/media/legacy/'
+        self.assertEqual(release_media([legacy]), [legacy])
+        self.assertTrue(MediaTombstone.objects.filter(url=legacy).exists())
+
+    def test_content_stored_again_after_release_gets_a_new_file(self):
+        url = store_media(b'image', 'a.jpg')
+        release_media([url])
+        again = store_media(b'image', 'a.jpg')
+
+        self.assertNotEqual(again, url)
+        self.assertEqual(self.ref_count(again), 1)
+        self.assertEqual(sweep_tombstones(), (1, 0, 0))
+        self.assertEqual(self.stored_urls(), {again})
+
+
+class DefaultAvatarTest(LocalMediaTestCase):
+    """The default avatar is uploaded once, pinned, and never released."""
+
+    def test_uploaded_once_and_cached(self):
+        with mock.patch.object(self.storage, 'upload', wraps=self.storage.upload) as upload:
+            url = get_default_avatar_url()
+            self.assertEqual(get_default_avatar_url(), url)
+            # a new process (empty url cache) reuses the stored file
+            with mock.patch('users.media._default_avatar_url', None):
+                self.assertEqual(get_default_avatar_url(), url)
+        self.assertEqual(upload.call_count, 1)
+
+        blob = MediaBlob.objects.get(url=url)
+        self.assertTrue(blob.pinned)
+        self.assertEqual(blob.ref_count, 0)
+
+    def test_pinned_avatar_is_never_released(self):
+        url = get_default_avatar_url()
+        # an upload of the same picture shares the pinned file
+        with open(media.DEFAULT_AVATAR_PATH, 'rb') as file:
+            self.assertEqual(store_media(file.read(), 'avatar.jpg'), url)
+        self.assertEqual(self.ref_count(url), 1)
+
+        self.assertEqual(release_media([url, url, url]), [])
+        self.assertEqual(self.ref_count(url), 0)
+        self.assertTrue(MediaBlob.objects.get(url=url).pinned)
+        self.assertFalse(MediaTombstone.objects.exists())
+        self.assertIn(url, self.stored_urls())
+
+
+@override_settings(MEDIA_GC={'BATCH_SIZE': 2, 'MAX_ATTEMPTS': 3, 'RETRY_BACKOFF': 60, 'ORPHAN_GRACE': 0})
+class TombstoneSweeperTest(LocalMediaTestCase):
+    """Released files are deleted in batches, retried with backoff and kept when referenced again."""
+
+    def release(self, *contents):
+        """Returns: list - urls of stored and then released files."""
+        urls = [store_media(content, 'image.jpg') for content in contents]
+        release_media(urls)
+        return urls
+
+    def make_due(self):
+        MediaTombstone.objects.update(next_attempt_at=timezone.now())
+
+    def test_batches(self):
+        urls = self.release(b'one', b'two', b'three')
+        self.assertEqual(sweep_tombstones(), (2, 0, 0))
+        self.assertEqual(sweep_tombstones(), (1, 0, 0))
+        self.assertEqual(sweep_tombstones(), (0, 0, 0))
+        self.assertFalse(self.stored_urls() & set(urls))
+        self.assertFalse(MediaTombstone.objects.exists())
+
+    def test_failed_batch_is_retried_with_backoff(self):
+        url, = self.release(b'image')
+        with mock.patch.object(self.storage, 'delete_many', side_effect=OSError("Storage unavailable")):
+            self.assertEqual(sweep_tombstones(), (0, 0, 1))
+
+        tombstone = MediaTombstone.objects.get(url=url)
+        self.assertEqual((tombstone.attempts, tombstone.last_error), (1, "Storage unavailable"))
+        self.assertGreater(tombstone.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(sweep_tombstones(), (0, 0, 0))     # not due yet
+        self.assertIn(url, self.stored_urls())
+
+        self.make_due()
+        with mock.patch.object(self.storage, 'delete_many', side_effect=OSError("Storage unavailable")):
+            self.assertEqual(sweep_tombstones(), (0, 0, 1))
+        tombstone.refresh_from_db()
+        self.assertEqual(tombstone.attempts, 2)
+        self.assertGreater(tombstone.next_attempt_at, timezone.now() + timedelta(seconds=110))   # doubled
+
+        self.make_due()
+        self.assertEqual(sweep_tombstones(), (1, 0, 0))
+        self.assertNotIn(url, self.stored_urls())
+        self.assertFalse(MediaTombstone.objects.exists())
+
+    def test_exhausted_tombstones_are_kept_for_inspection(self):
+        url, = self.release(b'image')
+        MediaTombstone.objects.update(attempts=3)
+        self.assertEqual(sweep_tombstones(), (0, 0, 0))
+        self.assertTrue(MediaTombstone.objects.filter(url=url).exists())
+        self.assertIn(url, self.stored_urls())
+
+    def test_files_referenced_again_are_kept(self):
+        kept, deleted = self.release(b'avatar', b'image')
+        Profile.objects.create_user(email='user@example.com', full_name='User', avatar=kept)
+
+        self.assertEqual(sweep_tombstones(), (1, 1, 0))
+        self.assertEqual(self.stored_urls(), {kept})
+        self.assertFalse(MediaTombstone.objects.exists())
+        self.assertNotIn(deleted, self.stored_urls())
+
+
+class GeocoderMemoryCacheTest(TestCase):
+    """In-process tier of the geocoder cache keeps "not found" results for a short time only."""
+
+    def test_not_found_expires_before_found(self):
+        backend = mock.Mock(rate_limited=False)
+        backend.search.side_effect = lambda location: Place(location, 1.0, 2.0) if location == 'Paris' else None
+        client = GeocoderClient(backend, cache_ttl=3600, not_found_ttl=60)
+        clock = [1000.0]
+
+        # the database tier always misses, so every in-process miss reaches the backend
+        with mock.patch('users.geocoding.time.monotonic', lambda: clock[0]), \
+                mock.patch('users.geocoding._read_db_cache', return_value=geocoding._MISSING), \
+                mock.patch('users.geocoding._write_db_cache'):
+            self.assertEqual(client.geocode('Paris'), Place('Paris', 1.0, 2.0))
+            self.assertIsNone(client.geocode('Atlantis'))
+            clock[0] += 30
+            client.geocode('Paris')
+            client.geocode('Atlantis')
+            self.assertEqual(backend.search.call_count, 2)
+
+            clock[0] += 60
+            client.geocode('Paris')
+            client.geocode('Atlantis')
+            searched = [call.args[0] for call in backend.search.call_args_list]
+            self.assertEqual(searched, ['Paris', 'Atlantis', 'Atlantis'])
@@ -0,0 +1,109 @@
+import io
+import os
+from contextlib import contextmanager
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over a bytes-like buffer (bytes, bytearray, memoryview, mmap).
+
+    Reads slice a memoryview of the buffer, so wrapping the buffer does not copy it.
+
+    Args:
+        buffer: Bytes-like object to read from.
+        name (str): File name reported to uploaders.
+    """
+
+    def __init__(self, buffer, name='upload'):
+        super().__init__()
+        self._view = memoryview(buffer).cast('B')
+        self._position = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        size = min(len(b), len(self._view) - self._position)
+        if size <= 0:
+            return 0
+        b[:size] = self._view[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def tell(self):
+        return self._position
+
+    def __len__(self):
+        return len(self._view)
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def _stream_size(file):
+    """Returns: int - number of bytes from the current position of a seekable stream to its end."""
+    position = file.tell()
+    size = file.seek(0, io.SEEK_END) - position
+    file.seek(position)
+    return size
+
+
+@contextmanager
+def open_upload_source(source, name=None):
+    """
+    Open an upload source as a readable file object with a known size, without spooling it to disk.
+
+    Supported sources:
+        - local file path (str or PathLike): opened for streaming reads;
+        - bytes, bytearray, memoryview: read in place;
+        - io.BytesIO: its buffer is read in place;
+        - Django UploadedFile (in memory or temporary file) and other file objects: streamed as they are.
+
+    Args:
+        source: The upload source.
+        name (str): File name reported to uploaders, optional (defaults to the name of the source).
+    Yields:
+        tuple: (file object positioned at the start of the content, size in bytes).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            yield file, os.fstat(file.fileno()).st_size
+        return
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        with BufferReader(source, name=name or 'upload') as reader:
+            yield reader, len(reader)
+        return
+
+    # Django uploaded files wrap the actual file object (BytesIO or a named temporary file)
+    file = getattr(source, 'file', source)
+    name = name or os.path.basename(getattr(source, 'name', None) or 'upload')
+
+    if isinstance(file, io.BytesIO):
+        file.seek(0)
+        with BufferReader(file.getbuffer(), name=name) as reader:
+            yield reader, len(reader)
+        return
+
+    file.seek(0)
+    yield file, _stream_size(file)
@@ -1,74 +1,54 @@
-import os
-import requests
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
 from django.core.exceptions import ValidationError
-from pyuploadcare import Uploadcare
-from PIL import Image
+
+from .geocoding import geocode
+from .imaging import sniff_image_format
+from .media import get_default_avatar_url, release_media, store_media
 
 MAX_FILE_SIZE_MB = 5
 TARGET_SIZE = (300, 300)
 
-uploadcare = Uploadcare(public_key=settings.UPLOADCARE['pub_key'], secret_key=settings.UPLOADCARE['secret'])
-
 
 def is_valid_image_format(file):
     """
-    Checks that the file is in a supported image format.
+    Checks that the file is in a supported image format (from its header bytes, the image is not decoded).
 
     Returns:
         True for JPEG, PNG, GIF, or WEBP;
         False for other formats.
     """
-    ALLOWED_IMAGE_FORMATS = ['JPEG', 'PNG', 'GIF', 'WEBP']
     try:
-        image = Image.open(file)
-        return image.format in ALLOWED_IMAGE_FORMATS
+        return sniff_image_format(file) is not None
     except Exception:
         return False
 
 
-def crop_to_center(image):
-    """
-    Crop the center of the image with 1:1 ratio.
-    
-    Args: 
-        image (PIL.Image) - the original image.
-    Returns: PIL.Image - cropped square image centered within the original.
+def cloud_upload_img(source, name=None):
     """
-    try:
-        width, height = image.size
-        min_side = min(width, height)
-        left = (width - min_side) // 2
-        top = (height - min_side) // 2
-        right = left + min_side
-        bottom = top + min_side
-        return image.crop((left, top, right, bottom))
-    except Exception as e:
-        raise ValueError(f"Error cropping image: {e}")
+    Upload an image to the media storage (Uploadcare cloud storage by default, see settings.MEDIA_STORAGE).
 
-
-def cloud_upload_img(file_path):   
-    """
-    Upload a local image file to Uploadcare cloud storage.
+    The image is streamed to the uploader straight from its source
+    (no temporary copy on disk, buffers are not copied). Content that is already
+    stored is not uploaded again, its url is reused (see users.media.store_media).
 
     Args: 
-        file_path (str) - full local file path to the image.
+        source - full local file path to the image, file-like object (e.g. uploaded file)
+            or bytes-like buffer (bytes, bytearray, memoryview), see users.uploads.open_upload_source.
+        name (str) - file name of the image, optional.
     Returns:
         url(str): URL by which uploaded image can be accessed.
     """
     
     try:
-        with open(file_path, 'rb') as image_file:
-            ucare_file = uploadcare.upload(image_file)
-            return f"{settings.CDN_DOMAIN}/{ucare_file.uuid}/"
+        return store_media(source, name)
     except Exception as e:
         raise Exception(f"Failed to upload image to cloud: {e}")
 
 
 def cloud_delete_img(url):   
     """
-    Delete image from Uploadcare cloud storage based on url.
+    Release image from the media storage based on url (scheduled for deletion once
+    no avatar or event image refers to it, the default avatar is kept).
     
     Arg: 
         url (str): access link to image ( https://cdn.domain/UUID/ ).
@@ -76,64 +56,87 @@ def cloud_delete_img(url):
     """
     
     try:
-        uuid = url.strip('/').split('/')[-1]
-        file = uploadcare.file(uuid)
-        file.delete()
+        release_media([url])
     except Exception as e:
         raise Exception(f"Failed to delete image from cloud: {e}")
 
 
-def set_avatar(user, file_path):
+def cloud_delete_imgs(urls):
+    """
+    Release many images from the media storage, unreferenced ones are scheduled for deletion.
+
+    Arg:
+        urls (iterable): access links to images.
+    Returns: None
+    """
+
+    try:
+        release_media(urls)
+    except Exception as e:
+        raise Exception(f"Failed to delete images from cloud: {e}")
+
+
+def set_avatar(user, source, name=None):
     """
-    Upload an image file to cloud storage and assign access link to user.
+    Upload an image to cloud storage and assign access link to user.
 
     Args:
         user (Profile): Profile (user) instance whose avatar is being updated.
-        file_path (str): Local path to the image file.
+        source: Local path to the image file, file-like object or bytes-like buffer.
+        name (str): File name of the image, optional.
     Returns: None
     """
-    user.avatar = cloud_upload_img(file_path)
+    user.avatar = cloud_upload_img(source, name)
     user.save()
 
 
 def set_default_avatar(user):
     """
-    Set the default avatar for the user.
+    Set the default avatar for the user (shared image, uploaded only once).
 
     Args: 
         user (Profile): Profile (user) instance whose avatar is being updated.
     Returns: None
     """
-    file_path = os.path.join(settings.APP_ROOT, 'static/img/avatar.jpg')
-    set_avatar(user, file_path)
+    user.avatar = get_default_avatar_url()
+    user.save()
 
 
 def set_custom_avatar(user, file, filename):
     """
-    Save the file temporarily to disk, upload it to cloud, 
-    assign new avatar to the user, and clean up the local file.
+    Upload the image to cloud straight from memory and assign new avatar to the user.
 
     Args:
         user (Profile): Profile (user) instance whose avatar is being updated.
-        file (file-like object): The image file to upload.
+        file (file-like object or bytes-like buffer): The image file to upload.
         filename (str): Original filename.
     Returns: None
     """
+    set_avatar(user, file, filename)
+
+
+def geocode_location(location):
+    """
+    Helper function that geocodes location (cached, see users.geocoding).
     
-    fs = FileSystemStorage()
-    file_path = None
+    Args:
+        location (str): Location to be geocoded.
     
+    Raises:
+        ValidationError: when location is not valid (not found) or something is wrong with the fetch.
+        
+    Returns:
+        Place: Full display name and coordinates of the first match.
+    """
     try:
-        # save the file and get the full path of it
-        filename = fs.save(filename, file)
-        file_path = fs.path(filename)
-                    
-        # upload new avatar to cloud and save to db
-        set_avatar(user, file_path)
-    finally:
-        # cleanup
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
+        place = geocode(location)
+    except Exception:
+        raise ValidationError("Failed to validate location. Try again later.")
+
+    if place is None:
+        raise ValidationError("Location not found. Please enter a valid place.")
+
+    return place
 
 
 def validate_location(location):
@@ -149,27 +152,5 @@ def validate_location(location):
     Returns:
         location (str): Location after the validation (either validated or incorrect with raised error).
     """
-    try:
-        # fetch openstreetmap to check if location exists
-        response = requests.get(
-            'https://nominatim.openstreetmap.org/search',
-            params={'q': location, 'format': 'json'},
-            headers={
-                'User-Agent': f'Eventhub/{os.getenv("APP_VERSION", "1.0")}',
-                'Accept-Language': 'en'
-            }
-        )
-        data = response.json()
-        
-        if len(data) == 0:
-            raise ValidationError("Location not found. Please enter a valid place.")
-
-        # transform location to full display name for consistent location format
-        location = data[0]['display_name']
-        
-    except ValidationError:
-        raise
-    except Exception:
-        raise ValidationError("Failed to validate location. Try again later.")
-    
-    return location
+    # transform location to full display name for consistent location format
+    return geocode_location(location).display_name
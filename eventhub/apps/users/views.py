@@ -1,10 +1,9 @@
-import io
-from PIL import Image
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 
 from .utils import *
+from .imaging import ImageTooLarge, MAX_IMAGE_PIXELS, make_thumbnail
 from .forms import RegisterValidator, LoginValidator, ProfileValidator, SecurityValidator
 from .models import Profile
 
@@ -100,8 +99,8 @@ def avatar_upload(request):
     
     POST:
         - Validates and processes (crops & resizes) submitted file.
-        - Deletes previous avatar from cloud storage.
         - Uploads new avatar to cloud storage and stores access link in user's instance.
+        - Schedules previous avatar for deletion from cloud storage.
 
     Validations:
         - Must be JPG, PNG, GIF or WEBP format.
@@ -128,24 +127,18 @@ def avatar_upload(request):
             
         else:
             try:
-                image = Image.open(uploaded_file)
-                image_format = image.format
-                
-                # process new image
-                image = crop_to_center(image)          # crop image 1:1 in the center
-                image = image.resize(TARGET_SIZE, Image.Resampling.LANCZOS)
-            
-                # saves the image so it can be read or uploaded like a real file
-                buffer = io.BytesIO()
-                image.save(buffer, format=image_format)
-                buffer.seek(0)
-                
-                # delete previous avatar from cloud
-                cloud_delete_img(user.avatar)
+                # process new image: crop 1:1 in the center, resize and encode in memory (decoded once)
+                buffer, _ = make_thumbnail(uploaded_file, TARGET_SIZE)
+                previous_avatar = user.avatar
             
                 # set new avatar
                 set_custom_avatar(user, buffer, uploaded_file.name)
                 
+                # release previous avatar once the new one is saved (deleted later by manage.py sweep_media)
+                cloud_delete_img(previous_avatar)
+                
+            except ImageTooLarge:
+                avatar_error = f"Image resolution is too large (max {MAX_IMAGE_PIXELS // 1_000_000} megapixels)."
             except Exception:
                 avatar_error = "Something went wrong."
 
@@ -162,8 +155,8 @@ def avatar_delete(request):
         - Redirects to account page (does nothing).
 
     POST:
-        - Deletes avatar from cloud storage.
         - Sets default avatar for the user.
+        - Schedules previous avatar for deletion from cloud storage.
 
     Returns: Rendered account page (with error messages if any).
     """
@@ -173,12 +166,14 @@ def avatar_delete(request):
         avatar_error = None
                 
         try:
-            # delete user's avatar from could
-            cloud_delete_img(user.avatar)
+            previous_avatar = user.avatar
             
             # set default avatar
             set_default_avatar(user)
             
+            # release user's avatar (deleted from cloud later by manage.py sweep_media)
+            cloud_delete_img(previous_avatar)
+            
         except Exception:
             avatar_error = "Failed to delete an avatar."
             
@@ -202,6 +197,8 @@ def profile_update(request):
             user.email = email
             user.phone = phone
             user.location = location
+            if 'coordinates' in form.cleaned_data:
+                user.latitude, user.longitude = form.cleaned_data['coordinates']
             user.save()
         return render(request, 'users/account.html', {'form': form})
     return redirect('users:account')
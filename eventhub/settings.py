@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -89,12 +90,187 @@ UPLOADCARE = {
     "secret": os.getenv('UPLOADCARE_SECRET'),
 }
 CDN_DOMAIN = os.getenv('CDN_DOMAIN')
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# storage of uploaded images (avatars, event images): BACKEND is any users.storage.MediaStorage subclass,
+# created with OPTIONS as keyword arguments; the MEDIA_STORAGE=local environment variable switches to the
+# local stand-in below
+MEDIA_STORAGE = {
+    "BACKEND": "users.storage.UploadcareStorage",
+    "OPTIONS": {                        # keyword arguments of the backend
+        "public_key": UPLOADCARE['pub_key'],
+        "secret_key": UPLOADCARE['secret'],
+        "cdn_domain": CDN_DOMAIN,
+    },
+}
+if os.getenv('MEDIA_STORAGE') == 'local':
+    # local stand-in (no Uploadcare account or network needed), served by the development server
+    MEDIA_STORAGE = {
+        "BACKEND": "users.storage.LocalMediaStorage",
+        "OPTIONS": {
+            "location": MEDIA_ROOT / 'files',
+            "base_url": MEDIA_URL + 'files/',
+        },
+    }
+
+# deferred deletion of released media files (manage.py sweep_media)
+MEDIA_GC = {
+    "BATCH_SIZE": 100,          # files deleted per storage request
+    "MAX_ATTEMPTS": 10,         # failed deletions are kept for inspection afterwards
+    "RETRY_BACKOFF": 60,        # seconds before the first retry (doubles with every attempt)
+    "ORPHAN_GRACE": 24 * 60 * 60,   # seconds after upload before an unreferenced remote file counts as orphaned
+}
+
+# background uploads of event images (manage.py process_image_jobs)
+IMAGE_JOBS = {
+    "UPLOAD_DIR": MEDIA_ROOT / 'upload_queue',             # local files waiting for upload
+    "CONCURRENCY": 4,           # uploads running at once per worker
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BACKOFF": 10,        # seconds before the first retry (doubles with every attempt)
+    "LEASE": 15 * 60,           # seconds after which a running job of a crashed worker is retried
+}
+
+# price zones of an event (create event form posts them as one JSON payload, see core.zones)
+PRICE_ZONES = {
+    "MAX_ZONES": 500,               # zones per event (JSON payload and the HTML formset fallback)
+    "MAX_PAYLOAD_SIZE": 256 * 1024, # characters of the JSON payload, checked before decoding
+}
+
+# ticket reservations (core.reservations)
+RESERVATIONS = {
+    "HOLD_TTL": 10 * 60,            # seconds a hold keeps its seats before it expires unless confirmed
+    "MAX_SEATS_PER_HOLD": 10,
+    "EXPIRE_BATCH_SIZE": 500,       # expired holds reclaimed per transaction (manage.py expire_reservations)
+}
+
+# waiting room in front of ticket purchase (core.waitingroom), admissions are scheduled in memory of
+# each server process, so the rates add up across processes
+WAITING_ROOM = {
+    "ENABLED": True,
+    "ADMISSION_RATE": 20.0,         # buyers admitted per second per event
+    "BURST": 20,                    # buyers admitted at once when nobody is waiting
+    "ADMISSION_TTL": 10 * 60,       # seconds an admitted buyer can buy tickets before queuing again
+    "POLL_INTERVAL": 3,             # seconds between status checks of the waiting room page
+}
+
+# seat maps of reserved seating price zones (core.seatmaps)
+SEAT_MAPS = {
+    "MAX_SEATS": 200_000,           # larger zones are sold by count only (a bitmap of 25 KB)
+    "ROW_LENGTH": 50,               # default seats per row
+    "CAS_ATTEMPTS": 5,              # retries of a seat map write after a concurrent one
+}
+
+# explore result pages (core.explorecache); with several server processes use a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) so writes invalidate pages of all of them
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'explore': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'explore',
+        'TIMEOUT': 5 * 60,              # seconds a page is served from cache at most
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,        # cached pages and generation counters
+        },
+    },
+}
+
+EXPLORE_CACHE = {
+    "ENABLED": True,
+    "MAX_WINDOW_MONTHS": 12,        # longer (or open) date windows are invalidated per category only
+    "REPORT_EVERY": 1000,           # lookups between hit ratio reports (logged by core.explorecache)
+}
+
+# facet counts of the explore sidebar (core.facets), vectors of filters without search and location
+# are kept in memory of each server process and adjusted for events created in it
+FACETS = {
+    "CACHE_SIZE": 256,              # cached facet vectors per process
+    "CACHE_TTL": 60,                # seconds a vector is served (bounds drift from other processes)
+}
+
+# "Relevance" sort of explore (core.ranking), scores are refreshed by manage.py rank_events
+RANKING = {
+    "WEIGHTS": {                    # weights of the score components (each between 0 and 1)
+        "recency": 0.35,            # how soon the event takes place
+        "proximity": 0.2,           # how many users live near the event
+        "affinity": 0.2,            # demand for tickets of the category of the event
+        "sell_through": 0.25,       # share of the seats of the event already reserved
+    },
+    "RECENCY_HALF_LIFE": 14,        # days until an event is half as relevant as an event of today
+    "AUDIENCE_RADIUS_KM": 50,       # users within the radius count as audience of an event
+    "AFFINITY_WINDOW": 90,          # days of reservations counted for category demand
+    "BATCH_SIZE": 1000,             # events scored per transaction
+}
+
+# personalized home feeds (core.feeds), rebuilt periodically by manage.py build_feeds
+FEED = {
+    "MAX_CANDIDATES": 50,           # events kept per user
+    "POOL_SIZE": 1000,              # most relevant upcoming events considered for every user
+    "RADIUS_KM": 100,               # events within the radius of the user are considered as well
+    "LOCAL_LIMIT": 500,             # nearby events considered per user (closest first)
+    "WEIGHTS": {                    # weights of the score components (each between 0 and 1)
+        "relevance": 0.4,           # relevance score of the event (see RANKING)
+        "proximity": 0.35,          # closeness to the location of the user
+        "affinity": 0.25,           # share of the category among events the user organized or reserved
+    },
+    "BATCH_SIZE": 200,              # users whose feeds are built per transaction
+    "PAGE_SIZE": 12,                # events shown on the home page
+    "CACHE_TTL": 60,                # seconds a rendered feed is served from cache
+}
+
+# logging of the core app (background jobs, explore cache hit ratios)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# geocoding (location validation)
+GEOCODER = {
+    # any class with search(location) -> Place | None; for offline geocoding use
+    # users.geocoding.GazetteerBackend without options (load data with manage.py import_gazetteer)
+    "BACKEND": "users.geocoding.NominatimBackend",
+    "OPTIONS": {                        # keyword arguments of the backend
+        "url": os.getenv('GEOCODER_URL', 'https://nominatim.openstreetmap.org/search'),
+        "timeout": (3.05, 10),          # connect, read timeouts in seconds
+        "pool_size": 10,                # kept-alive connections
+    },
+    "RATE_LIMIT": 1.0,                  # backend requests per second (Nominatim usage policy)
+    "RATE_BURST": 1,
+    "RATE_WAIT": 5.0,                   # max seconds a lookup waits for the rate limiter
+    "CACHE_SIZE": 2048,                 # entries of in-process cache
+    "CACHE_TTL": 60 * 60,               # seconds in in-process cache
+    "NOT_FOUND_CACHE_TTL": 5 * 60,      # seconds in in-process cache for not found locations
+    "FOUND_TTL": 60 * 60 * 24 * 30,     # seconds in database cache for found locations
+    "NOT_FOUND_TTL": 60 * 60 * 24,      # seconds in database cache for not found locations
+}
 
 # Database
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # writers (e.g. ticket holds during on-sales) queue for the write lock at BEGIN
+            # instead of failing when a read transaction can't be upgraded; the trade-off: every
+            # atomic() block takes the write lock at BEGIN, even one that ends up only reading, so
+            # keep read-only code (views, feeds, facet counts) in autocommit, outside of atomic()
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # tests of concurrent writers need the busy timeout of a database file (in-memory
+        # databases shared between threads fail at once with "database table is locked"),
+        # kept out of the source tree
+        'TEST': {
+            'NAME': Path(tempfile.gettempdir()) / 'eventhub_test.sqlite3',
+        },
     }
 }
 
@@ -7,6 +7,11 @@ function renderPricingZone() {
     const totalForms = document.querySelector('#id_zones-TOTAL_FORMS');
     const formCount = parseInt(totalForms.value, 10);
 
+    // limit of price zones per event (PRICE_ZONES["MAX_ZONES"])
+    const maxZones = parseInt(pricingZones.dataset.maxZones, 10);
+    if (formCount >= maxZones)
+        return;
+
     // create new price zone
     const zoneDraft = document.querySelector('.pricing-zone-item');
     const newZone = zoneDraft.cloneNode(true);
@@ -104,4 +109,30 @@ for (const removeBtn of removeButtons)
 const pricingZones = document.getElementById('pricingZones');
 const addZoneButton = document.getElementById('addPricingZone');
 if (addZoneButton)
-    addZoneButton.addEventListener('click', () => renderPricingZone());
\ No newline at end of file
+    addZoneButton.addEventListener('click', () => renderPricingZone());
+
+// send price zones as one JSON payload instead of formset fields
+//      (backend validates all zones in one pass; the formset fields are only the fallback without javascript)
+function priceZonesPayload() {
+    const zones = [];
+    for (const zone of pricingZones.querySelectorAll('.pricing-zone-item')) {
+        zones.push({
+            zone_name: zone.querySelector('.zone-input').value,
+            zone_price: zone.querySelector('.zone-price').value,
+            zone_seats: zone.querySelector('.zone-seats').value,
+        });
+    }
+    return JSON.stringify(zones);
+}
+
+const createEventForm = document.getElementById('eventForm');
+if (createEventForm) {
+    // formdata is fired for both regular and form.submit() submissions
+    createEventForm.addEventListener('formdata', (e) => {
+        for (const key of [...e.formData.keys()]) {
+            if (key.startsWith('zones-'))
+                e.formData.delete(key);
+        }
+        e.formData.set('price_zones', priceZonesPayload());
+    });
+}
@@ -4,6 +4,7 @@ const clearPriceFilter = () => {
 
     priceInputs.forEach(input => input.value = "");
     freeOnlyCheckbox.checked = false;
+    document.querySelectorAll(".price-band-btn").forEach(btn => btn.classList.remove("active"));
 }
 
 const clearLocationFilter = () => {
@@ -64,6 +65,15 @@ document.getElementById("clearFilters").addEventListener("click", function () {
 });
 
 
+// re-run the search when sort option changes
+const sortBy = document.getElementById('sortBy');
+const filtersForm = document.getElementById('filtersForm');
+
+if (sortBy && filtersForm) {
+    sortBy.addEventListener('change', () => filtersForm.requestSubmit());
+}
+
+
 // update location radius on slider move
 const radiusSlider = document.getElementById('radiusSlider');
 const radiusValue = document.getElementById('radiusValue');
@@ -97,18 +107,19 @@ const quickDates = document.querySelector('.quick-dates');
 const quickDatesBtns = quickDates.querySelectorAll('.quick-date-btn');
 
 quickDates.addEventListener('click', function (e) {
-    if (e.target && e.target.tagName === 'BUTTON') {
+    const button = e.target.closest('.quick-date-btn');
+    if (button) {
         quickDatesBtns.forEach(btn => btn.classList.remove('active'));
-        e.target.classList.add('active');
+        button.classList.add('active');
 
         // update date range based on the clicked button
-        const buttonText = e.target.textContent.trim().toLowerCase();
+        const range = button.dataset.range;
         let startDate = new Date();
         let endDate = new Date();
 
-        if (buttonText === 'this week')
+        if (range === 'week')
             endDate.setDate(startDate.getDate() + 6);
-        else if (buttonText === 'this month') {
+        else if (range === 'month') {
             endDate.setMonth(startDate.getMonth() + 1);
             endDate.setDate(0);     // end on the last day of the current month
         }
@@ -118,6 +129,24 @@ quickDates.addEventListener('click', function (e) {
     }
 });
 
+// set price range when a price band button is clicked
+const priceBands = document.querySelector('.price-bands');
+const priceMin = document.querySelector('input[name="price_min"]');
+const priceMax = document.querySelector('input[name="price_max"]');
+const freeOnly = document.querySelector('input[name="free_only"]');
+
+priceBands.addEventListener('click', function (e) {
+    const button = e.target.closest('.price-band-btn');
+    if (button) {
+        priceBands.querySelectorAll('.price-band-btn').forEach(btn => btn.classList.remove('active'));
+        button.classList.add('active');
+
+        priceMin.value = button.dataset.min;
+        priceMax.value = button.dataset.max;
+        freeOnly.checked = false;
+    }
+});
+
 
 // change the position of create event button depending on breakpoint of max-width: 615px
 const eventsHeader = document.querySelector('.events-header');
@@ -144,4 +173,47 @@ function onWidthChange(e) {
 }
 
 winWidth.addEventListener('change', onWidthChange);
-onWidthChange(winWidth);
\ No newline at end of file
+onWidthChange(winWidth);
+
+// infinite scroll: load the next page of events when the sentinel below the grid becomes visible
+const eventsGrid = document.getElementById('eventsGrid');
+const eventsSentinel = document.getElementById('eventsSentinel');
+const resultsShown = document.getElementById('resultsShown');
+const resultsMore = document.getElementById('resultsMore');
+let loadingEvents = false;
+
+async function loadNextEvents(observer) {
+    const nextUrl = eventsSentinel.dataset.nextUrl;
+    if (loadingEvents || !nextUrl)
+        return;
+
+    loadingEvents = true;
+    try {
+        const response = await fetch(nextUrl, { headers: { 'Accept': 'application/json' } });
+        if (!response.ok)
+            return;
+
+        const page = await response.json();
+        eventsGrid.insertAdjacentHTML('beforeend', page.html);
+        resultsShown.textContent = parseInt(resultsShown.textContent, 10) + page.count;
+
+        if (page.next_page_url)
+            eventsSentinel.dataset.nextUrl = page.next_page_url;
+        else {
+            // last page
+            observer.disconnect();
+            eventsSentinel.remove();
+            resultsMore.textContent = '';
+        }
+    } finally {
+        loadingEvents = false;
+    }
+}
+
+if (eventsGrid && eventsSentinel) {
+    const scrollObserver = new IntersectionObserver((entries, observer) => {
+        if (entries.some(entry => entry.isIntersecting))
+            loadNextEvents(observer);
+    }, { rootMargin: '600px 0px' });
+    scrollObserver.observe(eventsSentinel);
+}
@@ -0,0 +1,41 @@
+
+// waiting room: poll the queue position (served from the signed queue cookie, no page reloads)
+// and continue to the purchase page once admitted
+const waitingRoom = document.getElementById('waitingRoom');
+
+// wait until the next status check: poll interval, or less when admission is expected sooner
+function nextPollDelay(wait) {
+    const pollInterval = parseFloat(waitingRoom.dataset.pollInterval) * 1000;
+    return Math.min(pollInterval, Math.max(wait * 1000, 250));
+}
+
+async function pollQueueStatus() {
+    const statusUrl = waitingRoom.dataset.statusUrl;
+    const queueError = document.getElementById('queueError');
+
+    try {
+        const response = await fetch(statusUrl, { headers: { 'Accept': 'application/json' } });
+        if (response.status === 404) {
+            // queue ticket expired, join again
+            window.location.reload();
+            return;
+        }
+
+        const status = await response.json();
+        if (status.admitted) {
+            window.location.href = waitingRoom.dataset.nextUrl;
+            return;
+        }
+        document.getElementById('queuePosition').textContent = status.position;
+        document.getElementById('queueWait').textContent = status.wait;
+        queueError.textContent = '';
+
+        setTimeout(pollQueueStatus, nextPollDelay(status.wait));
+    } catch (e) {
+        queueError.textContent = 'Connection lost, retrying...';
+        setTimeout(pollQueueStatus, nextPollDelay(Infinity));
+    }
+}
+
+if (waitingRoom)
+    setTimeout(pollQueueStatus, nextPollDelay(parseFloat(waitingRoom.dataset.wait)));
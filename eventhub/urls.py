@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
@@ -6,3 +8,6 @@ urlpatterns = [
     path('', include('users.urls')),
     path('', include('core.urls'))
 ]
+
+# files of the local media storage stand-in (settings.MEDIA_STORAGE), development only
+urlpatterns += static(settings.MEDIA_URL + 'files/', document_root=settings.MEDIA_ROOT / 'files')